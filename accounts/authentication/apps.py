@@ -3,4 +3,13 @@ from django.apps import AppConfig
 
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'accounts.authentication'
\ No newline at end of file
+    name = 'accounts.authentication'
+
+    def ready(self):
+        from django.contrib.auth.password_validation import get_default_password_validators
+
+        from . import signals  # noqa: F401
+
+        # Instancie les validateurs (et charge la liste des mots de passe
+        # courants) au démarrage plutôt que pendant la première inscription
+        get_default_password_validators()
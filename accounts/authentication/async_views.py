@@ -0,0 +1,102 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+
+from .authentication import ClaimsJWTAuthentication, user_data_from_claims
+from .throttling import IPBucketThrottle
+from .weather import UPSTREAM_ERRORS, WeatherUpstreamError, aget_weather
+
+# Vues asynchrones natives, servies par api_fil_rouge/asgi.py sans bloquer
+# de thread pendant les entrées/sorties. Sous WSGI, Django les exécute dans
+# une boucle dédiée : elles restent fonctionnelles, sans le gain de concurrence.
+
+
+def _auth_error(exc, request):
+    """Même réponse 401 que DRF, en-tête ``WWW-Authenticate`` compris."""
+    response = JsonResponse({"detail": exc.detail}, status=exc.status_code)
+    authenticator = api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]()
+    response["WWW-Authenticate"] = authenticator.authenticate_header(request)
+    return response
+
+
+async def authenticate(request, authentication_classes=None):
+    """
+    Authentifie la requête avec les classes DRF configurées (JWT) ou celles
+    passées en argument.
+
+    Retourne ``(user, token)`` ou ``None`` si aucun identifiant n'est fourni ;
+    lève ``AuthenticationFailed`` si le token est invalide.
+    """
+    for authenticator_class in authentication_classes or api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        authenticator = authenticator_class()
+        # Le décodage du JWT est local ; seul le chargement de l'utilisateur touche la base
+        result = await sync_to_async(authenticator.authenticate)(request)
+        if result is not None:
+            return result
+    return None
+
+
+async def check_throttles(request, view):
+    """Équivalent de ``APIView.check_throttles`` : rend une réponse 429 ou ``None``."""
+    waits = []
+    for throttle in (throttle_class() for throttle_class in view.throttle_classes):
+        if not await sync_to_async(throttle.allow_request)(request, view):
+            waits.append(throttle.wait())
+    if not waits:
+        return None
+    exc = exceptions.Throttled(max(waits))
+    response = JsonResponse({"detail": exc.detail}, status=exc.status_code)
+    response["Retry-After"] = "%d" % exc.wait
+    return response
+
+
+# ==========================================
+# /async/me/ — utilisateur connecté
+# ==========================================
+class AsyncMeView(View):
+    http_method_names = ["get"]
+    query_budget = 2
+
+    async def get(self, request):
+        classes = [ClaimsJWTAuthentication] if settings.AUTH_ME_FROM_CLAIMS else None
+        try:
+            result = await authenticate(request, classes)
+        except exceptions.AuthenticationFailed as e:
+            return _auth_error(e, request)
+        if result is None or not result[0].is_authenticated:
+            return _auth_error(exceptions.NotAuthenticated(), request)
+        if settings.AUTH_ME_FROM_CLAIMS:
+            return JsonResponse(user_data_from_claims(result[1]))
+        user = result[0]
+        return JsonResponse({
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "is_staff": user.is_staff,
+            "is_active": user.is_active,
+        })
+
+
+# ==========================================
+# /async/weather/<city>/ — météo pour une ville
+# ==========================================
+class AsyncWeatherView(View):
+    http_method_names = ["get"]
+    # Requête non authentifiée : limitation par adresse IP seulement
+    throttle_classes = [IPBucketThrottle]
+    throttle_scope = "weather"
+    query_budget = 0
+
+    async def get(self, request, city):
+        throttled = await check_throttles(request, self)
+        if throttled is not None:
+            return throttled
+        try:
+            return JsonResponse(await aget_weather(city))
+        except WeatherUpstreamError as e:
+            return JsonResponse({"error": "Ville non trouvée ou API indisponible"}, status=e.status_code)
+        except UPSTREAM_ERRORS:
+            return JsonResponse({"error": "API météo indisponible"}, status=503)
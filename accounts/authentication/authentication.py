@@ -0,0 +1,103 @@
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import TTLCache
+from .conditional import bump_user_versions
+from .metrics import register_cache
+from .tokens import check_token_version
+
+# Utilisateurs authentifiés récemment, par identifiant. Une entrée est
+# supprimée dès que l'utilisateur est enregistré ou supprimé (voir signals.py) ;
+# les autres processus la gardent au plus AUTH_USER_CACHE["TTL"] secondes.
+user_cache = TTLCache(
+    max_entries=settings.AUTH_USER_CACHE["MAX_ENTRIES"],
+    ttl=settings.AUTH_USER_CACHE["TTL"],
+)
+register_cache("auth_users", user_cache)
+
+
+def invalidate_users(user_ids):
+    """À appeler après une mise à jour qui ne déclenche pas ``post_save`` (``update()``, ``bulk_create()``)."""
+    user_ids = list(user_ids)
+    for user_id in user_ids:
+        user_cache.delete(str(user_id))
+    # Les ETag des profils et de la liste des utilisateurs changent (voir conditional.py)
+    bump_user_versions(user_ids)
+
+
+class TokenVersionMixin:
+    """Refuse les tokens émis avant la dernière révocation de l'utilisateur (claim ``ver``)."""
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        try:
+            check_token_version(validated_token)
+        except TokenError as e:
+            raise InvalidToken(e.args[0]) from e
+        return validated_token
+
+
+class CachedJWTAuthentication(TokenVersionMixin, JWTAuthentication):
+    """
+    ``JWTAuthentication`` sans ``SELECT`` sur ``auth_user`` à chaque requête :
+    l'utilisateur est lu depuis un cache local à durée de vie courte.
+
+    Chaque requête reçoit sa propre copie de l'instance, qu'elle peut modifier
+    sans toucher au cache.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        found = user_cache.lookup(str(user_id)) if user_id is not None else None
+        if found is None:
+            user = super().get_user(validated_token)
+            user_cache.set(str(user_id), user)
+            return copy.copy(user)
+
+        user = copy.copy(found[0])
+        # Mêmes contrôles que JWTAuthentication.get_user, qui dépendent du token
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+        return user
+
+
+class ClaimsJWTAuthentication(TokenVersionMixin, JWTStatelessUserAuthentication):
+    """
+    Utilisateur reconstruit depuis les claims du token, sans lecture de ``auth_user``.
+
+    La vérification de révocation coûte une requête (``TokenVersion``) quand
+    la version de l'utilisateur n'est pas dans ``version_cache`` : le cache
+    est local au processus, une absence ne permet pas de supposer la version 0.
+    """
+
+
+def user_data_from_claims(token):
+    """
+    Réponse de /me/ construite uniquement à partir d'un token validé.
+
+    Les claims reflètent l'utilisateur au moment de la connexion : une
+    modification ultérieure n'apparaît qu'avec le token suivant.
+    """
+    id_field = get_user_model()._meta.get_field(api_settings.USER_ID_FIELD)
+    return {
+        # simplejwt stocke l'identifiant en chaîne : on rend le même type que /me/
+        "id": id_field.to_python(token[api_settings.USER_ID_CLAIM]),
+        "username": token.get("username", ""),
+        "email": token.get("email", ""),
+        "is_staff": token.get("is_staff", False),
+        "is_active": token.get("is_active", True),
+    }
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .hashing import check_user_password, hash_password
+
+UserModel = get_user_model()
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` dont la vérification du mot de passe passe par le pool
+    de hachage (voir hashing.py). Lève ``HashingUnavailable`` (503) si le pool
+    est saturé.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Même coût qu'un utilisateur existant : évite de révéler les comptes (#20760)
+            hash_password(password)
+        else:
+            if check_user_password(user, password) and self.user_can_authenticate(user):
+                return user
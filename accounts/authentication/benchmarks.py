@@ -0,0 +1,231 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers, password_validation
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from accounts.users.serializers import UserSerializer
+
+from .fastjson import compile_serializer
+from .hashing import PasswordHashPool
+from .loadtest import SCENARIOS, compare_to_baseline, run_endpoints
+from .serializers import RegisterSerializer, UserListSerializer
+from .weather import normalize_city, weather_cache
+
+# Suites de « python manage.py benchmark », par nom
+SUITES = {}
+
+
+class BenchmarkRegression(Exception):
+    """Résultats dégradés par rapport à la référence enregistrée."""
+
+    def __init__(self, regressions):
+        super().__init__("\n".join(regressions))
+        self.regressions = regressions
+
+
+def suite(name):
+    """Enregistre une fonction ``(stdout, options)`` comme suite de mesures."""
+    def register(fn):
+        SUITES[name] = fn
+        return fn
+    return register
+
+
+def measure(fn, *args, duration=1.0, min_runs=3):
+    """Appelle ``fn(*args)`` pendant au moins ``duration`` secondes ; rend les durées (s) de chaque appel."""
+    timings = []
+    deadline = time.perf_counter() + duration
+    while len(timings) < min_runs or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def recommend_iterations(iterations, hash_ms, target_ms, step=10000):
+    """Nombre d'itérations PBKDF2 pour qu'un hachage dure environ ``target_ms`` (le coût est linéaire)."""
+    recommended = int(iterations * target_ms / hash_ms) // step * step
+    return max(step, recommended)
+
+
+@suite("hashing")
+def hashing_suite(stdout, options):
+    """Hachages par seconde et par cœur, débit du pool et nombre d'itérations conseillé."""
+    hasher = hashers.get_hasher("default")
+    iterations = getattr(hasher, "iterations", None)
+    timings = measure(hashers.make_password, "benchmark-password", duration=options["duration"])
+    hash_ms = sum(timings) / len(timings) * 1000
+    stdout.write(f"Hacheur : {hasher.algorithm}" + (f" ({iterations} itérations)" if iterations else ""))
+    stdout.write(f"Un cœur : {hash_ms:.1f} ms par hachage, {1000 / hash_ms:.2f} hachages/s")
+
+    workers = options["workers"] or os.cpu_count() or 1
+    pool = PasswordHashPool(workers=workers, max_pending=workers * 4)
+    runs = workers * 4
+    # Autant de requêtes simultanées que de places dans le pool
+    callers = ThreadPoolExecutor(max_workers=runs)
+    try:
+        # Démarrage des processus hors mesure
+        list(callers.map(lambda _: pool.run(hashers.make_password, "warm-up"), range(workers)))
+        started = time.perf_counter()
+        list(callers.map(lambda _: pool.run(hashers.make_password, "benchmark-password"), range(runs)))
+        elapsed = time.perf_counter() - started
+    finally:
+        callers.shutdown()
+        pool.shutdown()
+    stdout.write(
+        f"Pool de {workers} processus : {runs / elapsed:.2f} hachages/s, "
+        f"{runs / elapsed / workers:.2f} par cœur"
+    )
+
+    target_ms = options["target_ms"]
+    if iterations is None:
+        stdout.write("Recommandation : non applicable (hacheur sans itérations)")
+        return
+    recommended = recommend_iterations(iterations, hash_ms, target_ms)
+    stdout.write(
+        f"Recommandation pour {target_ms:g} ms par connexion : PASSWORD_HASH_ITERATIONS={recommended} "
+        f"(environ {workers * 1000 / target_ms:.0f} connexions/s avec {workers} processus)"
+    )
+
+
+# Mots de passe représentatifs : valide, trop faible (plusieurs règles violées), courant
+VALIDATION_SAMPLES = {"valide": "Str0ng!Passw0rd", "faible": "abc", "courant": "password"}
+
+
+def _validate(password):
+    try:
+        password_validation.validate_password(password)
+    except ValidationError:
+        pass
+
+
+@suite("validation")
+def validation_suite(stdout, options):
+    """Latence de validate_password et coût du chargement de la liste des mots de passe courants."""
+    cold = measure(password_validation.CommonPasswordValidator, duration=options["duration"] / 4)
+    stdout.write(f"Liste des mots de passe courants (chargement à froid) : {min(cold) * 1000:.1f} ms")
+    preloaded = measure(password_validation.get_default_password_validators, duration=options["duration"] / 4)
+    stdout.write(f"Validateurs préchargés : {min(preloaded) * 1e6:.1f} µs")
+    for label, password in VALIDATION_SAMPLES.items():
+        timings = measure(_validate, password, duration=options["duration"] / len(VALIDATION_SAMPLES))
+        timings.sort()
+        stdout.write(
+            f"validate_password ({label}) : médiane {timings[len(timings) // 2] * 1e6:.1f} µs, "
+            f"{len(timings) / sum(timings):.0f} validations/s"
+        )
+
+
+# Ville servie depuis le cache : la mesure ne porte que sur la chaîne de traitement
+MIDDLEWARE_CITY = "Benchville"
+
+
+def _median(timings):
+    return sorted(timings)[len(timings) // 2]
+
+
+@suite("middleware")
+def middleware_suite(stdout, options):
+    """Coût par requête de la chaîne de middlewares sur /api/, avec et sans le profil API."""
+    url = reverse("weather", args=[MIDDLEWARE_CITY])
+    setup_test_environment()
+    try:
+        with override_settings(THROTTLING={**settings.THROTTLING, "ENABLED": False}):
+            weather_cache.set(normalize_city(MIDDLEWARE_CITY), {"name": MIDDLEWARE_CITY, "main": {"temp": 21.5}})
+            medians = {}
+            for label, enabled in (("complet", False), ("API", True)):
+                profile = {**settings.API_MIDDLEWARE_PROFILE, "ENABLED": enabled}
+                with override_settings(API_MIDDLEWARE_PROFILE=profile):
+                    client = Client()
+                    client.get(url)
+                    medians[label] = _median(measure(client.get, url, duration=options["duration"] / 2))
+                stdout.write(f"GET {url} (profil {label}) : médiane {medians[label] * 1e6:.0f} µs")
+    finally:
+        weather_cache.delete(normalize_city(MIDDLEWARE_CITY))
+        teardown_test_environment()
+    saved = medians["complet"] - medians["API"]
+    stdout.write(
+        f"Session, CSRF, authentification et messages évités : {saved * 1e6:.0f} µs par requête "
+        f"({saved / medians['complet']:.0%})"
+    )
+
+
+# Lignes par mesure de la suite serializers : une page maximale de la liste
+SERIALIZER_ROWS = 500
+
+
+def _user_rows(count):
+    return [(i, f"user-{i}", f"user-{i}@example.com", i % 7 != 0) for i in range(1, count + 1)]
+
+
+@suite("serializers")
+def serializers_suite(stdout, options):
+    """Lignes encodées par seconde : serializers DRF + JSONRenderer contre serializers compilés."""
+    renderer = JSONRenderer()
+    rows = _user_rows(SERIALIZER_ROWS)
+    users = [User(id=i, username=username, email=email, is_active=active) for i, username, email, active in rows]
+    # Chemin précédent de la liste : dictionnaires de values() rendus par JSONRenderer
+    dicts = [dict(zip(UserListSerializer.Meta.fields, row)) for row in rows]
+    list_compiled = compile_serializer(UserListSerializer)
+    cases = {"liste": (lambda: renderer.render(dicts), lambda: list_compiled.rows(rows).encode())}
+    for label, serializer_class in (("profil", UserSerializer), ("inscription", RegisterSerializer)):
+        compiled = compile_serializer(serializer_class)
+        cases[label] = (
+            lambda serializer_class=serializer_class: b"\n".join(
+                renderer.render(serializer_class(user).data) for user in users
+            ),
+            lambda compiled=compiled: b"\n".join(compiled.instance(user).encode() for user in users),
+        )
+
+    stdout.write(f"{SERIALIZER_ROWS} lignes par appel")
+    stdout.write(f"{'cas':<12} {'DRF lignes/s':>14} {'compilé lignes/s':>17} {'gain':>6}")
+    for label, (drf, fast) in cases.items():
+        if drf() != fast():
+            raise BenchmarkRegression([f"{label} : la sortie compilée diffère de celle de DRF"])
+        drf_rate = SERIALIZER_ROWS / _median(measure(drf, duration=options["duration"] / 6))
+        fast_rate = SERIALIZER_ROWS / _median(measure(fast, duration=options["duration"] / 6))
+        stdout.write(f"{label:<12} {drf_rate:>14,.0f} {fast_rate:>17,.0f} {fast_rate / drf_rate:>5.1f}x")
+
+
+@suite("endpoints")
+def endpoints_suite(stdout, options):
+    """Débit, latences p50/p95/p99 et requêtes SQL par appel des principaux endpoints."""
+    names = options["endpoints"] or list(SCENARIOS)
+    concurrency = options["concurrency"]
+    results = run_endpoints(names, concurrency=concurrency, duration=options["duration"],
+                            upstream_delay=options["upstream_delay_ms"] / 1000)
+    stdout.write(f"{concurrency} clients simultanés, {options['duration']:g} s par scénario")
+    stdout.write(f"{'scénario':<10} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'SQL/req':>8} {'erreurs':>8}")
+    for name, r in results.items():
+        stdout.write(
+            f"{name:<10} {r['throughput']:>9.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+            f"{r['p99_ms']:>9.1f} {r['queries']:>8.1f} {r['errors']:>8}"
+        )
+
+    path = options["baseline"]
+    if path is None:
+        return
+    if options["save_baseline"]:
+        baseline = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                baseline = json.load(f)
+        # Les scénarios non mesurés cette fois gardent leur référence
+        baseline.update(results)
+        with open(path, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        stdout.write(f"Référence enregistrée dans {path}")
+        return
+    with open(path) as f:
+        regressions = compare_to_baseline(results, json.load(f), options["tolerance"])
+    if regressions:
+        raise BenchmarkRegression(regressions)
+    stdout.write(f"Aucune régression par rapport à {path} (tolérance {options['tolerance']:.0%})")
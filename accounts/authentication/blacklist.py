@@ -0,0 +1,173 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .bloom import BloomFilter
+
+
+class BlacklistFilter:
+    """
+    Pré-filtre en mémoire devant la table ``BlacklistedToken``.
+
+    Un filtre de Bloom contient les ``jti`` révoqués et non expirés : s'il
+    répond « absent », le token n'est pas sur liste noire et on évite la
+    lecture en base ; s'il répond « présent » (vrai ou faux positif), on
+    vérifie en base comme avant.
+
+    Le filtre est chargé au premier usage, complété toutes les
+    ``sync_interval`` secondes avec les révocations récentes (y compris
+    celles des autres processus) et reconstruit toutes les
+    ``rebuild_interval`` secondes pour oublier les tokens expirés.
+    Les révocations faites par ce processus y sont ajoutées immédiatement.
+    """
+
+    # Marge de relecture : transactions encore en cours et décalage d'horloge entre serveurs
+    SYNC_OVERLAP = timedelta(seconds=5)
+
+    def __init__(self, capacity, error_rate=0.01, sync_interval=5, rebuild_interval=3600,
+                 enabled=True, clock=time.monotonic):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.enabled = enabled
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # une seule synchronisation à la fois
+        self._bloom = None
+        self._built_at = None
+        self._synced_at = None
+        self._watermark = None  # date (base) de la dernière synchronisation
+        self._pending = None  # révocations locales pendant une reconstruction
+        self._counters = dict.fromkeys(("checks", "skipped", "syncs", "rebuilds"), 0)
+
+    def might_contain(self, jti):
+        """``False`` si le token n'est certainement pas sur liste noire."""
+        if not self.enabled:
+            return True
+        bloom = self._current()
+        found = jti in bloom
+        with self._lock:
+            self._counters["checks"] += 1
+            if not found:
+                self._counters["skipped"] += 1
+        return found
+
+    def add(self, jti):
+        """Enregistre une révocation faite par ce processus."""
+        with self._lock:
+            if self._bloom is not None and jti not in self._bloom:
+                self._bloom.add(jti)
+            if self._pending is not None:
+                self._pending.append(jti)
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+            self._pending = None
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def stats(self):
+        with self._lock:
+            bloom = self._bloom
+            return {
+                **self._counters,
+                "enabled": self.enabled,
+                "size": bloom.count if bloom is not None else 0,
+                "capacity": bloom.capacity if bloom is not None else self.capacity,
+            }
+
+    # ------------------------------------------------------------
+    # Chargement et synchronisation
+    # ------------------------------------------------------------
+    def _current(self):
+        now = self._clock()
+        if self._bloom is None:
+            # Premier usage : les autres threads attendent le chargement initial
+            with self._refresh_lock:
+                if self._bloom is None:
+                    self.rebuild()
+        elif now - self._synced_at >= self.sync_interval and self._refresh_lock.acquire(blocking=False):
+            # Les autres threads continuent avec le filtre courant pendant la synchronisation
+            try:
+                if now - self._built_at >= self.rebuild_interval or self._bloom.count > self._bloom.capacity:
+                    self.rebuild()
+                else:
+                    self._sync()
+            finally:
+                self._refresh_lock.release()
+        return self._bloom
+
+    def rebuild(self):
+        """Recharge entièrement le filtre depuis la base."""
+        with self._lock:
+            self._pending = []
+        started = timezone.now()
+        revoked = BlacklistedToken.objects.filter(token__expires_at__gt=started)
+        # Marge pour les révocations à venir avant la prochaine reconstruction
+        bloom = BloomFilter(max(self.capacity, 2 * revoked.count()), self.error_rate)
+        for jti in revoked.values_list("token__jti", flat=True).iterator():
+            bloom.add(jti)
+        with self._lock:
+            for jti in self._pending:
+                if jti not in bloom:
+                    bloom.add(jti)
+            self._pending = None
+            self._bloom = bloom
+            self._watermark = started
+            self._built_at = self._synced_at = self._clock()
+            self._counters["rebuilds"] += 1
+
+    def _sync(self):
+        started = timezone.now()
+        recent = BlacklistedToken.objects.filter(blacklisted_at__gte=self._watermark - self.SYNC_OVERLAP)
+        jtis = list(recent.values_list("token__jti", flat=True))
+        with self._lock:
+            for jti in jtis:
+                if jti not in self._bloom:
+                    self._bloom.add(jti)
+            self._watermark = started
+            self._synced_at = self._clock()
+            self._counters["syncs"] += 1
+
+
+blacklist_filter = BlacklistFilter(
+    capacity=settings.TOKEN_BLACKLIST_FILTER["CAPACITY"],
+    error_rate=settings.TOKEN_BLACKLIST_FILTER["ERROR_RATE"],
+    sync_interval=settings.TOKEN_BLACKLIST_FILTER["SYNC_INTERVAL"],
+    rebuild_interval=settings.TOKEN_BLACKLIST_FILTER["REBUILD_INTERVAL"],
+    enabled=settings.TOKEN_BLACKLIST_FILTER["ENABLED"],
+)
+
+
+def purge_expired_tokens(cutoff, batch_size=1000, start_after=0):
+    """
+    Supprime par lots les tokens expirés avant ``cutoff`` et leur entrée de
+    liste noire, par identifiant croissant.
+
+    Chaque lot est une transaction courte ; le générateur rend
+    ``(dernier_id, supprimés)`` après chaque lot. On peut reprendre une purge
+    interrompue avec ``start_after=dernier_id`` (ou simplement la relancer :
+    les lots déjà supprimés ne sont plus trouvés).
+    """
+    last_id = start_after
+    while True:
+        ids = list(
+            OutstandingToken.objects
+            .filter(id__gt=last_id, expires_at__lte=cutoff)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        with transaction.atomic():
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            OutstandingToken.objects.filter(id__in=ids).delete()
+        last_id = ids[-1]
+        yield last_id, len(ids)
@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TTLCache:
+    """
+    Cache en mémoire borné (LRU) avec expiration (TTL).
+
+    Une entrée expirée reste servie pendant ``stale_ttl`` secondes
+    (stale-while-revalidate) pendant qu'un rafraîchissement est lancé
+    en arrière-plan. Au-delà, elle est considérée comme absente.
+    """
+
+    def __init__(self, max_entries=512, ttl=600, stale_ttl=0,
+                 executor=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clé -> (valeur, expire_à)
+        self._refreshing = set()
+        self._refresh_tasks = set()  # garde une référence aux tâches asyncio en cours
+        self._counters = dict.fromkeys(
+            ("hits", "stale_hits", "misses", "evictions", "refreshes", "refresh_errors"), 0
+        )
+
+    # ------------------------------------------------------------
+    # Accès de base
+    # ------------------------------------------------------------
+    def lookup(self, key):
+        """
+        Retourne ``(valeur, est_périmée)`` ou ``None`` si la clé est absente
+        ou trop ancienne pour être servie.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            value, expires_at = entry
+            if now >= expires_at + self.stale_ttl:
+                del self._entries[key]
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            if now < expires_at:
+                self._counters["hits"] += 1
+                return value, False
+            self._counters["stale_hits"] += 1
+            return value, True
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, self._clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._refreshing.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+            stats["max_entries"] = self.max_entries
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    # ------------------------------------------------------------
+    # Lecture avec chargement
+    # ------------------------------------------------------------
+    def get_or_fetch(self, key, fetch):
+        """
+        Retourne la valeur en cache ou appelle ``fetch(key)`` pour la charger.
+        Une entrée périmée est servie immédiatement et rafraîchie en arrière-plan.
+        Les exceptions de ``fetch`` ne sont jamais mises en cache.
+        """
+        found = self.lookup(key)
+        if found is None:
+            value = fetch(key)
+            self.set(key, value)
+            return value
+        value, stale = found
+        if stale:
+            self._schedule_refresh(key, fetch)
+        return value
+
+    async def aget_or_fetch(self, key, fetch):
+        """
+        Variante asynchrone de ``get_or_fetch`` : ``fetch(key)`` est une
+        coroutine et le rafraîchissement d'une entrée périmée est une tâche
+        de la boucle courante.
+        """
+        found = self.lookup(key)
+        if found is None:
+            value = await fetch(key)
+            self.set(key, value)
+            return value
+        value, stale = found
+        if stale and self._start_refresh(key):
+            task = asyncio.create_task(self._arefresh(key, fetch))
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+        return value
+
+    def _start_refresh(self, key):
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def _schedule_refresh(self, key, fetch):
+        if not self._start_refresh(key):
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+        self._executor.submit(self._refresh, key, fetch)
+
+    def _refresh(self, key, fetch):
+        try:
+            value = fetch(key)
+        except Exception:
+            self._end_refresh(key, None, failed=True)
+        else:
+            self._end_refresh(key, value, failed=False)
+
+    async def _arefresh(self, key, fetch):
+        try:
+            value = await fetch(key)
+        except Exception:
+            self._end_refresh(key, None, failed=True)
+        else:
+            self._end_refresh(key, value, failed=False)
+
+    def _end_refresh(self, key, value, failed):
+        if not failed:
+            self.set(key, value)
+        with self._lock:
+            # En cas d'échec, on garde l'entrée périmée : elle expirera d'elle-même
+            self._counters["refresh_errors" if failed else "refreshes"] += 1
+            self._refreshing.discard(key)
@@ -0,0 +1,184 @@
+"""
+Requêtes conditionnelles (``If-None-Match`` / ``If-Modified-Since``) sur les lectures.
+
+Les validateurs sont calculés sans produire le corps de la réponse :
+
+- profil : version de l'utilisateur (``user_version``) ;
+- liste des utilisateurs : version de la table (``users_version``) ;
+- météo : heure d'observation renvoyée par OpenWeatherMap (``dt``).
+
+Les versions sont des instants (en nanosecondes) renouvelés à chaque
+écriture d'un utilisateur (voir ``authentication.invalidate_users``) et
+stockés dans le cache ``CONDITIONAL_GET["CACHE_ALIAS"]``, qui doit être
+partagé entre les processus. Une version absente (cache vidé) est recréée
+à l'instant courant : le client reçoit alors une réponse complète, jamais
+un 304 à tort. Avec un cache propre au processus (``LocMemCache``, le
+défaut sans ``CACHES``), les autres processus ne verraient pas les
+écritures : la liste n'a alors pas de validateurs (``check --deploy`` le
+signale). Les profils gardent les leurs, qui couvrent aussi une empreinte
+des valeurs exposées.
+
+L'ETag dépend aussi du rendu négocié (JSON, API navigable…).
+
+``Last-Modified`` est à la seconde près ; quand le client envoie les deux
+en-têtes, seul l'ETag est comparé.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from api_fil_rouge.routers import replica_reads_enabled
+
+USERS_VERSION_KEY = "conditional:users"
+
+
+def _user_key(user_id):
+    return f"conditional:user:{user_id}"
+
+
+def _cache():
+    return caches[settings.CONDITIONAL_GET["CACHE_ALIAS"]]
+
+
+def versions_are_shared():
+    """Faux si le cache des versions est propre au processus (``LocMemCache``)."""
+    return not isinstance(_cache(), LocMemCache)
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_versions(app_configs, **kwargs):
+    if not settings.CONDITIONAL_GET["ENABLED"] or versions_are_shared():
+        return []
+    return [checks.Warning(
+        "CONDITIONAL_GET[\"CACHE_ALIAS\"] désigne un cache propre au processus : "
+        "la liste des utilisateurs est envoyée sans ETag ni Last-Modified.",
+        hint="Configurez un cache partagé (Redis, Memcached, base de données) dans CACHES.",
+        id="authentication.W001",
+    )]
+
+
+def _version(key):
+    cache = _cache()
+    version = cache.get(key)
+    if version is None:
+        # add() : une version posée entre-temps par un autre processus est conservée
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key, time.time_ns())
+    return version
+
+
+def user_version(user_id):
+    return _version(_user_key(user_id))
+
+
+def users_version():
+    return _version(USERS_VERSION_KEY)
+
+
+def bump_user_versions(user_ids):
+    """Renouvelle la version de ces utilisateurs et, dans tous les cas, celle de la table."""
+    now = time.time_ns()
+    versions = {_user_key(user_id): now for user_id in user_ids}
+    versions[USERS_VERSION_KEY] = now
+    _cache().set_many(versions, timeout=None)
+
+
+class Validators:
+    """ETag et date de dernière modification (``datetime`` UTC) d'une réponse."""
+
+    def __init__(self, etag, last_modified=None, private=True, weak=False):
+        self.tag = etag
+        self.weak = weak
+        self.last_modified = last_modified
+        self.private = private
+
+    @property
+    def etag(self):
+        return ("W/" if self.weak else "") + quote_etag(self.tag)
+
+    def for_media_type(self, media_type):
+        """Mêmes validateurs, avec un ETag propre au rendu ``media_type``."""
+        return Validators(f"{self.tag}-{_digest([media_type])[:8]}", self.last_modified, self.private, self.weak)
+
+    def apply(self, response):
+        response.headers.setdefault("ETag", self.etag)
+        if self.last_modified is not None:
+            response.headers.setdefault("Last-Modified", http_date(self.last_modified.timestamp()))
+        # Sans no-cache, Last-Modified autoriserait une mise en cache heuristique sans revalidation
+        patch_cache_control(response, no_cache=True, **({"private": True} if self.private else {}))
+        return response
+
+
+def _from_ns(version):
+    return datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+
+def _digest(values):
+    return hashlib.sha256(repr(tuple(values)).encode()).hexdigest()[:16]
+
+
+def profile_validators(user_id, values):
+    """
+    Validateurs d'un profil : version de l'utilisateur et empreinte des
+    valeurs exposées (``values``). L'empreinte couvre les copies locales de
+    l'utilisateur en retard sur la version et les profils lus dans le token.
+    """
+    version = user_version(user_id)
+    return Validators(f"{version:x}-{_digest(values)}", _from_ns(version))
+
+
+def users_validators():
+    """
+    Validateurs de la liste des utilisateurs, ou None si les versions ne
+    sont pas partagées entre les processus, ou juste après une écriture si
+    la liste est lue sur un réplica qui peut être en retard.
+    """
+    if not versions_are_shared():
+        return None
+    version = users_version()
+    if replica_reads_enabled() and time.time_ns() - version < settings.REPLICA_READS["PIN_SECONDS"] * 1e9:
+        return None
+    return Validators(f"users-{version:x}", _from_ns(version))
+
+
+def weather_validators(data):
+    """Validateurs d'une météo : heure d'observation (``dt``), ou None si elle est absente."""
+    observed_at = data.get("dt") if isinstance(data, dict) else None
+    if not isinstance(observed_at, int):
+        return None
+    # Faible : deux lectures d'une même observation peuvent différer à l'octet près
+    return Validators(
+        f"{observed_at:x}", datetime.fromtimestamp(observed_at, tz=timezone.utc), private=False, weak=True
+    )
+
+
+def conditional_response(request, validators, respond):
+    """
+    304 sans corps si le client a déjà la représentation décrite par
+    ``validators`` ; sinon ``respond()``, complétée par les validateurs.
+    """
+    if validators is None or not settings.CONDITIONAL_GET["ENABLED"]:
+        return respond()
+    media_type = getattr(request, "accepted_media_type", None)
+    if media_type:
+        # Un même état rendu en JSON et dans l'API navigable : deux représentations
+        validators = validators.for_media_type(media_type)
+    not_modified = get_conditional_response(
+        request,
+        etag=validators.etag,
+        last_modified=int(validators.last_modified.timestamp()) if validators.last_modified else None,
+    )
+    if not_modified is not None:
+        # 304, ou 412 si une précondition If-Match / If-Unmodified-Since échoue
+        return validators.apply(not_modified) if not_modified.status_code == 304 else not_modified
+    response = respond()
+    if response.status_code == 200:
+        validators.apply(response)
+    return response
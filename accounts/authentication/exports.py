@@ -0,0 +1,79 @@
+import csv
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Colonnes exportées, dans l'ordre des fichiers CSV
+EXPORT_FIELDS = (
+    "id", "username", "email", "first_name", "last_name",
+    "is_active", "is_staff", "date_joined", "last_login",
+)
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """Pseudo-fichier : ``csv.writer`` renvoie la ligne au lieu de l'écrire."""
+
+    def write(self, value):
+        return value
+
+
+def _rows(queryset):
+    return queryset.order_by("id").values_list(*EXPORT_FIELDS)
+
+
+def iter_rows(queryset):
+    """Lit les utilisateurs par lots, en tuples, sans instancier de modèles."""
+    return _rows(queryset).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def ndjson_format():
+    """Pas d'en-tête ; une ligne JSON par utilisateur."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    return None, lambda row: encoder.encode(dict(zip(EXPORT_FIELDS, row))) + "\n"
+
+
+def csv_format():
+    """En-tête des colonnes ; une ligne CSV par utilisateur."""
+    writer = csv.writer(_Echo())
+    return writer.writerow(EXPORT_FIELDS), lambda row: writer.writerow(
+        value.isoformat() if hasattr(value, "isoformat") else value for value in row
+    )
+
+
+def iter_export(queryset, export_format):
+    header, encode = export_format()
+    if header is not None:
+        yield header
+    for row in iter_rows(queryset):
+        yield encode(row)
+
+
+def _next_chunk(rows, encode):
+    return "".join(map(encode, islice(rows, EXPORT_CHUNK_SIZE)))
+
+
+async def aiter_export(queryset, export_format):
+    """
+    ``iter_export`` pour ASGI : Django lirait un flux synchrone en entier
+    (``sync_to_async(list)``) avant d'envoyer le premier octet. Ici chaque
+    lot de ``EXPORT_CHUNK_SIZE`` lignes est lu et encodé dans le thread
+    de la base, puis envoyé.
+
+    ``QuerySet.aiterator`` ne convient pas : pour ``values_list``, il
+    exécute la requête dans la boucle d'événements.
+    """
+    header, encode = export_format()
+    if header is not None:
+        yield header
+    rows = await sync_to_async(iter_rows)(queryset)
+    while chunk := await sync_to_async(_next_chunk)(rows, encode):
+        yield chunk
+
+
+# format -> (en-tête et encodeur, type MIME, extension)
+EXPORT_FORMATS = {
+    "ndjson": (ndjson_format, "application/x-ndjson", "ndjson"),
+    "csv": (csv_format, "text/csv; charset=utf-8", "csv"),
+}
@@ -0,0 +1,154 @@
+"""
+Sérialisation JSON directe pour les réponses à schéma fixe.
+
+``compile_serializer`` lit une fois les champs d'un serializer DRF en lecture
+seule (entiers, booléens, chaînes) et en tire un gabarit ``%`` : chaque
+ligne (tuple de ``values_list()`` ou instance) est projetée dans le
+gabarit, sans ``to_representation`` par champ ni dictionnaire intermédiaire.
+
+La sortie est identique à l'octet près à celle de ``JSONRenderer`` avec les
+réglages par défaut de DRF (``UNICODE_JSON``, ``COMPACT_JSON``) ; dans les
+autres cas (API navigable, ``indent``, réglages modifiés),
+``fast_json_response`` rend None et la vue garde le chemin DRF.
+"""
+import functools
+from json.encoder import encode_basestring
+from operator import attrgetter
+
+from django.http import HttpResponse
+from rest_framework import serializers, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+def _escape_separators(text):
+    # JSONRenderer échappe aussi ces séparateurs, invalides en JavaScript
+    return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+
+
+def _json_string(value):
+    return _escape_separators(encode_basestring(value))
+
+
+def _encode_string(value):
+    return "null" if value is None else _json_string(str(value))
+
+
+def _encode_integer(value):
+    return "null" if value is None else int.__repr__(int(value))
+
+
+def _encode_boolean(value):
+    return "null" if value is None else ("true" if value else "false")
+
+
+# Par type de champ DRF (du plus spécifique au plus général : EmailField
+# hérite de CharField) : encodeur général, et gabarit et expression pour un
+# champ non nul, évalués sans appel de fonction Python
+FIELD_ENCODERS = (
+    (serializers.BooleanField, _encode_boolean, "%s", '"true" if v[{i}] else "false"'),
+    (serializers.IntegerField, _encode_integer, "%d", "v[{i}]"),
+    (serializers.CharField, _encode_string, "%s", "_string(str(v[{i}]))"),
+)
+
+
+class CompiledSerializer:
+    """
+    Projection des lignes d'un serializer à schéma fixe en JSON compact.
+
+    ``fields`` : ``(nom, source, encodeur, gabarit, expression)`` ; un champ
+    nullable n'a ni gabarit ni expression et passe par son encodeur.
+    """
+
+    def __init__(self, fields):
+        self.names = tuple(name for name, *_ in fields)
+        self.sources = tuple(source for _, source, *_ in fields)
+        placeholders, expressions, namespace = [], [], {"_string": encode_basestring}
+        for i, (name, _, encode, placeholder, expression) in enumerate(fields):
+            if expression is None:
+                namespace[f"_encode{i}"] = encode
+                placeholder, expression = "%s", f"_encode{i}(v[{i}])"
+            placeholders.append(f"{_json_string(name)}:{placeholder}")
+            expressions.append(expression.format(i=i))
+        namespace["_template"] = "{" + ",".join(placeholders) + "}"
+        # Une fonction par serializer : le gabarit reçoit les valeurs encodées en une opération
+        self._row = eval(f"lambda v: _template % ({', '.join(expressions)},)", namespace)
+        getter = attrgetter(*self.sources)
+        self._get_sources = getter if len(self.sources) > 1 else (lambda obj: (getter(obj),))
+
+    def row(self, values):
+        """Objet JSON d'une ligne : ``values`` suit l'ordre de ``sources``."""
+        return _escape_separators(self._row(values))
+
+    def rows(self, rows):
+        """Tableau JSON de lignes (tuples de ``values_list(*sources)``)."""
+        return _escape_separators("[" + ",".join(map(self._row, rows)) + "]")
+
+    def instance(self, obj):
+        """Objet JSON d'une instance (attributs ``sources``)."""
+        return self.row(self._get_sources(obj))
+
+
+@functools.cache
+def compile_serializer(serializer_class):
+    """
+    Compile les champs lisibles de ``serializer_class``. Lève ``TypeError``
+    pour un champ sans équivalent direct (date, relation, méthode…).
+    """
+    fields = []
+    for field in serializer_class().fields.values():
+        if field.write_only:
+            continue
+        kind = next((kind for kind in FIELD_ENCODERS if isinstance(field, kind[0])), None)
+        if kind is None or "." in field.source or field.source == "*":
+            raise TypeError(f"{serializer_class.__name__}.{field.field_name} : champ non compilable")
+        _, encode, placeholder, expression = kind
+        if field.allow_null:
+            placeholder = expression = None
+        fields.append((field.field_name, field.source, encode, placeholder, expression))
+    return CompiledSerializer(fields)
+
+
+def cursor_page_json(paginator, results):
+    """Enveloppe de ``CursorPagination.get_paginated_response`` autour de ``results`` (tableau JSON)."""
+    return '{"next":%s,"previous":%s,"results":%s}' % (
+        _encode_string(paginator.get_next_link()), _encode_string(paginator.get_previous_link()), results
+    )
+
+
+def accepts_fast_json(request):
+    """Vrai si la réponse négociée est exactement celle de ``JSONRenderer`` par défaut."""
+    return (
+        type(getattr(request, "accepted_renderer", None)) is JSONRenderer
+        and "indent" not in (request.accepted_media_type or "")
+        and api_settings.UNICODE_JSON
+        and api_settings.COMPACT_JSON
+    )
+
+
+def fast_json_response(request, content, status=status.HTTP_200_OK):
+    """
+    Réponse JSON déjà encodée (``content()`` : chaîne JSON), ou None si le
+    client a négocié un autre rendu que le JSON par défaut.
+    """
+    if not accepts_fast_json(request):
+        return None
+    return HttpResponse(content().encode(), status=status, content_type=JSONRenderer.media_type)
+
+
+class FastCreateMixin:
+    """``create`` de DRF dont la réponse 201 est encodée par le serializer compilé."""
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        compiled = compile_serializer(type(serializer))
+        response = fast_json_response(
+            request, lambda: compiled.instance(serializer.instance), status.HTTP_201_CREATED
+        )
+        if response is not None:
+            return response
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
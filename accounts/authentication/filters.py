@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def filter_users(queryset, params):
+    """
+    Applique les filtres d'administration communs à la liste et à l'export :
+    ``is_active``, ``is_staff`` (true/false) et ``joined_after`` (ISO 8601).
+    Lève ``ValidationError`` (400) si une valeur est mal formée.
+    """
+    filters = {}
+    for name in ("is_active", "is_staff"):
+        if name in params:
+            value = params[name].lower()
+            if value not in ("true", "false"):
+                raise ValidationError({name: "Valeur attendue : true ou false."})
+            filters[name] = value == "true"
+    if "joined_after" in params:
+        joined_after = parse_datetime(params["joined_after"])
+        if joined_after is None:
+            date = parse_date(params["joined_after"])
+            if date is None:
+                raise ValidationError({"joined_after": "Date ISO 8601 invalide."})
+            joined_after = datetime.combine(date, datetime.min.time())
+        if timezone.is_naive(joined_after):
+            joined_after = timezone.make_aware(joined_after)
+        filters["date_joined__gt"] = joined_after
+    return queryset.filter(**filters)
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 avec un nombre d'itérations réglable par ``PASSWORD_HASH_ITERATIONS``
+    (voir ``python manage.py benchmark hashing``).
+
+    Même algorithme que le hacheur par défaut : les mots de passe existants
+    restent valides et sont recalculés à la connexion suivante si le nombre
+    d'itérations change.
+    """
+
+    iterations = settings.PASSWORD_HASH_ITERATIONS or PBKDF2PasswordHasher.iterations
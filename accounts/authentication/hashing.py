@@ -0,0 +1,189 @@
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingUnavailable(APIException):
+    """Le pool de hachage est saturé : la requête est refusée tout de suite (503)."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Service momentanément surchargé, réessayez dans un instant."
+    default_code = "hashing_unavailable"
+
+    def __init__(self, wait=1):
+        super().__init__()
+        # Repris par le gestionnaire d'exceptions de DRF dans l'en-tête Retry-After
+        self.wait = wait
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+class PasswordHashPool:
+    """
+    Pool de processus borné pour le hachage et la vérification des mots de passe.
+
+    Le hachage PBKDF2 monopolise un cœur pendant des centaines de
+    millisecondes : dans un pool de processus, il ne bloque plus les threads
+    qui servent les autres requêtes. Au plus ``workers + max_pending`` appels
+    sont acceptés en même temps ; au-delà, ``HashingUnavailable`` est levée
+    immédiatement plutôt que de laisser la file d'attente grossir.
+
+    Avec ``workers=0``, le hachage se fait dans le thread appelant.
+    """
+
+    def __init__(self, workers, max_pending=32, timeout=10, retry_after=1, start_method="spawn"):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.start_method = start_method
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(workers + max_pending) if workers else None
+        self._in_flight = 0
+        self._counters = dict.fromkeys(("calls", "rejected", "timeouts", "broken"), 0)
+
+    def run(self, fn, *args):
+        """Exécute ``fn(*args)`` dans un processus du pool et attend son résultat."""
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise HashingUnavailable(self.retry_after)
+        self._count("calls", in_flight=1)
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError):
+            self._release(None)
+            self._discard(executor)
+            raise HashingUnavailable(self.retry_after)
+        # La place n'est libérée qu'à la fin du calcul, même si l'appelant abandonne
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self._count("timeouts")
+            raise HashingUnavailable(self.retry_after)
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise HashingUnavailable(self.retry_after)
+
+    def map(self, fn, items):
+        """
+        ``[fn(item) for item in items]`` réparti sur les processus du pool,
+        pour les traitements de masse (import d'utilisateurs).
+
+        Sans limite d'admission, mais avec au plus ``workers`` calculs en file
+        à la fois : une connexion n'attend jamais plus d'un hachage derrière eux.
+        """
+        items = list(items)
+        if not self.workers:
+            return [fn(item) for item in items]
+        executor = self._get_executor()
+        results = [None] * len(items)
+        pending = {}
+        try:
+            for index, item in enumerate(items):
+                if len(pending) >= self.workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[pending.pop(future)] = future.result()
+                pending[executor.submit(fn, item)] = index
+            for future in as_completed(pending):
+                results[pending[future]] = future.result()
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise HashingUnavailable(self.retry_after)
+        return results
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def _discard(self, executor):
+        # Un processus du pool est mort : l'appel suivant recrée le pool
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._counters["broken"] += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, future):
+        self._count(in_flight=-1)
+        self._slots.release()
+
+    def _count(self, name=None, in_flight=0):
+        with self._lock:
+            if name:
+                self._counters[name] += 1
+            self._in_flight += in_flight
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._counters,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+password_pool = PasswordHashPool(
+    workers=settings.PASSWORD_HASHING_POOL["WORKERS"],
+    max_pending=settings.PASSWORD_HASHING_POOL["MAX_PENDING"],
+    timeout=settings.PASSWORD_HASHING_POOL["TIMEOUT"],
+    retry_after=settings.PASSWORD_HASHING_POOL["RETRY_AFTER"],
+    start_method=settings.PASSWORD_HASHING_POOL["START_METHOD"],
+)
+
+
+def hash_password(raw_password):
+    """``make_password`` exécuté dans le pool."""
+    return password_pool.run(hashers.make_password, raw_password)
+
+
+def hash_passwords(raw_passwords):
+    """``make_password`` pour une liste de mots de passe, en parallèle sur les processus du pool."""
+    return password_pool.map(hashers.make_password, raw_passwords)
+
+
+def check_user_password(user, raw_password):
+    """
+    ``user.check_password`` exécuté dans le pool : le mot de passe est
+    recalculé (et enregistré) si le hacheur ou son nombre d'itérations a changé.
+    """
+    is_correct, must_update = password_pool.run(hashers.verify_password, raw_password, user.password)
+    if is_correct and must_update:
+        set_user_password(user, raw_password)
+        user.save(update_fields=["password"])
+    return is_correct
+
+
+def set_user_password(user, raw_password):
+    """``user.set_password`` exécuté dans le pool (l'utilisateur n'est pas enregistré)."""
+    user.password = hash_password(raw_password)
+    # Comme set_password : les validateurs sont notifiés du changement au save()
+    user._password = raw_password
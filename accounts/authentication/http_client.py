@@ -0,0 +1,218 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CircuitOpenError(Exception):
+    """Le disjoncteur est ouvert : l'API tierce est considérée indisponible."""
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur classique à trois états.
+
+    - ``closed`` : les appels passent, les échecs consécutifs sont comptés ;
+    - ``open`` : après ``failure_threshold`` échecs, les appels échouent
+      immédiatement pendant ``reset_timeout`` secondes ;
+    - ``half_open`` : un seul appel d'essai est autorisé ; son succès referme
+      le disjoncteur, son échec le rouvre.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._counters = dict.fromkeys(("successes", "failures", "rejected", "opened"), 0)
+
+    def before_call(self):
+        """Lève ``CircuitOpenError`` si l'appel ne doit pas être tenté."""
+        with self._lock:
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    self._counters["rejected"] += 1
+                    raise CircuitOpenError()
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    self._counters["rejected"] += 1
+                    raise CircuitOpenError()
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._counters["successes"] += 1
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._counters["failures"] += 1
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._counters["opened"] += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._trial_in_flight = False
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def snapshot(self):
+        with self._lock:
+            state = self._state
+            if state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                state = self.HALF_OPEN
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                **self._counters,
+            }
+
+
+class UpstreamClient:
+    """
+    Client HTTP partagé pour les appels vers une API tierce.
+
+    Une ``requests.Session`` garde les connexions ouvertes (keep-alive) dans
+    un pool borné ; chaque appel a un délai de connexion et de lecture, est
+    retenté un nombre limité de fois avec un backoff exponentiel « jittered »,
+    et passe par un disjoncteur.
+
+    Seules les erreurs réseau et les réponses 5xx/429 comptent comme des
+    échecs : un 404 (ville inconnue) est une réponse normale de l'API.
+    """
+
+    RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+    _default_sleep = staticmethod(time.sleep)
+
+    def __init__(self, connect_timeout=2.0, read_timeout=5.0, retries=2,
+                 backoff=0.2, max_backoff=2.0, pool_size=20, breaker=None,
+                 sleep=None):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep or self._default_sleep
+        self._configure_transport(connect_timeout, read_timeout, pool_size)
+
+    def _configure_transport(self, connect_timeout, read_timeout, pool_size):
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url, **kwargs):
+        """
+        GET avec délais, tentatives et disjoncteur.
+
+        Lève ``CircuitOpenError`` si le disjoncteur refuse l'appel, ou la
+        dernière ``requests.RequestException`` si toutes les tentatives ont
+        échoué sur une erreur réseau. Une réponse 5xx persistante est renvoyée
+        telle quelle.
+        """
+        self.breaker.before_call()
+        try:
+            response = self._get_with_retries(url, **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        return self._record(response)
+
+    def _get_with_retries(self, url, **kwargs):
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(url, timeout=self.timeout, **kwargs)
+            except requests.RequestException:
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code not in self.RETRY_STATUSES or attempt == self.retries:
+                    return response
+            self._sleep(self._backoff_delay(attempt))
+
+    def _record(self, response):
+        if response.status_code in self.RETRY_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def _backoff_delay(self, attempt):
+        # « Full jitter » : évite que tous les workers retentent au même instant
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class AsyncUpstreamClient(UpstreamClient):
+    """
+    Variante non bloquante d'``UpstreamClient`` pour les vues asynchrones.
+
+    Mêmes délais, tentatives et disjoncteur (qui peut être partagé avec le
+    client synchrone) ; les appels passent par un ``httpx.AsyncClient``.
+    Un pool de connexions httpx est lié à sa boucle asyncio : on en garde
+    donc un par boucle.
+
+    Les erreurs réseau sont des ``httpx.HTTPError``.
+    """
+
+    _default_sleep = staticmethod(asyncio.sleep)
+
+    def _configure_transport(self, connect_timeout, read_timeout, pool_size):
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self._clients = weakref.WeakKeyDictionary()  # boucle -> httpx.AsyncClient
+
+    @property
+    def session(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return client
+
+    async def get(self, url, **kwargs):
+        self.breaker.before_call()
+        try:
+            response = await self._get_with_retries(url, **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        return self._record(response)
+
+    async def _get_with_retries(self, url, **kwargs):
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.session.get(url, **kwargs)
+            except httpx.HTTPError:
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code not in self.RETRY_STATUSES or attempt == self.retries:
+                    return response
+            await self._sleep(self._backoff_delay(attempt))
@@ -0,0 +1,196 @@
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from .authentication import invalidate_users
+from .hashing import hash_passwords
+
+# Colonnes attendues (en-tête CSV ou clés NDJSON)
+IMPORT_FIELDS = ("username", "email", "password")
+IMPORT_BATCH_SIZE = 500
+# Au-delà, les erreurs sont seulement comptées
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormatError(ValueError):
+    """Fichier illisible dans son ensemble (encodage, en-tête CSV)."""
+
+
+# ------------------------------------------------------------
+# Lecture des flux : (numéro de ligne, ligne ou None, erreur ou None)
+# ------------------------------------------------------------
+def iter_csv(lines):
+    """Lit un CSV (lignes en octets) avec en-tête, sans le charger en mémoire."""
+    reader = csv.DictReader(codecs.iterdecode(lines, "utf-8-sig"))
+    missing = set(IMPORT_FIELDS) - set(reader.fieldnames or ())
+    if missing:
+        raise ImportFormatError(f"Colonnes manquantes : {', '.join(sorted(missing))}.")
+    for row in reader:
+        yield reader.line_num, row, None
+
+
+def iter_ndjson(lines):
+    """Lit un objet JSON par ligne ; une ligne invalide est une erreur de cette ligne seulement."""
+    for number, line in enumerate(codecs.iterdecode(lines, "utf-8-sig"), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None, "JSON invalide."
+            continue
+        if not isinstance(row, dict):
+            yield number, None, "Un objet JSON est attendu."
+            continue
+        yield number, row, None
+
+
+# format -> lecteur
+IMPORT_FORMATS = {
+    "ndjson": iter_ndjson,
+    "csv": iter_csv,
+}
+
+
+# ------------------------------------------------------------
+# Import
+# ------------------------------------------------------------
+def _clean_row(row):
+    """Valide une ligne ; rend ``(utilisateur non enregistré, mot de passe)`` ou lève ``ValidationError``."""
+    values = {field: row.get(field) for field in IMPORT_FIELDS}
+    errors = {}
+    for field, value in values.items():
+        if not isinstance(value, str) or not value.strip():
+            errors[field] = ["Ce champ est obligatoire."]
+    if errors:
+        raise ValidationError(errors)
+
+    user = User(
+        username=User.normalize_username(values["username"].strip()),
+        email=User.objects.normalize_email(values["email"].strip()),
+    )
+    try:
+        user._meta.get_field("username").clean(user.username, user)
+    except ValidationError as e:
+        errors["username"] = e.messages
+    try:
+        validate_email(user.email)
+    except ValidationError as e:
+        errors["email"] = e.messages
+    try:
+        validate_password(values["password"], user)
+    except ValidationError as e:
+        errors["password"] = e.messages
+    if errors:
+        raise ValidationError(errors)
+    return user, values["password"]
+
+
+class UserImport:
+    """
+    Import groupé d'utilisateurs, lot par lot :
+
+    - validation de chaque ligne (mêmes règles que l'inscription) ;
+    - unicité du nom d'utilisateur et de l'e-mail vérifiée en deux requêtes
+      par lot, ainsi qu'entre les lignes du fichier ;
+    - mots de passe hachés en parallèle dans le pool de hachage ;
+    - insertion par ``bulk_create`` dans une transaction par lot.
+
+    Une ligne en erreur est signalée sans interrompre l'import.
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+        self._seen_usernames = set()
+        self._seen_emails = set()
+
+    def run(self, rows):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return self.report()
+            reported = len(self.errors)
+            self._import_batch(batch)
+            # Erreurs du lot dans l'ordre du fichier, quelle que soit l'étape qui les a détectées
+            self.errors[reported:] = sorted(self.errors[reported:], key=lambda error: error["line"])
+
+    def report(self):
+        return {"created": self.created, "error_count": self.error_count, "errors": self.errors}
+
+    def _error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def _import_batch(self, batch):
+        candidates = []
+        for line, row, error in batch:
+            if error is not None:
+                self._error(line, {"non_field_errors": [error]})
+                continue
+            try:
+                user, password = _clean_row(row)
+            except ValidationError as e:
+                self._error(line, e.message_dict)
+                continue
+            candidates.append((line, user, password))
+
+        taken_usernames = set(
+            User.objects.filter(username__in=[user.username for _, user, _ in candidates])
+            .values_list("username", flat=True)
+        )
+        taken_emails = set(
+            User.objects.filter(email__in=[user.email for _, user, _ in candidates])
+            .values_list("email", flat=True)
+        )
+        accepted = []
+        for line, user, password in candidates:
+            errors = {}
+            if user.username in taken_usernames or user.username in self._seen_usernames:
+                errors["username"] = ["Ce nom d'utilisateur est déjà pris."]
+            if user.email in taken_emails or user.email in self._seen_emails:
+                errors["email"] = ["Cette adresse e-mail est déjà utilisée."]
+            self._seen_usernames.add(user.username)
+            self._seen_emails.add(user.email)
+            if errors:
+                self._error(line, errors)
+            else:
+                accepted.append((line, user, password))
+
+        for (_, user, _), encoded in zip(accepted, hash_passwords(password for _, _, password in accepted)):
+            user.password = encoded
+        self._insert(accepted)
+
+    def _insert(self, accepted):
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([user for _, user, _ in accepted])
+            self.created += len(accepted)
+            # bulk_create() ne déclenche pas post_save
+            invalidate_users(user.pk for _, user, _ in accepted)
+        except IntegrityError:
+            # Inscription concurrente entre la vérification et l'insertion :
+            # on insère ligne par ligne pour isoler les conflits
+            for line, user, _ in accepted:
+                try:
+                    with transaction.atomic():
+                        user.save()
+                    self.created += 1
+                except IntegrityError:
+                    self._error(line, {"username": ["Ce nom d'utilisateur est déjà pris."]})
+
+
+def import_users(rows, batch_size=IMPORT_BATCH_SIZE):
+    """Importe les lignes lues par un lecteur de ``IMPORT_FORMATS`` ; rend le rapport d'import."""
+    return UserImport(batch_size).run(rows)
@@ -0,0 +1,289 @@
+"""
+Mesure des endpoints de l'API sous charge (suite « endpoints » de
+``python manage.py benchmark``).
+
+Chaque scénario est exécuté par N threads, chacun avec son client de test,
+sur une base de test jetable (fichier SQLite temporaire ou base « test_* »
+du serveur). La météo est servie par un faux OpenWeatherMap local.
+"""
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from .tokens import VersionedRefreshToken
+from .weather import weather_cache
+
+BENCHMARK_PASSWORD = "Bench1234!"
+# Utilisateurs créés en plus des comptes du scénario, pour une page de liste réaliste
+SEED_USERS = 200
+# Villes demandées à tour de rôle : la plupart des appels sont servis par le cache
+WEATHER_CITIES = 50
+
+
+# ------------------------------------------------------------
+# Faux OpenWeatherMap
+# ------------------------------------------------------------
+class _UpstreamHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(self.server.delay)
+        body = json.dumps({
+            "name": "Benchville",
+            "main": {"temp": 21.5, "humidity": 40},
+            "weather": [{"description": "ciel dégagé"}],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class UpstreamStandIn:
+    """Serveur HTTP local qui répond comme OpenWeatherMap après ``delay`` secondes."""
+
+    def __init__(self, delay=0.02):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _UpstreamHandler)
+        self.server.daemon_threads = True
+        self.server.delay = delay
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/data/2.5/weather"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ------------------------------------------------------------
+# Scénarios : (client, données de départ, identifiant unique) -> réponse
+# ------------------------------------------------------------
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(fn):
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+def _bearer(token):
+    return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+
+@scenario("register")
+def register_scenario(client, fixture, key):
+    return client.post(reverse("auth_register"), data={
+        "username": f"bench-{key}", "email": f"bench-{key}@example.com",
+        "password": BENCHMARK_PASSWORD, "password2": BENCHMARK_PASSWORD,
+    }, content_type="application/json")
+
+
+@scenario("login")
+def login_scenario(client, fixture, key):
+    return client.post(reverse("auth_login"), data={
+        "username": fixture["user"].username, "password": BENCHMARK_PASSWORD,
+    }, content_type="application/json")
+
+
+@scenario("refresh")
+def refresh_scenario(client, fixture, key):
+    return client.post(reverse("token_refresh"), data={"refresh": fixture["refresh"]},
+                       content_type="application/json")
+
+
+@scenario("me")
+def me_scenario(client, fixture, key):
+    return client.get(reverse("auth_me"), **_bearer(fixture["access"]))
+
+
+@scenario("users")
+def users_scenario(client, fixture, key):
+    return client.get(reverse("auth_users"), **_bearer(fixture["admin_access"]))
+
+
+@scenario("weather")
+def weather_scenario(client, fixture, key):
+    city = f"ville-{hash(key) % WEATHER_CITIES}"
+    return client.get(reverse("weather", args=[city]))
+
+
+# ------------------------------------------------------------
+# Mesure
+# ------------------------------------------------------------
+def percentile(values, p):
+    """Percentile ``p`` (0-100) par rang le plus proche ; ``values`` doit être trié."""
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+
+def summarize(latencies, queries, errors, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "queries": statistics.fmean(queries) if queries else 0.0,
+    }
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def run_scenario(fn, fixture, concurrency=4, duration=2.0):
+    """Appelle ``fn`` en boucle depuis ``concurrency`` threads pendant ``duration`` secondes."""
+    def worker(index):
+        client = Client()
+        counter = _QueryCounter()
+        latencies, queries, errors = [], [], 0
+        try:
+            # Connexion propre au thread : on ne compte que ses requêtes
+            with connection.execute_wrapper(counter):
+                runs = 0
+                while runs == 0 or time.perf_counter() < deadline:
+                    before = counter.count
+                    started = time.perf_counter()
+                    response = fn(client, fixture, f"{index}-{runs}-{time.monotonic_ns()}")
+                    latencies.append(time.perf_counter() - started)
+                    queries.append(counter.count - before)
+                    errors += response.status_code >= 400
+                    runs += 1
+        finally:
+            connection.close()
+        return latencies, queries, errors
+
+    started = time.perf_counter()
+    deadline = started + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarize(
+        [latency for latencies, _, _ in results for latency in latencies],
+        [count for _, queries, _ in results for count in queries],
+        sum(errors for _, _, errors in results),
+        elapsed,
+    )
+
+
+def create_fixture():
+    """Comptes et tokens utilisés par les scénarios."""
+    user = User.objects.create_user(username="bench-user", email="bench-user@example.com",
+                                    password=BENCHMARK_PASSWORD)
+    admin = User.objects.create_superuser(username="bench-admin", email="bench-admin@example.com",
+                                          password=BENCHMARK_PASSWORD)
+    User.objects.bulk_create(
+        User(username=f"seed-{i}", email=f"seed-{i}@example.com", password="!") for i in range(SEED_USERS)
+    )
+    refresh = VersionedRefreshToken.for_user(user)
+    return {
+        "user": user,
+        "refresh": str(refresh),
+        "access": str(refresh.access_token),
+        "admin_access": str(VersionedRefreshToken.for_user(admin).access_token),
+    }
+
+
+@contextmanager
+def benchmark_environment(upstream_url):
+    """
+    Base de test jetable, limitation de débit désactivée et météo servie par
+    ``upstream_url``. La base configurée n'est jamais modifiée.
+    """
+    setup_test_environment()
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    previous_test_name = test_settings.get("NAME")
+    temp_dir = None
+    if connection.vendor == "sqlite":
+        # Fichier plutôt que mémoire : plusieurs connexions concurrentes, en WAL
+        temp_dir = tempfile.TemporaryDirectory()
+        test_settings["NAME"] = os.path.join(temp_dir.name, "benchmark.sqlite3")
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        with override_settings(
+            THROTTLING={**settings.THROTTLING, "ENABLED": False},
+            REPLICA_READS={**settings.REPLICA_READS, "ALIASES": []},
+            OPENWEATHER_API_URL=upstream_url,
+        ):
+            weather_cache.clear()
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings["NAME"] = previous_test_name
+        if temp_dir is not None:
+            temp_dir.cleanup()
+        teardown_test_environment()
+
+
+def run_endpoints(names, concurrency=4, duration=2.0, upstream_delay=0.02):
+    """Mesure les scénarios ``names`` ; rend ``{scénario: résultats}``."""
+    results = {}
+    with UpstreamStandIn(delay=upstream_delay) as upstream, benchmark_environment(upstream.url):
+        fixture = create_fixture()
+        for name in names:
+            # Un appel hors mesure : imports, pool de hachage, connexions
+            SCENARIOS[name](Client(), fixture, f"warm-up-{name}")
+            results[name] = run_scenario(SCENARIOS[name], fixture, concurrency, duration)
+    return results
+
+
+# ------------------------------------------------------------
+# Référence
+# ------------------------------------------------------------
+def compare_to_baseline(results, baseline, tolerance=0.25):
+    """
+    Régressions par rapport à ``baseline`` (résultats enregistrés) : latence
+    p95 ou débit dégradés de plus de ``tolerance``, ou au moins une demi-requête
+    SQL de plus en moyenne. Les scénarios absents de la référence sont ignorés.
+    """
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if current["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name} : p95 {current['p95_ms']:.1f} ms (référence {reference['p95_ms']:.1f} ms)"
+            )
+        if current["throughput"] < reference["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{name} : {current['throughput']:.1f} req/s (référence {reference['throughput']:.1f} req/s)"
+            )
+        if current["queries"] >= reference["queries"] + 0.5:
+            regressions.append(
+                f"{name} : {current['queries']:.1f} requêtes SQL par appel (référence {reference['queries']:.1f})"
+            )
+    return regressions
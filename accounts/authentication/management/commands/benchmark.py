@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.authentication.benchmarks import SUITES, BenchmarkRegression
+from accounts.authentication.loadtest import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = "Mesure les performances de l'application sur cette machine (suites : %s)." % ", ".join(SUITES)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "suites", nargs="*", choices=sorted(SUITES), metavar="suite",
+            help="Suites à exécuter (toutes par défaut) : %s." % ", ".join(sorted(SUITES)),
+        )
+        parser.add_argument(
+            "--duration", type=float, default=2.0,
+            help="Durée minimale de chaque mesure, en secondes.",
+        )
+        parser.add_argument(
+            "--target-ms", type=float, default=250.0,
+            help="Latence visée pour un hachage de mot de passe (suite hashing), en millisecondes.",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Nombre de processus du pool de hachage mesuré (nombre de cœurs par défaut).",
+        )
+        parser.add_argument(
+            "--endpoint", dest="endpoints", action="append", choices=sorted(SCENARIOS), default=[],
+            help="Scénario de la suite endpoints (répétable ; tous par défaut).",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=4,
+            help="Clients simultanés de la suite endpoints.",
+        )
+        parser.add_argument(
+            "--upstream-delay-ms", type=float, default=20.0,
+            help="Latence du faux OpenWeatherMap local, en millisecondes.",
+        )
+        parser.add_argument(
+            "--baseline", default=None,
+            help="Fichier JSON de référence : échec si les résultats se dégradent au-delà de --tolerance.",
+        )
+        parser.add_argument(
+            "--save-baseline", action="store_true",
+            help="Enregistre les résultats comme référence dans --baseline au lieu de comparer.",
+        )
+        parser.add_argument(
+            "--tolerance", type=float, default=0.25,
+            help="Dégradation acceptée par rapport à la référence (0.25 : 25 %%).",
+        )
+
+    def handle(self, *args, **options):
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline nécessite --baseline.")
+        for name in options["suites"] or sorted(SUITES):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {name} =="))
+            try:
+                SUITES[name](self.stdout, options)
+            except BenchmarkRegression as e:
+                raise CommandError("Régression de performances :\n" + "\n".join(e.regressions))
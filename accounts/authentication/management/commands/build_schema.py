@@ -0,0 +1,31 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api_fil_rouge.schema import build_schema_document
+
+
+class Command(BaseCommand):
+    help = "Génère le schéma OpenAPI une fois pour toutes (lu au démarrage tant que le code ne change pas)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", default=None,
+            help="Fichier à écrire (par défaut : OPENAPI_SCHEMA_FILE).",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"] or settings.OPENAPI_SCHEMA["FILE"]
+        if not output:
+            raise CommandError("Aucun fichier : passez --output ou définissez OPENAPI_SCHEMA_FILE.")
+        document = build_schema_document()
+        try:
+            Path(output).write_text(json.dumps(document.data, ensure_ascii=False, indent=2), encoding="utf-8")
+        except OSError as e:
+            raise CommandError(f"Écriture impossible : {e}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Schéma écrit dans {output} ({len(document.data.get('paths', {}))} chemins, "
+            f"empreinte {document.fingerprint[:12]})"
+        ))
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.authentication.imports import IMPORT_BATCH_SIZE, IMPORT_FORMATS, ImportFormatError, import_users
+
+
+class Command(BaseCommand):
+    help = "Importe des utilisateurs depuis un fichier CSV ou NDJSON (username, email, password)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Fichier à importer (« - » pour l'entrée standard).")
+        parser.add_argument(
+            "--format", choices=sorted(IMPORT_FORMATS), default=None,
+            help="Format du fichier (par défaut : d'après l'extension, sinon ndjson).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=IMPORT_BATCH_SIZE,
+            help="Nombre de lignes validées et insérées par transaction.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"] or ("csv" if path.lower().endswith(".csv") else "ndjson")
+        try:
+            if path == "-":
+                report = self._import(sys.stdin.buffer, input_format, options["batch_size"])
+            else:
+                with Path(path).open("rb") as f:
+                    report = self._import(f, input_format, options["batch_size"])
+        except OSError as e:
+            raise CommandError(f"Lecture impossible : {e}")
+        except (ImportFormatError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        for error in report["errors"]:
+            details = "; ".join(f"{field} : {' '.join(messages)}" for field, messages in error["errors"].items())
+            self.stderr.write(f"Ligne {error['line']} : {details}")
+        if report["error_count"] > len(report["errors"]):
+            self.stderr.write(f"… et {report['error_count'] - len(report['errors'])} autre(s) erreur(s).")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} utilisateur(s) créé(s), {report['error_count']} ligne(s) en erreur."
+        ))
+
+    @staticmethod
+    def _import(f, input_format, batch_size):
+        return import_users(IMPORT_FORMATS[input_format](f), batch_size=batch_size)
@@ -0,0 +1,70 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from accounts.authentication.blacklist import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime par petits lots les refresh tokens expirés (OutstandingToken) "
+        "et leur entrée de liste noire, avec un débit limité."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.TOKEN_BLACKLIST_PURGE["BATCH_SIZE"],
+            help="Nombre de tokens supprimés par transaction.",
+        )
+        parser.add_argument(
+            "--max-rate", type=int, default=settings.TOKEN_BLACKLIST_PURGE["MAX_RATE"],
+            help="Nombre maximum de tokens supprimés par seconde (0 : pas de limite).",
+        )
+        parser.add_argument(
+            "--start-after", type=int, default=0,
+            help="Reprend une purge interrompue après cet identifiant.",
+        )
+        parser.add_argument(
+            "--max-batches", type=int, default=None,
+            help="S'arrête après ce nombre de lots (la purge pourra être reprise).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Affiche le nombre de tokens à supprimer sans rien supprimer.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now()
+        pending = OutstandingToken.objects.filter(id__gt=options["start_after"], expires_at__lte=cutoff).count()
+        if options["dry_run"]:
+            self.stdout.write(f"{pending} token(s) expiré(s) à supprimer.")
+            return
+
+        deleted = 0
+        last_id = options["start_after"]
+        batches = purge_expired_tokens(cutoff, options["batch_size"], options["start_after"])
+        started = time.monotonic()
+        try:
+            for number, (last_id, count) in enumerate(batches, start=1):
+                deleted += count
+                self.stdout.write(f"Lot {number} : {deleted}/{pending} token(s) supprimé(s), dernier id {last_id}")
+                if options["max_batches"] is not None and number >= options["max_batches"]:
+                    self.stdout.write(f"Arrêt après {number} lot(s) : reprendre avec --start-after {last_id}")
+                    return
+                self._throttle(count, options["max_rate"], started)
+                started = time.monotonic()
+        except KeyboardInterrupt:
+            self.stdout.write(f"Interrompu : reprendre avec --start-after {last_id}")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Purge terminée : {deleted} token(s) expiré(s) supprimé(s)."))
+
+    @staticmethod
+    def _throttle(count, max_rate, started):
+        # Laisse la base servir les autres requêtes entre deux lots
+        if max_rate > 0:
+            delay = count / max_rate - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
@@ -0,0 +1,296 @@
+"""
+Métriques des requêtes HTTP, exposées au format texte de Prometheus sur /metrics.
+
+Pour chaque vue : histogramme des durées, nombre et durée des requêtes SQL.
+S'y ajoutent la durée des appels aux API tierces (``upstream_timer``) et
+le taux de succès des caches enregistrés par ``register_cache``.
+
+Les agrégats sont propres au processus : avec plusieurs workers, chacun
+expose ses propres compteurs.
+"""
+import contextvars
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+# Bornes supérieures des histogrammes de durée, en secondes
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Au-delà, la méthode est comptée comme « OTHER » (cardinalité bornée)
+METHODS = frozenset(("GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"))
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Histogramme cumulatif à bornes fixes (non synchronisé : protégé par le registre)."""
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Paires ``(borne, nombre d'observations <= borne)``, « +Inf » compris."""
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            yield bound, total
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram_lines(name, labels, histogram):
+    for bound, count in histogram.cumulative():
+        yield f"{name}_bucket{_labels(**labels, le=bound)} {count}"
+    yield f"{name}_sum{_labels(**labels)} {histogram.sum:.6f}"
+    yield f"{name}_count{_labels(**labels)} {histogram.count}"
+
+
+class MetricsRegistry:
+    """Agrégats des requêtes du processus ; une observation coûte un verrou et une recherche dichotomique."""
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._requests = {}  # (vue, méthode, classe de statut) -> Histogram
+        self._queries = {}  # vue -> [requêtes SQL, durée totale]
+        self._upstreams = {}  # API tierce -> Histogram
+        self._caches = {}  # nom -> objet avec stats()
+
+    def observe_request(self, view, method, status, duration, queries=0, db_time=0.0):
+        key = (view, method if method in METHODS else "OTHER", f"{status // 100}xx")
+        with self._lock:
+            histogram = self._requests.get(key)
+            if histogram is None:
+                histogram = self._requests[key] = Histogram(self.buckets)
+            histogram.observe(duration)
+            totals = self._queries.setdefault(view, [0, 0.0])
+            totals[0] += queries
+            totals[1] += db_time
+
+    def observe_upstream(self, name, duration):
+        with self._lock:
+            histogram = self._upstreams.get(name)
+            if histogram is None:
+                histogram = self._upstreams[name] = Histogram(self.buckets)
+            histogram.observe(duration)
+
+    def register_cache(self, name, cache):
+        """Expose les compteurs de ``cache.stats()`` (hits, stale_hits, misses, size)."""
+        self._caches[name] = cache
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._queries.clear()
+            self._upstreams.clear()
+
+    def render(self):
+        """Agrégats au format texte de Prometheus."""
+        with self._lock:
+            requests = {key: _copy(histogram) for key, histogram in self._requests.items()}
+            queries = {view: tuple(totals) for view, totals in self._queries.items()}
+            upstreams = {name: _copy(histogram) for name, histogram in self._upstreams.items()}
+
+        lines = [
+            "# HELP http_request_duration_seconds Durée de traitement des requêtes HTTP par vue.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (view, method, status), histogram in sorted(requests.items()):
+            lines.extend(_histogram_lines(
+                "http_request_duration_seconds", {"view": view, "method": method, "status": status}, histogram
+            ))
+        lines += [
+            "# HELP db_queries_total Requêtes SQL exécutées par vue.",
+            "# TYPE db_queries_total counter",
+        ]
+        lines += [f"db_queries_total{_labels(view=view)} {count}" for view, (count, _) in sorted(queries.items())]
+        lines += [
+            "# HELP db_query_duration_seconds_total Durée cumulée des requêtes SQL par vue.",
+            "# TYPE db_query_duration_seconds_total counter",
+        ]
+        lines += [
+            f"db_query_duration_seconds_total{_labels(view=view)} {seconds:.6f}"
+            for view, (_, seconds) in sorted(queries.items())
+        ]
+        lines += [
+            "# HELP upstream_request_duration_seconds Durée des appels aux API tierces.",
+            "# TYPE upstream_request_duration_seconds histogram",
+        ]
+        for name, histogram in sorted(upstreams.items()):
+            lines.extend(_histogram_lines("upstream_request_duration_seconds", {"upstream": name}, histogram))
+
+        cache_stats = {name: cache.stats() for name, cache in sorted(self._caches.items())}
+        for metric, kind, help_text, value in (
+            ("cache_hits_total", "counter", "Lectures servies par le cache (périmées comprises).",
+             lambda stats: stats.get("hits", 0) + stats.get("stale_hits", 0)),
+            ("cache_misses_total", "counter", "Lectures absentes du cache.", lambda stats: stats.get("misses", 0)),
+            ("cache_entries", "gauge", "Entrées en cache.", lambda stats: stats.get("size", 0)),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            lines += [f"{metric}{_labels(cache=name)} {value(stats)}" for name, stats in cache_stats.items()]
+        return "\n".join(lines) + "\n"
+
+
+def _copy(histogram):
+    copy = Histogram(histogram.buckets)
+    copy.counts = list(histogram.counts)
+    copy.sum = histogram.sum
+    copy.count = histogram.count
+    return copy
+
+
+registry = MetricsRegistry()
+
+
+def register_cache(name, cache):
+    registry.register_cache(name, cache)
+
+
+# ------------------------------------------------------------
+# Mesures de la requête en cours
+# ------------------------------------------------------------
+class RequestTimings:
+    __slots__ = ("queries", "db_time", "upstream_calls", "upstream_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.upstream_calls = 0
+        self.upstream_time = 0.0
+
+    def server_timing(self, duration):
+        """Valeur de l'en-tête ``Server-Timing`` (durées en millisecondes)."""
+        parts = [f'app;dur={duration * 1000:.1f}', f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} SQL"']
+        if self.upstream_calls:
+            parts.append(f'upstream;dur={self.upstream_time * 1000:.1f};desc="{self.upstream_calls} appel(s)"')
+        return ", ".join(parts)
+
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings = _current.get()
+        if timings is not None:
+            timings.queries += 1
+            timings.db_time += time.perf_counter() - started
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """
+    Ajoute ``_record_query`` aux wrappers de chaque connexion, une fois pour
+    toutes : la requête en cours est retrouvée par la variable de contexte,
+    que ``sync_to_async`` propage aux threads qui exécutent le SQL sous ASGI.
+    """
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(install_query_timer)
+
+
+@contextmanager
+def upstream_timer(name):
+    """Mesure un appel à l'API tierce ``name`` (histogramme global et requête en cours)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - started
+        registry.observe_upstream(name, duration)
+        timings = _current.get()
+        if timings is not None:
+            timings.upstream_calls += 1
+            timings.upstream_time += duration
+
+
+class MetricsMiddleware:
+    """
+    Mesure chaque requête et ajoute l'en-tête ``Server-Timing``.
+
+    Synchrone et asynchrone : sous ASGI, la chaîne reste asynchrone jusqu'aux
+    vues natives. Les requêtes SQL exécutées pendant l'envoi d'une réponse en
+    flux, après le retour de la vue, ne sont pas comptées.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.METRICS["ENABLED"]:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not settings.METRICS["ENABLED"]:
+            return await self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - started)
+
+    def _finish(self, request, response, timings, duration):
+        match = request.resolver_match
+        registry.observe_request(
+            match.view_name if match else "unmatched", request.method, response.status_code,
+            duration, timings.queries, timings.db_time,
+        )
+        if settings.METRICS["SERVER_TIMING"]:
+            response["Server-Timing"] = timings.server_timing(duration)
+        return response
+
+
+# ------------------------------------------------------------
+# /metrics
+# ------------------------------------------------------------
+def metrics_view(request):
+    """Agrégats du processus, réservés aux porteurs de ``METRICS["TOKEN"]`` (fermé s'il est vide)."""
+    expected = settings.METRICS["TOKEN"]
+    if not expected:
+        return HttpResponse("METRICS_TOKEN non défini.\n", status=403, content_type=CONTENT_TYPE)
+    provided = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not hmac.compare_digest(provided.encode(), expected.encode()):
+        return HttpResponse("Jeton invalide.\n", status=401, content_type=CONTENT_TYPE)
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
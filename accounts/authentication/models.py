@@ -1,3 +1,21 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class TokenVersion(models.Model):
+    """
+    Génération des tokens d'un utilisateur.
+
+    Elle est copiée dans chaque token (claim ``ver``) ; l'incrémenter
+    invalide d'un coup tous les tokens émis auparavant. Pas de ligne = 0.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='token_version',
+    )
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} v{self.version}"
@@ -0,0 +1,43 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .authentication import invalidate_users
+from .tokens import bump_token_versions
+
+BAN_BATCH_SIZE = 500
+# Nombre maximum de comptes visés par une requête de bannissement groupé
+BULK_BAN_MAX_USERS = 10000
+
+
+def _batches(ids, size=BAN_BATCH_SIZE):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def ban_users(user_ids):
+    """
+    Bannit un ensemble d'utilisateurs par lots ensemblistes.
+
+    Chaque lot fait une lecture (``id``, ``is_staff``) puis un seul
+    ``UPDATE ... WHERE id IN (...) AND is_staff = false``, suivi de
+    l'incrément groupé de la génération des tokens des comptes bannis, qui
+    révoque tous leurs tokens. Les administrateurs ne sont jamais bannis.
+
+    Retourne le détail par identifiant.
+    """
+    result = {"banned": [], "not_found": [], "admin_skipped": []}
+    for batch in _batches(list(dict.fromkeys(user_ids))):
+        with transaction.atomic():
+            staff_by_id = dict(
+                User.objects.select_for_update().filter(id__in=batch).values_list("id", "is_staff")
+            )
+            banned = [i for i in batch if staff_by_id.get(i) is False]
+            User.objects.filter(id__in=banned, is_staff=False).update(is_active=False)
+            bump_token_versions(banned)
+        # update() ne déclenche pas post_save
+        invalidate_users(banned)
+        result["banned"] += banned
+        result["not_found"] += [i for i in batch if i not in staff_by_id]
+        result["admin_skipped"] += [i for i in batch if staff_by_id.get(i) is True]
+    return result
+
@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Pagination par curseur (keyset) sur l'identifiant.
+
+    Chaque page est une requête ``WHERE id > <curseur> ORDER BY id LIMIT n``
+    servie par la clé primaire : son coût ne dépend pas de la taille de la
+    table, contrairement à un ``OFFSET`` ou à un chargement complet.
+    """
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
@@ -0,0 +1,177 @@
+"""
+Budgets de requêtes SQL.
+
+Une vue déclare ``query_budget = N`` : nombre maximal de requêtes SQL
+qu'une requête HTTP peut exécuter (caches froids). ``QueryBudgetMiddleware``,
+actif en DEBUG (donc pas pendant les tests, que Django exécute avec
+``DEBUG = False``) ou selon ``QUERY_BUDGET["ENABLED"]``, enregistre chaque
+requête SQL, signale les dépassements et les requêtes identiques répétées
+(motif N+1) ; avec ``QUERY_BUDGET["RAISE"]`` (tests), il lève une erreur.
+
+``query_budget(n)`` applique la même vérification à un bloc ou à un test.
+"""
+import contextvars
+import logging
+import time
+from collections import Counter
+from contextlib import ContextDecorator
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# Contrôle de transaction : ni compté ni enregistré (les TestCase en ajoutent partout)
+TRANSACTION_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Trop de requêtes SQL, ou requêtes identiques répétées (N+1)."""
+
+
+# Enregistreurs actifs (imbriqués) de la requête ou du bloc en cours
+_recorders = contextvars.ContextVar("query_recorders", default=())
+
+
+def _record(execute, sql, params, many, context):
+    recorders = _recorders.get()
+    if not recorders:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if not sql.startswith(TRANSACTION_STATEMENTS):
+            query = (context["connection"].alias, sql, time.perf_counter() - started)
+            for recorder in recorders:
+                recorder.queries.append(query)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    Ajoute ``_record`` aux wrappers de chaque connexion, une fois pour toutes :
+    les enregistreurs actifs sont retrouvés par la variable de contexte, que
+    ``sync_to_async`` propage aux threads qui exécutent le SQL sous ASGI.
+    """
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+connection_created.connect(install_query_recorder)
+
+
+class QueryRecorder:
+    """Enregistre les requêtes SQL exécutées sur toutes les bases pendant le bloc ``with``."""
+
+    def __init__(self):
+        self.queries = []  # (alias, sql, durée)
+        self._token = None
+
+    def __enter__(self):
+        self._token = _recorders.set(_recorders.get() + (self,))
+        return self
+
+    def __exit__(self, *exc_info):
+        _recorders.reset(self._token)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def duplicates(self, threshold):
+        """Requêtes au texte identique (paramètres mis à part) exécutées au moins ``threshold`` fois."""
+        counts = Counter(sql for _, sql, _ in self.queries)
+        return {sql: count for sql, count in counts.items() if count >= threshold}
+
+    def problems(self, budget, duplicate_threshold):
+        """Description des dépassements, vide si tout va bien."""
+        problems = []
+        if budget is not None and len(self) > budget:
+            problems.append(f"{len(self)} requêtes SQL pour un budget de {budget}")
+        for sql, count in self.duplicates(duplicate_threshold).items():
+            problems.append(f"requête répétée {count} fois (N+1 ?) : {sql}")
+        return problems
+
+    def report(self):
+        return "\n".join(f"  {i}. [{alias}] {sql}" for i, (alias, sql, _) in enumerate(self.queries, start=1))
+
+
+class query_budget(ContextDecorator):
+    """
+    Échoue si le bloc (ou le test décoré) exécute plus de ``max_queries``
+    requêtes SQL, ou une même requête au moins ``duplicate_threshold`` fois.
+    """
+
+    def __init__(self, max_queries, duplicate_threshold=None):
+        self.max_queries = max_queries
+        self.duplicate_threshold = duplicate_threshold or settings.QUERY_BUDGET["DUPLICATE_THRESHOLD"]
+
+    def __enter__(self):
+        self.recorder = QueryRecorder().__enter__()
+        return self.recorder
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.__exit__(exc_type, exc, tb)
+        if exc_type is not None:
+            return False
+        problems = self.recorder.problems(self.max_queries, self.duplicate_threshold)
+        if problems:
+            raise QueryBudgetExceeded("\n".join(problems) + "\n" + self.recorder.report())
+        return False
+
+
+def view_query_budget(view_func):
+    """Budget déclaré par la vue (``query_budget`` sur la classe), ou None."""
+    view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    return getattr(view_class, "query_budget", None)
+
+
+def query_budget_enabled():
+    """``QUERY_BUDGET["ENABLED"]``, ou DEBUG s'il n'est pas défini."""
+    enabled = settings.QUERY_BUDGET["ENABLED"]
+    return settings.DEBUG if enabled is None else enabled
+
+
+class QueryBudgetMiddleware:
+    """
+    Vérifie le budget SQL de chaque requête (développement et tests).
+
+    Synchrone et asynchrone : sous ASGI, la chaîne reste asynchrone jusqu'aux vues natives.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not query_budget_enabled():
+            return self.get_response(request)
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self._check(request, response, recorder)
+
+    async def __acall__(self, request):
+        if not query_budget_enabled():
+            return await self.get_response(request)
+        with QueryRecorder() as recorder:
+            response = await self.get_response(request)
+        return self._check(request, response, recorder)
+
+    def _check(self, request, response, recorder):
+        config = settings.QUERY_BUDGET
+        # Budget de la vue résolue (sans process_view, qui imposerait un passage par un thread sous ASGI)
+        match = request.resolver_match
+        budget = view_query_budget(match.func) if match else None
+        problems = recorder.problems(budget, config["DUPLICATE_THRESHOLD"])
+        response["X-Query-Count"] = str(len(recorder))
+        if problems:
+            message = f"{request.method} {request.path} : " + " ; ".join(problems)
+            if config["RAISE"]:
+                raise QueryBudgetExceeded(message + "\n" + recorder.report())
+            logger.warning(message)
+        return response
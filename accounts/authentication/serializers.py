@@ -1,7 +1,12 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+
+from .hashing import hash_password
+from .moderation import BULK_BAN_MAX_USERS
+from .tokens import VersionedRefreshToken
 
 # Serializer pour l'inscription des utilisateurs
 class RegisterSerializer(serializers.ModelSerializer):
@@ -25,24 +30,36 @@ class RegisterSerializer(serializers.ModelSerializer):
         # IMPORTANT : Supprime password2
         validated_data.pop('password2')
         
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
-            password=validated_data['password']
+        # Comme create_user, mais le mot de passe est haché dans le pool (503 s'il est saturé)
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data['email']),
+            password=hash_password(validated_data['password'])
         )
+        user.save()
         return user
 
 # Serializer pour personnaliser le JWT
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = VersionedRefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
         # Ajouter des informations supplémentaires dans le token
         token['username'] = user.username
         token['email'] = user.email
+        # Permet à /me/ de répondre sans base de données (AUTH_ME_FROM_CLAIMS)
+        token['is_staff'] = user.is_staff
+        token['is_active'] = user.is_active
         return token
 
 
+# Serializer de rafraîchissement : refuse les refresh tokens révoqués (claim "ver")
+class VersionedTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = VersionedRefreshToken
+
+
 # Serializer pour changer le mot de passe
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(required=True)
@@ -55,4 +72,40 @@ class ChangePasswordSerializer(serializers.Serializer):
 class UserListSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'is_active']
\ No newline at end of file
+        fields = ['id', 'username', 'email', 'is_active']
+
+
+# Serializer pour la météo de plusieurs villes
+class WeatherBatchSerializer(serializers.Serializer):
+    cities = serializers.ListField(
+        child=serializers.CharField(max_length=100),
+        min_length=1,
+        max_length=settings.WEATHER_BATCH["MAX_CITIES"],
+    )
+
+
+# Serializer pour le bannissement groupé : une liste d'ids OU un filtre
+class BulkBanSerializer(serializers.Serializer):
+    FILTER_KEYS = ("is_active", "joined_after")
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        min_length=1,
+        max_length=BULK_BAN_MAX_USERS,
+    )
+    filter = serializers.DictField(required=False)
+
+    def validate_filter(self, value):
+        unknown = set(value) - set(self.FILTER_KEYS)
+        if unknown or not value:
+            raise serializers.ValidationError(
+                f"Filtres disponibles : {', '.join(self.FILTER_KEYS)} (au moins un)."
+            )
+        # Même format que les paramètres d'URL de la liste des utilisateurs
+        return {k: str(v).lower() if isinstance(v, bool) else str(v) for k, v in value.items()}
+
+    def validate(self, attrs):
+        if ("ids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Fournir soit 'ids', soit 'filter'.")
+        return attrs
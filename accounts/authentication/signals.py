@@ -0,0 +1,15 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_users
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Un bannissement, un changement de mot de passe ou de profil s'applique immédiatement."""
+    invalidate_users([instance.pk])
+    # Une requête concurrente a pu remettre l'ancienne ligne en cache avant le commit
+    transaction.on_commit(lambda: invalidate_users([instance.pk]))
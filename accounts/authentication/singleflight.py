@@ -0,0 +1,91 @@
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Regroupe les appels concurrents portant sur la même clé.
+
+    Le premier appelant (« leader ») exécute la fonction ; les suivants
+    attendent son résultat (ou son exception) au lieu de refaire le même
+    travail. Rien n'est mémorisé une fois l'appel terminé : c'est le rôle
+    du cache.
+
+    ``do`` sert les threads (WSGI, ou vues synchrones sous ASGI) ; ``do_async``
+    sert les tâches d'une même boucle asyncio (vues asynchrones sous ASGI).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}  # (boucle, clé) -> asyncio.Future
+        self._counters = {"calls": 0, "coalesced": 0}
+
+    def do(self, key, fn):
+        """Exécute ``fn(key)`` une seule fois pour tous les threads concurrents."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counters["calls"] += 1
+            else:
+                self._counters["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(key)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key, fn):
+        """Attend ``await fn(key)`` une seule fois pour toutes les tâches concurrentes."""
+        loop_key = (asyncio.get_running_loop(), key)
+        future = self._tasks.get(loop_key)
+        if future is not None:
+            with self._lock:
+                self._counters["coalesced"] += 1
+            # shield : l'annulation d'un appelant n'annule pas l'appel partagé
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(fn(key))
+        self._tasks[loop_key] = future
+        with self._lock:
+            self._counters["calls"] += 1
+        future.add_done_callback(lambda f: self._forget(loop_key, f))
+        return await asyncio.shield(future)
+
+    def _forget(self, loop_key, future):
+        self._tasks.pop(loop_key, None)
+        if not future.cancelled():
+            # Marque l'exception comme lue même si tous les appelants ont été annulés
+            future.exception()
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "in_flight": len(self._calls) + len(self._tasks)}
+
+    def reset(self):
+        with self._lock:
+            for name in self._counters:
+                self._counters[name] = 0
@@ -0,0 +1,64 @@
+"""
+Outils communs aux tests des applications ``accounts``.
+
+Les caches et états en mémoire du processus (utilisateurs, versions des
+tokens, seaux de débit, météo, filtre de la liste noire, métriques…)
+survivent au rollback de chaque test : ``RuntimeStateTestCase`` les remet
+tous à zéro avant chaque test, plutôt que chaque classe n'en vide qu'une
+partie.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+
+from .authentication import user_cache
+from .blacklist import blacklist_filter
+from .metrics import registry
+from .querybudget import view_query_budget
+from .throttling import throttle_store
+from .tokens import version_cache
+from .weather import weather_cache, weather_client
+
+
+def reset_runtime_state():
+    """Caches froids et compteurs à zéro, comme au démarrage d'un processus."""
+    cache.clear()
+    user_cache.clear()
+    version_cache.clear()
+    throttle_store.clear()
+    weather_cache.clear()
+    weather_client.breaker.reset()
+    blacklist_filter.reset()
+    registry.reset()
+
+
+class RuntimeStateTestCase(TestCase):
+    """``TestCase`` dont chaque test part des caches du processus vides."""
+
+    def setUp(self):
+        super().setUp()
+        reset_runtime_state()
+
+    def assertRoutesDeclareBudget(self, urlpatterns):
+        """Chaque vue de ``urlpatterns`` déclare ``query_budget``."""
+        for pattern in urlpatterns:
+            with self.subTest(route=pattern.name):
+                self.assertIsNotNone(view_query_budget(pattern.callback))
+
+    def assertRoutesWithinBudget(self, urlpatterns, requests_for):
+        """
+        Rejoue les requêtes de ``requests_for(nom de la route)`` (fonctions
+        sans argument rendant la réponse), chacune caches froids et dans un
+        savepoint annulé ensuite. ``QueryBudgetMiddleware`` doit être actif
+        avec ``RAISE`` : il lève ``QueryBudgetExceeded`` en cas de dépassement.
+        """
+        for pattern in urlpatterns:
+            for i, request in enumerate(requests_for(pattern.name)):
+                with self.subTest(route=pattern.name, request=i):
+                    reset_runtime_state()
+                    savepoint = transaction.savepoint()
+                    try:
+                        response = request()
+                    finally:
+                        transaction.savepoint_rollback(savepoint)
+                    self.assertLess(response.status_code, 400)
@@ -1,15 +1,73 @@
-from django.test import TestCase, Client
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import Client, AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
 from django.urls import reverse
-from rest_framework import status
+from rest_framework import serializers, status
+from rest_framework.renderers import JSONRenderer
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
 from django.contrib.auth.models import User
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import asyncio
+import csv
+import io
+import threading
+import time
 import json
+import os
+import tempfile
 
+import requests
+from asgiref.sync import iscoroutinefunction
 
-class AuthTests(TestCase):
+from accounts.users.serializers import UserSerializer
+from api_fil_rouge.database import database_from_env, replicas_from_env
+from api_fil_rouge import schema
+from api_fil_rouge.routers import (
+    ReplicaRouter, ReplicaRoutingMiddleware, check_shared_pins, pin_to_primary, replica_reads,
+    replica_reads_enabled,
+)
+
+from .authentication import user_cache
+from .benchmarks import recommend_iterations
+from .blacklist import BlacklistFilter
+from .bloom import BloomFilter
+from .cache import TTLCache
+from .fastjson import compile_serializer
+from .hashing import HashingUnavailable, PasswordHashPool, password_pool
+from .models import TokenVersion
+from .throttling import LocalBucketStore, parse_rate
+from .validators import CustomPasswordValidator, PreloadedCommonPasswordValidator
+from .tokens import TOKEN_VERSION_CLAIM, VersionedRefreshToken, bump_token_versions, version_cache
+from .imports import import_users
+from .metrics import Histogram, MetricsMiddleware
+from .urls import urlpatterns as auth_urlpatterns
+from .views import MeView
+from .serializers import RegisterSerializer, UserListSerializer
+from .querybudget import QueryBudgetExceeded, query_budget
+from .testing import RuntimeStateTestCase, reset_runtime_state
+from .loadtest import UpstreamStandIn, compare_to_baseline, percentile, summarize
+from .http_client import AsyncUpstreamClient, CircuitBreaker, CircuitOpenError, UpstreamClient
+from .singleflight import SingleFlight
+from .weather import async_weather_client, weather_cache, weather_client
+
+
+class AuthTests(RuntimeStateTestCase):
     """Tests unitaires pour l'API d'authentification"""
     
     def setUp(self):
         """Configuration initiale avant chaque test"""
+        super().setUp()
         self.client = Client()
         
         # Création d'un administrateur
@@ -363,4 +421,1859 @@ class AuthTests(TestCase):
             HTTP_AUTHORIZATION=f"Bearer {access_token}"
         )
         
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class FakeClock:
+    """Horloge manipulable pour tester les expirations sans attendre."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTests(RuntimeStateTestCase):
+    """Tests unitaires du cache LRU/TTL"""
+
+    def test_lru_eviction(self):
+        """L'entrée la moins récemment utilisée est évincée"""
+        cache = TTLCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.lookup("a")
+        cache.set("c", 3)
+
+        self.assertIsNone(cache.lookup("b"))
+        self.assertEqual(cache.lookup("a"), (1, False))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_stale_entry_served_and_refreshed(self):
+        """Une entrée périmée est servie puis rafraîchie en arrière-plan"""
+        clock = FakeClock()
+        executor = ThreadPoolExecutor(max_workers=1)
+        cache = TTLCache(max_entries=10, ttl=10, stale_ttl=100, executor=executor, clock=clock)
+        cache.set("paris", "ancienne")
+        clock.now = 20
+
+        value = cache.get_or_fetch("paris", lambda key: "nouvelle")
+        executor.shutdown(wait=True)
+
+        self.assertEqual(value, "ancienne")
+        self.assertEqual(cache.lookup("paris"), ("nouvelle", False))
+        stats = cache.stats()
+        self.assertEqual(stats["stale_hits"], 1)
+        self.assertEqual(stats["refreshes"], 1)
+
+    def test_entry_too_old_is_a_miss(self):
+        """Au-delà de la période de grâce, l'entrée est rechargée de façon synchrone"""
+        clock = FakeClock()
+        cache = TTLCache(max_entries=10, ttl=10, stale_ttl=5, clock=clock)
+        cache.set("paris", "ancienne")
+        clock.now = 16
+
+        self.assertEqual(cache.get_or_fetch("paris", lambda key: "nouvelle"), "nouvelle")
+        self.assertEqual(cache.stats()["misses"], 1)
+
+
+class WeatherViewTests(RuntimeStateTestCase):
+    """Tests de l'endpoint météo (API tierce simulée)"""
+
+    def setUp(self):
+        super().setUp()
+
+    def _upstream(self, status_code=200, payload=None):
+        response = mock.Mock(status_code=status_code)
+        response.json.return_value = payload or {"name": "Paris", "main": {"temp": 15.2}}
+        return response
+
+    @mock.patch.object(weather_client.session, "get")
+    def test_weather_is_cached_per_normalized_city(self, upstream_get):
+        """Deux appels pour la même ville ne font qu'un seul appel à l'API tierce"""
+        upstream_get.return_value = self._upstream()
+
+        first = self.client.get(reverse("weather", args=["Paris"]))
+        second = self.client.get(reverse("weather", args=[" paris "]))
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(upstream_get.call_count, 1)
+        self.assertEqual(weather_cache.stats()["hits"], 1)
+
+    @mock.patch.object(weather_client.session, "get")
+    def test_weather_errors_are_not_cached(self, upstream_get):
+        """Une ville inconnue renvoie 404 et n'est pas mise en cache"""
+        upstream_get.return_value = self._upstream(status_code=404)
+
+        response = self.client.get(reverse("weather", args=["Atlantide"]))
+        self.client.get(reverse("weather", args=["Atlantide"]))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(upstream_get.call_count, 2)
+
+    @mock.patch.object(weather_client, "_sleep")
+    @mock.patch.object(weather_client.session, "get")
+    def test_weather_unreachable_returns_503(self, upstream_get, sleep):
+        """Une API tierce injoignable renvoie 503 après les tentatives prévues"""
+        upstream_get.side_effect = requests.ConnectionError()
+
+        response = self.client.get(reverse("weather", args=["Paris"]))
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(upstream_get.call_count, weather_client.retries + 1)
+
+
+    @mock.patch.object(weather_client.session, "get")
+    def test_weather_batch_returns_per_city_results(self, upstream_get):
+        """La météo groupée renvoie un résultat par ville, erreurs comprises, dans l'ordre"""
+        # Ne s'ouvre que si les 4 appels (doublon "paris" dédupliqué) sont en cours en même temps
+        barrier = threading.Barrier(4)
+
+        def upstream(url, params, timeout):
+            barrier.wait(timeout=10)
+            if params["q"] == "atlantide":
+                return self._upstream(status_code=404)
+            return self._upstream(payload={"name": params["q"]})
+        upstream_get.side_effect = upstream
+        cities = ["Paris", "Lyon", "Atlantide", "Nice", "paris"]
+
+        response = self.client.post(
+            reverse("weather_batch"),
+            data=json.dumps({"cities": cities}),
+            content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual([r["city"] for r in results], cities)
+        self.assertEqual([r["status"] for r in results], [200, 200, 404, 200, 200])
+        self.assertEqual(results[1]["data"], {"name": "lyon"})
+        self.assertIn("error", results[2])
+        # Doublon "paris" dédupliqué, appels en parallèle
+        self.assertEqual(upstream_get.call_count, 4)
+        self.assertFalse(barrier.broken)
+
+    def test_weather_batch_rejects_empty_list(self):
+        """Une liste de villes vide est refusée"""
+        response = self.client.post(
+            reverse("weather_batch"),
+            data=json.dumps({"cities": []}),
+            content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class UpstreamClientTests(RuntimeStateTestCase):
+    """Tests du client HTTP partagé et du disjoncteur"""
+
+    def _client(self, **kwargs):
+        return UpstreamClient(sleep=lambda delay: None, **kwargs)
+
+    def test_retries_then_succeeds(self):
+        """Une erreur réseau passagère est retentée"""
+        client = self._client(retries=2)
+        ok = mock.Mock(status_code=200)
+        with mock.patch.object(client.session, "get", side_effect=[requests.Timeout(), ok]) as get:
+            self.assertIs(client.get("http://upstream.test/"), ok)
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(get.call_args.kwargs["timeout"], client.timeout)
+        self.assertEqual(client.breaker.snapshot()["state"], CircuitBreaker.CLOSED)
+
+    def test_breaker_opens_and_fails_fast(self):
+        """Après trop d'échecs, le disjoncteur refuse les appels sans contacter l'API"""
+        client = self._client(retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        with mock.patch.object(client.session, "get", side_effect=requests.ConnectionError()) as get:
+            for _ in range(2):
+                with self.assertRaises(requests.ConnectionError):
+                    client.get("http://upstream.test/")
+            with self.assertRaises(CircuitOpenError):
+                client.get("http://upstream.test/")
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(client.breaker.snapshot()["state"], CircuitBreaker.OPEN)
+
+    def test_breaker_half_open_trial_closes_it(self):
+        """Après le délai d'ouverture, un appel réussi referme le disjoncteur"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+        client = self._client(retries=0, breaker=breaker)
+        breaker.record_failure()
+        clock.now = 31
+
+        with mock.patch.object(client.session, "get", return_value=mock.Mock(status_code=404)):
+            client.get("http://upstream.test/")
+
+        self.assertEqual(breaker.snapshot()["state"], CircuitBreaker.CLOSED)
+
+
+class SingleFlightTests(RuntimeStateTestCase):
+    """Tests du regroupement des appels concurrents"""
+
+    def _wait_until(self, predicate, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                self.fail("Condition non atteinte à temps")
+            time.sleep(0.001)
+
+    def test_concurrent_threads_share_one_call(self):
+        """N threads sur la même clé ne déclenchent qu'un seul appel"""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch(key):
+            calls.append(key)
+            release.wait()
+            return f"météo {key}"
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(flight.do, "paris", fetch) for _ in range(8)]
+            self._wait_until(lambda: flight.stats()["coalesced"] == 7)
+            release.set()
+            results = [f.result() for f in futures]
+
+        self.assertEqual(calls, ["paris"])
+        self.assertEqual(results, ["météo paris"] * 8)
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    def test_error_is_shared_and_not_remembered(self):
+        """L'exception du leader est propagée aux autres, puis la clé est libérée"""
+        flight = SingleFlight()
+
+        def failing(key):
+            raise ValueError(key)
+
+        with self.assertRaises(ValueError):
+            flight.do("paris", failing)
+        self.assertEqual(flight.do("paris", lambda key: "ok"), "ok")
+
+    def test_concurrent_tasks_share_one_call(self):
+        """N tâches asyncio sur la même clé ne déclenchent qu'un seul appel"""
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key.upper()
+
+        async def main():
+            return await asyncio.gather(*(flight.do_async("lyon", fetch) for _ in range(10)))
+
+        self.assertEqual(asyncio.run(main()), ["LYON"] * 10)
+        self.assertEqual(calls, ["lyon"])
+
+
+class AsyncViewsTests(RuntimeStateTestCase):
+    """Tests des vues asynchrones natives"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+        login_resp = self.client.post(
+            reverse("auth_login"),
+            data=json.dumps({"username": "user1", "password": "User1234!"}),
+            content_type="application/json"
+        )
+        self.access_token = login_resp.json()["access"]
+        self.async_client = AsyncClient()
+
+    async def test_async_me_returns_current_user(self):
+        """/async/me/ renvoie l'utilisateur du token"""
+        response = await self.async_client.get(
+            reverse("auth_me_async"), headers={"Authorization": f"Bearer {self.access_token}"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["username"], "user1")
+
+    async def test_async_me_requires_authentication(self):
+        """/async/me/ refuse les requêtes sans token ou avec un token invalide"""
+        missing = await self.async_client.get(reverse("auth_me_async"))
+        invalid = await self.async_client.get(reverse("auth_me_async"), headers={"Authorization": "Bearer abc"})
+
+        self.assertEqual(missing.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(invalid.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("Bearer", missing["WWW-Authenticate"])
+
+    async def test_async_weather_concurrent_requests_share_upstream_call(self):
+        """Des requêtes asynchrones concurrentes pour une ville ne font qu'un appel non bloquant"""
+        async def upstream_get(url, params):
+            await asyncio.sleep(0.05)
+            return mock.Mock(status_code=200, json=lambda: {"name": params["q"]})
+        session = mock.Mock(get=mock.AsyncMock(side_effect=upstream_get))
+
+        with mock.patch.object(AsyncUpstreamClient, "session", new_callable=mock.PropertyMock, return_value=session):
+            responses = await asyncio.gather(*(
+                self.async_client.get(reverse("weather_async", args=["Paris"])) for _ in range(5)
+            ))
+
+        self.assertEqual([r.status_code for r in responses], [200] * 5)
+        self.assertEqual(responses[0].json(), {"name": "paris"})
+        self.assertEqual(session.get.await_count, 1)
+
+
+class ListUsersPaginationTests(RuntimeStateTestCase):
+    """Tests de la pagination par curseur de la liste des utilisateurs"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="Admin1234!"
+        )
+        for i in range(5):
+            User.objects.create(username=f"user{i}", email=f"user{i}@example.com", is_active=i % 2 == 0)
+        login_resp = self.client.post(
+            reverse("auth_login"),
+            data=json.dumps({"username": "admin", "password": "Admin1234!"}),
+            content_type="application/json"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {login_resp.json()['access']}"}
+
+    def test_pages_follow_cursor_in_id_order(self):
+        """Les pages successives couvrent tous les utilisateurs, dans l'ordre des ids"""
+        url = reverse("auth_users") + "?page_size=2"
+        ids = []
+        pages = 0
+        while url:
+            response = self.client.get(url, **self.auth)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            body = response.json()
+            self.assertLessEqual(len(body["results"]), 2)
+            ids += [u["id"] for u in body["results"]]
+            url = body["next"]
+            pages += 1
+
+        self.assertEqual(ids, list(User.objects.order_by("id").values_list("id", flat=True)))
+        self.assertEqual(pages, 3)
+        self.assertEqual(set(body["results"][0]), {"id", "username", "email", "is_active"})
+
+    def test_page_cost_does_not_depend_on_table_size(self):
+        """Une page = une requête d'authentification + une requête bornée"""
+        with self.assertNumQueries(2):
+            self.client.get(reverse("auth_users") + "?page_size=2", **self.auth)
+
+    def test_filters(self):
+        """Les filtres is_active, is_staff et joined_after sont appliqués"""
+        inactive = self.client.get(reverse("auth_users") + "?is_active=false", **self.auth).json()
+        staff = self.client.get(reverse("auth_users") + "?is_staff=true", **self.auth).json()
+        future = self.client.get(reverse("auth_users") + "?joined_after=2999-01-01", **self.auth).json()
+
+        self.assertEqual({u["username"] for u in inactive["results"]}, {"user1", "user3"})
+        self.assertEqual([u["username"] for u in staff["results"]], ["admin"])
+        self.assertEqual(future["results"], [])
+
+    def test_invalid_filter_is_rejected(self):
+        """Un filtre mal formé renvoie 400"""
+        response = self.client.get(reverse("auth_users") + "?is_active=peut-etre", **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class UserExportTests(RuntimeStateTestCase):
+    """Tests de l'export des utilisateurs en flux"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="Admin1234!"
+        )
+        User.objects.create(username="élodie", email="elodie@example.com", first_name="Élodie")
+        User.objects.create(username="banni", email="banni@example.com", is_active=False)
+        login_resp = self.client.post(
+            reverse("auth_login"),
+            data=json.dumps({"username": "admin", "password": "Admin1234!"}),
+            content_type="application/json"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {login_resp.json()['access']}"}
+
+    def test_export_ndjson_is_streamed(self):
+        """L'export NDJSON est un flux, une ligne JSON par utilisateur"""
+        response = self.client.get(reverse("auth_users_export"), **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([r["username"] for r in rows], ["admin", "élodie", "banni"])
+        self.assertEqual(rows[1]["first_name"], "Élodie")
+        self.assertNotIn("password", rows[0])
+
+    def test_export_csv_with_filter(self):
+        """L'export CSV a un en-tête et applique les filtres de la liste"""
+        response = self.client.get(reverse("auth_users_export") + "?output=csv&is_active=false", **self.auth)
+
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ["id", "username", "email"])
+        self.assertEqual([row[1] for row in rows[1:]], ["banni"])
+
+    async def test_export_is_async_under_asgi(self):
+        """Sous ASGI, le flux est asynchrone : Django ne le lit pas en entier avant le premier octet"""
+        with mock.patch("accounts.authentication.exports.EXPORT_CHUNK_SIZE", 1):
+            response = await AsyncClient().get(
+                reverse("auth_users_export") + "?output=csv",
+                headers={"Authorization": self.auth["HTTP_AUTHORIZATION"]},
+            )
+            # Un flux synchrone serait lu par sync_to_async(list) dans StreamingHttpResponse.__aiter__
+            self.assertTrue(response.is_async)
+            with mock.patch("django.http.response.sync_to_async", side_effect=AssertionError):
+                body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual([row[1] for row in rows], ["username", "admin", "élodie", "banni"])
+
+    def test_export_rejects_unknown_format(self):
+        """Un format inconnu renvoie 400"""
+        response = self.client.get(reverse("auth_users_export") + "?output=xml", **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_requires_admin(self):
+        """Un utilisateur sans token ne peut pas exporter"""
+        response = self.client.get(reverse("auth_users_export"))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class BulkBanTests(RuntimeStateTestCase):
+    """Tests du bannissement groupé"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="Admin1234!"
+        )
+        self.users = [
+            User.objects.create(username=f"user{i}", email=f"user{i}@example.com") for i in range(3)
+        ]
+        login_resp = self.client.post(
+            reverse("auth_login"),
+            data=json.dumps({"username": "admin", "password": "Admin1234!"}),
+            content_type="application/json"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {login_resp.json()['access']}"}
+
+    def _ban(self, payload):
+        return self.client.post(
+            reverse("ban_users"), data=json.dumps(payload), content_type="application/json", **self.auth
+        )
+
+    def test_bulk_ban_reports_per_id_and_revokes_tokens(self):
+        """Chaque id est classé et les refresh tokens des bannis sont révoqués"""
+        refresh = RefreshToken.for_user(self.users[0])
+        ids = [self.users[0].id, self.users[1].id, self.admin_user.id, 99999]
+
+        response = self._ban({"ids": ids})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual(body["banned"], [self.users[0].id, self.users[1].id])
+        self.assertEqual(body["admin_skipped"], [self.admin_user.id])
+        self.assertEqual(body["not_found"], [99999])
+        # Client neuf : le cookie de refresh de l'admin serait prioritaire sur le corps
+        refresh_resp = Client().post(
+            reverse("token_refresh"), data=json.dumps({"refresh": str(refresh)}), content_type="application/json"
+        )
+        self.assertEqual(refresh_resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(
+            list(User.objects.filter(is_active=False).order_by("id").values_list("id", flat=True)),
+            [self.users[0].id, self.users[1].id]
+        )
+
+    def test_bulk_ban_by_filter_skips_admins(self):
+        """Le filtre vise tous les comptes correspondants, sauf les administrateurs"""
+        response = self._ban({"filter": {"is_active": True}})
+
+        body = response.json()
+        self.assertEqual(body["banned"], [u.id for u in self.users])
+        self.assertEqual(body["admin_skipped"], [self.admin_user.id])
+        self.assertTrue(User.objects.get(pk=self.admin_user.pk).is_active)
+
+    def test_bulk_ban_uses_set_based_queries(self):
+        """Le nombre de requêtes ne dépend pas du nombre de comptes bannis"""
+        with self.assertNumQueries(9):
+            self._ban({"ids": [u.id for u in self.users]})
+
+    def test_bulk_ban_requires_ids_or_filter(self):
+        """Il faut fournir exactement une liste d'ids ou un filtre"""
+        self.assertEqual(self._ban({}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._ban({"filter": {}}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self._ban({"ids": [1], "filter": {"is_active": True}}).status_code, status.HTTP_400_BAD_REQUEST
+        )
+
+
+class CachedAuthenticationTests(RuntimeStateTestCase):
+    """Tests du cache des utilisateurs authentifiés"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="Admin1234!"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def test_user_is_loaded_once(self):
+        """Le second appel authentifié ne touche pas la base"""
+        # Premier appel : l'utilisateur et la version de ses tokens
+        with self.assertNumQueries(2):
+            self.client.get(reverse("auth_me"), **self.auth)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("auth_me"), **self.auth)
+
+        self.assertEqual(response.json()["username"], "user1")
+
+    def test_ban_takes_effect_immediately(self):
+        """Un utilisateur banni est refusé dès la requête suivante"""
+        self.client.get(reverse("auth_me"), **self.auth)
+        admin_auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.admin_user).access_token}"}
+
+        self.client.post(reverse("ban_user", args=[self.user.id]), **admin_auth)
+        response = self.client.get(reverse("auth_me"), **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bulk_ban_takes_effect_immediately(self):
+        """Le bannissement groupé (update()) invalide aussi le cache"""
+        self.client.get(reverse("auth_me"), **self.auth)
+        admin_auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.admin_user).access_token}"}
+
+        self.client.post(
+            reverse("ban_users"), data=json.dumps({"ids": [self.user.id]}),
+            content_type="application/json", **admin_auth
+        )
+        response = self.client.get(reverse("auth_me"), **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_is_visible_immediately(self):
+        """Une modification du profil est visible à la requête suivante"""
+        self.client.get(reverse("auth_me"), **self.auth)
+
+        self.client.patch(
+            reverse("users:user_detail"), data=json.dumps({"email": "nouveau@example.com"}),
+            content_type="application/json", **self.auth
+        )
+        response = self.client.get(reverse("auth_me"), **self.auth)
+
+        self.assertEqual(response.json()["email"], "nouveau@example.com")
+
+
+@override_settings(AUTH_ME_FROM_CLAIMS=True)
+class MeFromClaimsTests(RuntimeStateTestCase):
+    """Tests du mode « claims » de /me/ (aucune lecture de auth_user)"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="Admin1234!"
+        )
+        login_resp = self.client.post(
+            reverse("auth_login"),
+            data=json.dumps({"username": "admin", "password": "Admin1234!"}),
+            content_type="application/json"
+        )
+        self.access_token = login_resp.json()["access"]
+        # La connexion a mis en cache la version des tokens, pas l'utilisateur
+        user_cache.clear()
+
+    def test_me_runs_zero_queries(self):
+        """Version des tokens en cache, /me/ répond depuis le token validé sans aucune requête"""
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("auth_me"), HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            "id": self.admin_user.id,
+            "username": "admin",
+            "email": "admin@example.com",
+            "is_staff": True,
+            "is_active": True,
+        })
+
+    def test_cold_version_cache_costs_one_query(self):
+        """Cache des versions froid : une seule requête (TokenVersion), puis plus aucune"""
+        version_cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("auth_me"), HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertIn(TokenVersion._meta.db_table, queries[0]["sql"])
+        with self.assertNumQueries(0):
+            self.client.get(reverse("auth_me"), HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+
+    async def test_async_me_uses_claims(self):
+        """/async/me/ répond aussi depuis les claims"""
+        response = await AsyncClient().get(
+            reverse("auth_me_async"), headers={"Authorization": f"Bearer {self.access_token}"}
+        )
+
+        self.assertEqual(response.json()["is_staff"], True)
+
+    def test_me_still_requires_valid_token(self):
+        """Sans token valide, /me/ reste refusé"""
+        response = self.client.get(reverse("auth_me"), HTTP_AUTHORIZATION="Bearer abc")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TokenVersionTests(RuntimeStateTestCase):
+    """Tests de la révocation de tous les tokens par incrément de version"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+        login_resp = self.client.post(
+            reverse("auth_login"),
+            data=json.dumps({"username": "user1", "password": "User1234!"}),
+            content_type="application/json"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {login_resp.json()['access']}"}
+        self.refresh_token = login_resp.cookies["refresh_token"].value
+
+    def _refresh(self):
+        return self.client.post(
+            reverse("token_refresh"),
+            data=json.dumps({"refresh": self.refresh_token}),
+            content_type="application/json"
+        )
+
+    def test_tokens_carry_version_claim(self):
+        """Les tokens de connexion portent la génération courante"""
+        self.assertEqual(VersionedRefreshToken(self.refresh_token)[TOKEN_VERSION_CLAIM], 0)
+
+    def test_logout_all_revokes_access_and_refresh_tokens(self):
+        """Après « tout déconnecter », ni l'access ni le refresh token ne sont acceptés"""
+        self.assertEqual(self._refresh().status_code, status.HTTP_200_OK)
+
+        response = self.client.post(reverse("auth_logout_all"), **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+        self.assertEqual(self.client.get(reverse("auth_me"), **self.auth).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self._refresh().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_change_password_revokes_existing_tokens(self):
+        """Un changement de mot de passe révoque les tokens existants, pas les nouveaux"""
+        self.client.post(
+            reverse("auth_change_password"),
+            data=json.dumps({"old_password": "User1234!", "new_password": "NewPass123!"}),
+            content_type="application/json",
+            **self.auth
+        )
+
+        self.assertEqual(self._refresh().status_code, status.HTTP_401_UNAUTHORIZED)
+        login_resp = self.client.post(
+            reverse("auth_login"),
+            data=json.dumps({"username": "user1", "password": "NewPass123!"}),
+            content_type="application/json"
+        )
+        new_auth = {"HTTP_AUTHORIZATION": f"Bearer {login_resp.json()['access']}"}
+        self.assertEqual(self.client.get(reverse("auth_me"), **new_auth).status_code, status.HTTP_200_OK)
+
+    def test_revocation_is_one_update_per_user(self):
+        """La révocation n'écrit aucune ligne de liste noire"""
+        bump_token_versions([self.user.pk])
+        bump_token_versions([self.user.pk])
+
+        self.assertEqual(TokenVersion.objects.get(user=self.user).version, 2)
+        self.assertEqual(BlacklistedToken.objects.count(), 0)
+
+
+class BlacklistFilterTests(RuntimeStateTestCase):
+    """Tests du pré-filtre de Bloom devant la liste noire des refresh tokens"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+
+    def _refresh(self, token):
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().post(
+                reverse("token_refresh"), data=json.dumps({"refresh": str(token)}), content_type="application/json"
+            )
+        reads = [q["sql"] for q in queries if "token_blacklist_blacklistedtoken" in q["sql"]]
+        return response, reads
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        """Un élément ajouté est toujours trouvé ; les faux positifs restent rares"""
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+
+        self.assertTrue(all(f"jti-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"autre-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_valid_refresh_skips_blacklist_query(self):
+        """Un refresh token non révoqué ne déclenche aucune lecture de la liste noire"""
+        self._refresh(VersionedRefreshToken.for_user(self.user))  # chargement initial du filtre
+
+        response, reads = self._refresh(VersionedRefreshToken.for_user(self.user))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(reads, [])
+
+    def test_blacklisted_token_is_still_rejected(self):
+        """Un token mis sur liste noire par ce processus est refusé aussitôt"""
+        token = VersionedRefreshToken.for_user(self.user)
+        self._refresh(token)
+        token.blacklist()
+
+        response, reads = self._refresh(token)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(reads), 1)
+
+    def test_revocations_from_other_processes_are_synced(self):
+        """Les révocations écrites en base par un autre processus sont vues après la synchronisation"""
+        clock = FakeClock()
+        bloom_filter = BlacklistFilter(capacity=100, sync_interval=5, clock=clock)
+        token = VersionedRefreshToken.for_user(self.user)
+        jti = token[api_settings.JTI_CLAIM]
+        self.assertFalse(bloom_filter.might_contain(jti))
+
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=jti))
+        self.assertFalse(bloom_filter.might_contain(jti))
+        clock.now += 5
+
+        self.assertTrue(bloom_filter.might_contain(jti))
+        self.assertEqual(bloom_filter.stats()["syncs"], 1)
+
+
+class PurgeTokenBlacklistTests(RuntimeStateTestCase):
+    """Tests de la commande purge_token_blacklist"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+        now = timezone.now()
+        self.expired = [
+            OutstandingToken.objects.create(user=self.user, jti=f"old-{i}", token="", expires_at=now - timedelta(days=1))
+            for i in range(5)
+        ]
+        BlacklistedToken.objects.create(token=self.expired[0])
+        self.valid = OutstandingToken.objects.create(user=self.user, jti="new", token="", expires_at=now + timedelta(days=1))
+        BlacklistedToken.objects.create(token=self.valid)
+
+    def _purge(self, **options):
+        out = io.StringIO()
+        call_command("purge_token_blacklist", max_rate=0, stdout=out, **options)
+        return out.getvalue()
+
+    def test_purge_deletes_only_expired_tokens(self):
+        """Les tokens expirés et leur entrée de liste noire sont supprimés, par lots"""
+        output = self._purge(batch_size=2)
+
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), ["new"])
+        self.assertEqual(BlacklistedToken.objects.get().token, self.valid)
+        self.assertIn("Lot 3 : 5/5", output)
+        self.assertIn("Purge terminée : 5", output)
+
+    def test_purge_can_be_resumed(self):
+        """Une purge arrêtée indique où reprendre et peut être relancée"""
+        output = self._purge(batch_size=2, max_batches=1)
+
+        self.assertEqual(OutstandingToken.objects.count(), 4)
+        self.assertIn(f"--start-after {self.expired[1].id}", output)
+        self._purge(batch_size=2, start_after=self.expired[1].id)
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+
+    def test_dry_run_deletes_nothing(self):
+        """--dry-run se contente de compter"""
+        self.assertIn("5 token(s)", self._purge(dry_run=True))
+        self.assertEqual(OutstandingToken.objects.count(), 6)
+
+
+class PasswordHashPoolTests(RuntimeStateTestCase):
+    """Tests du pool de processus de hachage des mots de passe"""
+
+    def setUp(self):
+        super().setUp()
+
+    def test_saturated_pool_rejects_immediately(self):
+        """Au-delà de workers + max_pending appels, HashingUnavailable est levée sans attendre"""
+        pool = PasswordHashPool(workers=1, max_pending=0, retry_after=3)
+        self.addCleanup(pool.shutdown)
+        busy = threading.Thread(target=pool.run, args=(time.sleep, 1))
+        busy.start()
+        while pool.stats()["in_flight"] == 0:
+            time.sleep(0.01)
+
+        with self.assertRaises(HashingUnavailable) as cm:
+            pool.run(time.sleep, 0)
+
+        self.assertEqual(cm.exception.wait, 3)
+        busy.join()
+        self.assertEqual(pool.run(abs, -2), 2)
+        self.assertEqual(pool.stats()["rejected"], 1)
+
+    def test_login_returns_503_with_retry_after_when_saturated(self):
+        """Une connexion refusée par le pool reçoit un 503 et un en-tête Retry-After"""
+        User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+
+        with mock.patch.object(password_pool, "run", side_effect=HashingUnavailable(2)):
+            response = self.client.post(
+                reverse("auth_login"),
+                data=json.dumps({"username": "user1", "password": "User1234!"}),
+                content_type="application/json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "2")
+
+    def test_login_rehashes_outdated_password(self):
+        """Un mot de passe haché avec un autre nombre d'itérations est recalculé à la connexion"""
+        user = User.objects.create_user(username="user1", email="user1@example.com")
+        user.password = PBKDF2PasswordHasher().encode("User1234!", "sel", iterations=1000)
+        user.save()
+
+        response = self.client.post(
+            reverse("auth_login"),
+            data=json.dumps({"username": "user1", "password": "User1234!"}),
+            content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertFalse(user.password.startswith("pbkdf2_sha256$1000$"))
+        self.assertTrue(user.check_password("User1234!"))
+
+    def test_recommended_iterations_scale_with_target(self):
+        """Le coût de PBKDF2 est linéaire : deux fois plus de temps visé, deux fois plus d'itérations"""
+        self.assertEqual(recommend_iterations(1000000, hash_ms=500, target_ms=250), 500000)
+        self.assertEqual(recommend_iterations(1000000, hash_ms=500, target_ms=1), 10000)
+
+    @override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+    def test_benchmark_command_reports_throughput(self):
+        """La commande benchmark affiche le débit mesuré"""
+        out = io.StringIO()
+        call_command("benchmark", "hashing", duration=0.01, workers=1, stdout=out)
+
+        self.assertIn("hachages/s", out.getvalue())
+        self.assertIn("non applicable", out.getvalue())
+
+
+THROTTLING_TEST_SETTINGS = {
+    "ENABLED": True,
+    "BACKEND": "accounts.authentication.throttling.LocalBucketStore",
+    "OPTIONS": {},
+    "RATES": {
+        "login": {"ip": "5/min", "user": "2/min"},
+        "weather": {"ip": "3/min"},
+    },
+}
+
+
+@override_settings(THROTTLING=THROTTLING_TEST_SETTINGS)
+class ThrottlingTests(RuntimeStateTestCase):
+    """Tests de la limitation de débit par seau à jetons"""
+
+    def setUp(self):
+        super().setUp()
+
+    def _login(self, username, ip="10.0.0.1", **extra):
+        return self.client.post(
+            reverse("auth_login"),
+            data=json.dumps({"username": username, "password": "mauvais"}),
+            content_type="application/json",
+            REMOTE_ADDR=ip,
+            **extra
+        )
+
+    def test_parse_rate(self):
+        """Le débit "N/période" donne la capacité et la période en secondes"""
+        self.assertEqual(parse_rate("5/min"), (5, 60))
+        self.assertEqual(parse_rate("10/hour"), (10, 3600))
+        self.assertEqual(parse_rate("1/s"), (1, 1))
+
+    def test_bucket_refills_over_time(self):
+        """Un seau vide se remplit au débit configuré ; un refus ne consomme pas de jeton"""
+        clock = FakeClock()
+        store = LocalBucketStore(clock=clock)
+
+        self.assertEqual([store.consume("k", 2, 1 / 30) for _ in range(2)], [0, 0])
+        self.assertAlmostEqual(store.consume("k", 2, 1 / 30), 30)
+        clock.now += 10
+        self.assertAlmostEqual(store.consume("k", 2, 1 / 30), 20)
+        clock.now += 20
+        self.assertEqual(store.consume("k", 2, 1 / 30), 0)
+
+    def test_buckets_are_consumed_together(self):
+        """Si un seau refuse, aucun jeton n'est retiré des autres"""
+        store = LocalBucketStore(clock=FakeClock())
+        store.consume("plein", 1, 1 / 60)
+
+        waits = store.consume_all([("libre", 1, 1 / 60, 1), ("plein", 1, 1 / 60, 1)])
+
+        self.assertEqual(waits[0], 0)
+        self.assertAlmostEqual(waits[1], 60)
+        self.assertEqual(store.consume("libre", 1, 1 / 60), 0)
+
+    def test_spoofed_forwarded_for_shares_the_bucket(self):
+        """Sans proxy de confiance, un X-Forwarded-For forgé n'ouvre pas de nouveau seau"""
+        statuses = [
+            self._login(f"user{i}", HTTP_X_FORWARDED_FOR=f"192.0.2.{i}").status_code for i in range(6)
+        ]
+
+        self.assertEqual(statuses, [status.HTTP_401_UNAUTHORIZED] * 5 + [status.HTTP_429_TOO_MANY_REQUESTS])
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1})
+    def test_forwarded_for_behind_trusted_proxy(self):
+        """Derrière un proxy de confiance, l'adresse est celle qu'il a ajoutée à X-Forwarded-For"""
+        for i in range(5):
+            self._login(f"user{i}", HTTP_X_FORWARDED_FOR="192.0.2.1")
+
+        self.assertEqual(
+            self._login("user5", HTTP_X_FORWARDED_FOR="192.0.2.1").status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertEqual(
+            self._login("user5", HTTP_X_FORWARDED_FOR="192.0.2.2").status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_denied_login_spends_no_token_in_other_bucket(self):
+        """Un essai refusé par le seau du compte n'entame pas celui de l'adresse, et inversement"""
+        self.assertEqual([self._login("cible").status_code for _ in range(2)], [status.HTTP_401_UNAUTHORIZED] * 2)
+        for _ in range(3):
+            self.assertEqual(self._login("cible").status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # L'adresse a encore ses 3 jetons
+        statuses = [self._login(f"user{i}").status_code for i in range(4)]
+        self.assertEqual(statuses, [status.HTTP_401_UNAUTHORIZED] * 3 + [status.HTTP_429_TOO_MANY_REQUESTS])
+
+        # Adresse épuisée : les essais refusés n'entament pas le seau du compte
+        for _ in range(2):
+            self.assertEqual(self._login("autre").status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(
+            [self._login("autre", ip="10.0.0.2").status_code for _ in range(2)], [status.HTTP_401_UNAUTHORIZED] * 2
+        )
+
+    def test_login_is_limited_per_username(self):
+        """Les essais d'une adresse sur un même compte sont limités, avant la limite de l'adresse"""
+        statuses = [self._login("cible").status_code for _ in range(3)]
+
+        self.assertEqual(statuses[:2], [status.HTTP_401_UNAUTHORIZED] * 2)
+        self.assertEqual(statuses[2], status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self._login("autre").status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_failures_elsewhere_do_not_lock_the_owner_out(self):
+        """Les échecs d'un client sur un compte n'empêchent pas son propriétaire de se connecter d'ailleurs"""
+        User.objects.create_user(username="cible", email="cible@example.com", password="Cible1234!")
+        for _ in range(3):
+            self._login("cible", ip="203.0.113.1")
+        self.assertEqual(self._login("cible", ip="203.0.113.1").status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        response = self.client.post(
+            reverse("auth_login"),
+            data=json.dumps({"username": "cible", "password": "Cible1234!"}),
+            content_type="application/json",
+            REMOTE_ADDR="10.0.0.2"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_login_is_limited_per_ip(self):
+        """Une même adresse ne peut pas essayer un grand nombre de comptes"""
+        for i in range(5):
+            self._login(f"user{i}")
+
+        response = self._login("user5")
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # 12 s pour un jeton à 5/min, moins le temps écoulé depuis le premier essai
+        self.assertIn(int(response["Retry-After"]), range(1, 13))
+        self.assertEqual(self._login("user5", ip="10.0.0.2").status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @mock.patch.object(weather_client.session, "get")
+    def test_weather_batch_counts_each_city(self, mock_get):
+        """Un lot de villes consomme un jeton par ville"""
+        mock_get.return_value = mock.Mock(status_code=200, json=lambda: {"name": "Paris"})
+
+        response = self.client.post(
+            reverse("weather_batch"), data=json.dumps({"cities": ["Paris", "Lyon"]}), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get(reverse("weather", args=["Paris"])).status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.client.get(reverse("weather", args=["Paris"])).status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+    async def test_async_weather_is_limited(self):
+        """La vue asynchrone applique la même limite par adresse"""
+        weather_cache.set("paris", {"name": "Paris"})
+        client = AsyncClient()
+        statuses = [(await client.get(reverse("weather_async", args=["Paris"]))).status_code for _ in range(4)]
+
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+
+class PasswordValidationTests(RuntimeStateTestCase):
+    """Tests du validateur de mot de passe en un passage et de la liste préchargée"""
+
+    def test_all_violations_are_reported_at_once(self):
+        """Toutes les règles non respectées sont signalées, pas seulement la première"""
+        with self.assertRaises(ValidationError) as cm:
+            CustomPasswordValidator().validate("abc")
+
+        self.assertEqual(
+            [e.code for e in cm.exception.error_list],
+            ["password_no_upper", "password_no_digit", "password_no_special"]
+        )
+        CustomPasswordValidator().validate("Abcdef1!")
+
+    def test_common_password_list_is_shared(self):
+        """La liste des mots de passe courants est chargée une fois et partagée"""
+        first, second = PreloadedCommonPasswordValidator(), PreloadedCommonPasswordValidator()
+
+        self.assertIs(first.passwords, second.passwords)
+        self.assertIsInstance(first.passwords, frozenset)
+        with self.assertRaises(ValidationError):
+            first.validate("Password")
+
+    def test_register_returns_every_error(self):
+        """L'inscription renvoie toutes les erreurs du mot de passe en une réponse"""
+        response = self.client.post(reverse("auth_register"), data=json.dumps({
+            "username": "nouveau", "email": "nouveau@example.com", "password": "abcdefgh", "password2": "abcdefgh"
+        }), content_type="application/json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.json()["password"]), 4)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+@mock.patch.object(password_pool, "workers", 0)  # hachage rapide, dans le processus de test
+class UserImportTests(RuntimeStateTestCase):
+    """Tests de l'import groupé d'utilisateurs"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="Admin1234!"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.admin_user).access_token}"}
+
+    def _ndjson(self, rows):
+        return "".join(row if isinstance(row, str) else json.dumps(row) + "\n" for row in rows)
+
+    def _import(self, body, content_type="application/x-ndjson", **extra):
+        return self.client.post(
+            reverse("auth_users_import"), data=body, content_type=content_type, **self.auth, **extra
+        )
+
+    def test_ndjson_import_reports_errors_per_line(self):
+        """Les lignes valides sont créées, chaque ligne invalide est signalée sans bloquer les autres"""
+        body = self._ndjson([
+            {"username": "alice", "email": "alice@example.com", "password": "Alice1234!"},
+            {"username": "admin", "email": "autre@example.com", "password": "Admin1234!"},
+            "pas du json\n",
+            {"username": "bob", "email": "invalide", "password": "Bob12345!"},
+            {"username": "carol", "email": "carol@example.com", "password": "faible"},
+            {"username": "alice", "email": "alice2@example.com", "password": "Alice1234!"},
+            {"username": "dave", "email": "dave@example.com", "password": "Dave1234!"},
+        ])
+
+        response = self._import(body)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report = response.json()
+        self.assertEqual(report["created"], 2)
+        self.assertEqual([e["line"] for e in report["errors"]], [2, 3, 4, 5, 6])
+        self.assertEqual(report["errors"][1]["errors"], {"non_field_errors": ["JSON invalide."]})
+        self.assertIn("email", report["errors"][2]["errors"])
+        self.assertTrue(User.objects.get(username="dave").check_password("Dave1234!"))
+
+    def test_csv_import_from_content_type(self):
+        """Un corps text/csv est lu comme un CSV avec en-tête"""
+        body = "username,email,password\r\nalice,alice@example.com,Alice1234!\r\nbob,bob@example.com,Bob12345!\r\n"
+
+        response = self._import(body, content_type="text/csv")
+
+        self.assertEqual(response.json()["created"], 2)
+        self.assertTrue(User.objects.filter(username="bob").exists())
+
+    def test_csv_without_required_columns_is_rejected(self):
+        """Un CSV sans les colonnes attendues est refusé en entier"""
+        response = self._import("username,email\r\nalice,alice@example.com\r\n", content_type="text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_uniqueness_checks_are_batched(self):
+        """Le nombre de requêtes ne dépend pas du nombre de lignes d'un lot"""
+        def rows(prefix, count):
+            return [
+                (i, {"username": f"{prefix}{i}", "email": f"{prefix}{i}@example.com", "password": "Passe1234!"}, None)
+                for i in range(count)
+            ]
+
+        with CaptureQueriesContext(connection) as few:
+            import_users(rows("a", 2))
+        with CaptureQueriesContext(connection) as many:
+            import_users(rows("b", 50))
+
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(User.objects.count(), 53)
+
+    def test_import_requires_admin(self):
+        """Seul un administrateur peut importer des utilisateurs"""
+        user = User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+        response = self.client.post(
+            reverse("auth_users_import"), data="", content_type="application/x-ndjson",
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_command(self):
+        """La commande import_users lit un fichier et affiche un résumé"""
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8") as f:
+            f.write("username,email,password\nalice,alice@example.com,Alice1234!\nadmin,x@example.com,Admin1234!\n")
+        self.addCleanup(os.remove, f.name)
+        out, err = io.StringIO(), io.StringIO()
+
+        call_command("import_users", f.name, stdout=out, stderr=err)
+
+        self.assertIn("1 utilisateur(s) créé(s), 1 ligne(s) en erreur.", out.getvalue())
+        self.assertIn("Ligne 3 : username", err.getvalue())
+
+
+class PasswordHashPoolMapTests(RuntimeStateTestCase):
+    """Tests du hachage de masse sur le pool"""
+
+    def test_map_keeps_order(self):
+        """Les résultats suivent l'ordre des entrées, quel que soit l'ordre de fin des calculs"""
+        pool = PasswordHashPool(workers=2)
+        self.addCleanup(pool.shutdown)
+
+        self.assertEqual(pool.map(abs, [-3, 1, -2, 5, -8]), [3, 1, 2, 5, 8])
+
+
+class DatabaseProfileTests(RuntimeStateTestCase):
+    """Tests du profil de base de données construit depuis l'environnement"""
+
+    def test_sqlite_profile_is_tuned_for_concurrency(self):
+        """Par défaut : SQLite en WAL, BEGIN IMMEDIATE et connexions persistantes"""
+        config = database_from_env({}, "db.sqlite3")
+
+        self.assertEqual(config["ENGINE"], "django.db.backends.sqlite3")
+        self.assertIn("PRAGMA journal_mode=WAL", config["OPTIONS"]["init_command"])
+        self.assertIn("PRAGMA synchronous=NORMAL", config["OPTIONS"]["init_command"])
+        self.assertEqual(config["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+        self.assertEqual(config["CONN_MAX_AGE"], 60)
+
+    def test_pragmas_are_applied_to_connections(self):
+        """Les PRAGMA sont exécutés à l'ouverture de chaque connexion"""
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    def test_server_database_from_environment(self):
+        """DB_ENGINE=postgresql bascule vers un serveur, avec vérification des connexions"""
+        config = database_from_env({
+            "DB_ENGINE": "postgresql", "DATABASE_NAME": "fil_rouge", "DB_USER": "api",
+            "DB_HOST": "db.internal", "DB_PORT": "5432",
+        }, "db.sqlite3")
+
+        self.assertEqual(config["ENGINE"], "django.db.backends.postgresql")
+        self.assertEqual((config["NAME"], config["USER"], config["HOST"]), ("fil_rouge", "api", "db.internal"))
+        self.assertTrue(config["CONN_HEALTH_CHECKS"])
+
+    def test_unknown_engine_is_rejected(self):
+        """Un moteur inconnu est signalé au démarrage"""
+        with self.assertRaises(ValueError):
+            database_from_env({"DB_ENGINE": "oracle"}, "db.sqlite3")
+
+    def test_replicas_from_environment(self):
+        """DB_REPLICAS décrit des fichiers SQLite ou des hôtes, miroirs de la base principale en test"""
+        sqlite = replicas_from_env({"DB_REPLICAS": "a.sqlite3, b.sqlite3"}, database_from_env({}, "db.sqlite3"))
+        server = replicas_from_env(
+            {"DB_REPLICAS": "replica.internal:5433"},
+            database_from_env({"DB_ENGINE": "postgresql", "DB_PORT": "5432"}, "db.sqlite3"),
+        )
+
+        self.assertEqual([config["NAME"] for config in sqlite.values()], ["a.sqlite3", "b.sqlite3"])
+        self.assertEqual(sqlite["replica1"]["TEST"], {"MIRROR": "default"})
+        self.assertNotIn("transaction_mode", sqlite["replica1"]["OPTIONS"])
+        self.assertEqual((server["replica1"]["HOST"], server["replica1"]["PORT"]), ("replica.internal", "5433"))
+        self.assertEqual(replicas_from_env({}, database_from_env({}, "db.sqlite3")), {})
+
+    def test_router_round_robin(self):
+        """Les réplicas sont choisis à tour de rôle, seulement dans un contexte de lecture"""
+        router = ReplicaRouter(["replica1", "replica2"])
+
+        self.assertIsNone(router.db_for_read(User))
+        with replica_reads():
+            # Transaction ouverte par le TestCase : lecture sur la base principale
+            self.assertIsNone(router.db_for_read(User))
+            with mock.patch.object(connection, "in_atomic_block", False):
+                self.assertEqual([router.db_for_read(User) for _ in range(3)], ["replica1", "replica2", "replica1"])
+        self.assertEqual(router.db_for_write(User), "default")
+        self.assertFalse(router.allow_migrate("replica1", "auth"))
+        self.assertIsNone(router.allow_migrate("default", "auth"))
+
+
+# Cache partagé entre processus, comme en production (Redis…)
+SHARED_CACHES = {**settings.CACHES, "shared": {
+    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+    "LOCATION": os.path.join(tempfile.gettempdir(), "api_fil_rouge_test_cache"),
+}}
+
+
+@override_settings(
+    CACHES=SHARED_CACHES,
+    REPLICA_READS={**settings.REPLICA_READS, "ALIASES": ["replica1", "replica2"], "CACHE_ALIAS": "shared"},
+)
+class ReplicaRoutingTests(RuntimeStateTestCase):
+    """Tests des lectures sur réplicas et de la lecture de ses propres écritures"""
+
+    def setUp(self):
+        super().setUp()
+        caches["shared"].clear()
+        self.user = User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="Admin1234!"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+        self.admin_auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.admin_user).access_token}"}
+        # Les réplicas n'existent pas pendant les tests : on note seulement où iraient les lectures
+        self.routed = []
+        patcher = mock.patch.object(
+            ReplicaRouter, "db_for_read", autospec=True,
+            side_effect=lambda router, model, **hints: self.routed.append(replica_reads_enabled())
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_read_only_view_reads_on_replicas(self):
+        """/me/ lit l'utilisateur sur un réplica"""
+        response = self.client.get(reverse("auth_me"), **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.routed)
+        self.assertTrue(all(self.routed))
+
+    def test_export_stream_reads_on_replicas(self):
+        """Les requêtes exécutées pendant le flux de l'export vont aussi sur les réplicas"""
+        response = self.client.get(reverse("auth_users_export"), **self.admin_auth)
+        self.routed.clear()
+        b"".join(response.streaming_content)
+
+        self.assertTrue(self.routed)
+        self.assertTrue(all(self.routed))
+
+    async def test_async_export_stream_reads_on_replicas(self):
+        """Sous ASGI, les lots de l'export lus dans des threads vont aussi sur les réplicas"""
+        response = await AsyncClient().get(
+            reverse("auth_users_export"), headers={"Authorization": self.admin_auth["HTTP_AUTHORIZATION"]}
+        )
+        self.routed.clear()
+        [chunk async for chunk in response.streaming_content]
+
+        self.assertTrue(self.routed)
+        self.assertTrue(all(self.routed))
+
+    def test_writes_stay_on_primary(self):
+        """Une vue sans read_replica (connexion) lit sur la base principale"""
+        self.client.post(
+            reverse("auth_login"),
+            data=json.dumps({"username": "user1", "password": "User1234!"}),
+            content_type="application/json"
+        )
+
+        self.assertTrue(self.routed)
+        self.assertFalse(any(self.routed))
+
+    def test_reads_after_own_write_use_primary(self):
+        """Après une écriture, les lectures de l'utilisateur restent sur la base principale"""
+        self.client.patch(
+            reverse("users:user_detail"), data=json.dumps({"email": "nouveau@example.com"}),
+            content_type="application/json", **self.auth
+        )
+        user_cache.clear()
+        self.routed.clear()
+        response = self.client.get(reverse("auth_me"), **self.auth)
+
+        self.assertEqual(response.json()["email"], "nouveau@example.com")
+        self.assertTrue(self.routed)
+        self.assertFalse(any(self.routed))
+
+    def test_pin_is_seen_by_other_workers(self):
+        """Le maintien posé par le processus qui a traité l'écriture s'applique dans les autres"""
+        # Deux instances du cache, comme dans deux processus
+        worker1, worker2 = (FileBasedCache(SHARED_CACHES["shared"]["LOCATION"], {}) for _ in range(2))
+        with mock.patch("api_fil_rouge.routers._pin_cache", return_value=worker1):
+            self.client.patch(
+                reverse("users:user_detail"), data=json.dumps({"email": "nouveau@example.com"}),
+                content_type="application/json", **self.auth
+            )
+        user_cache.clear()
+        self.routed.clear()
+        with mock.patch("api_fil_rouge.routers._pin_cache", return_value=worker2):
+            self.client.get(reverse("auth_me"), **self.auth)
+
+        self.assertTrue(self.routed)
+        self.assertFalse(any(self.routed))
+
+    @override_settings(REPLICA_READS={**settings.REPLICA_READS, "ALIASES": ["replica1"], "CACHE_ALIAS": "default"})
+    def test_process_local_pins_disable_replicas(self):
+        """Maintien dans un cache propre au processus : erreur au démarrage et aucune lecture sur les réplicas"""
+        self.client.get(reverse("auth_me"), **self.auth)
+
+        self.assertTrue(self.routed)
+        self.assertFalse(any(self.routed))
+        self.assertEqual([error.id for error in check_shared_pins(None)], ["routers.E001"])
+
+    def test_other_users_still_read_on_replicas(self):
+        """Le maintien sur la base principale ne concerne que l'utilisateur qui a écrit"""
+        pin_to_primary(self.admin_user.id)
+        self.client.get(reverse("auth_me"), **self.auth)
+
+        self.assertTrue(all(self.routed))
+
+    async def test_async_chain_reads_on_replicas(self):
+        """Sous ASGI, le middleware reste asynchrone et les lectures vont sur les réplicas"""
+        async def get_response(request):
+            return None
+
+        self.assertTrue(iscoroutinefunction(ReplicaRoutingMiddleware(get_response)))
+        response = await AsyncClient().get(
+            reverse("auth_me"), headers={"Authorization": self.auth["HTTP_AUTHORIZATION"]}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.routed)
+        self.assertTrue(all(self.routed))
+        self.assertFalse(replica_reads_enabled())
+
+
+class EndpointBenchmarkTests(RuntimeStateTestCase):
+    """Tests du banc de mesure des endpoints (suite endpoints)"""
+
+    def test_percentiles_use_nearest_rank(self):
+        """p50/p95/p99 sont pris par rang le plus proche sur les latences triées"""
+        result = summarize([i / 1000 for i in range(100, 0, -1)], [1, 3], errors=0, elapsed=2.0)
+
+        self.assertEqual((result["p50_ms"], result["p95_ms"], result["p99_ms"]), (50.0, 95.0, 99.0))
+        self.assertEqual(result["throughput"], 50.0)
+        self.assertEqual(result["queries"], 2.0)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_regressions_past_tolerance_are_reported(self):
+        """Latence, débit et requêtes SQL sont comparés à la référence"""
+        baseline = {
+            "me": {"p95_ms": 10.0, "throughput": 500.0, "queries": 1.0},
+            "users": {"p95_ms": 20.0, "throughput": 200.0, "queries": 1.0},
+        }
+        results = {
+            "me": {"p95_ms": 12.0, "throughput": 450.0, "queries": 1.2},
+            "users": {"p95_ms": 30.0, "throughput": 100.0, "queries": 3.0},
+            "weather": {"p95_ms": 999.0, "throughput": 1.0, "queries": 0.0},
+        }
+
+        regressions = compare_to_baseline(results, baseline, tolerance=0.25)
+
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(all(regression.startswith("users") for regression in regressions))
+
+    def test_upstream_stand_in_answers_like_openweathermap(self):
+        """Le faux OpenWeatherMap local répond en JSON"""
+        with UpstreamStandIn(delay=0) as upstream:
+            response = requests.get(upstream.url, params={"q": "paris"}, timeout=5)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("main", response.json())
+
+
+@override_settings(METRICS={**settings.METRICS, "TOKEN": "secret"})
+class MetricsTests(RuntimeStateTestCase):
+    """Tests des métriques des requêtes et de /metrics"""
+
+    metrics_auth = {"HTTP_AUTHORIZATION": "Bearer secret"}
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Chaque borne compte les observations inférieures ou égales, +Inf compte tout"""
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        self.assertEqual(list(histogram.cumulative()), [(0.1, 2), (1.0, 3), ("+Inf", 4)])
+
+    def test_server_timing_header(self):
+        """Chaque réponse indique sa durée et celle des requêtes SQL"""
+        response = self.client.get(reverse("auth_me"), **self.auth)
+
+        self.assertRegex(response["Server-Timing"], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="2 SQL"$')
+
+    def test_metrics_endpoint_exposes_aggregates(self):
+        """/metrics expose l'histogramme par vue, les requêtes SQL et les caches"""
+        self.client.get(reverse("auth_me"), **self.auth)
+        self.client.get(reverse("auth_me"), **self.auth)
+
+        response = self.client.get(reverse("metrics"), **self.metrics_auth)
+        body = response.content.decode()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn('http_request_duration_seconds_count{view="auth_me",method="GET",status="2xx"} 2', body)
+        self.assertIn('db_queries_total{view="auth_me"} 2', body)
+        self.assertIn('cache_hits_total{cache="auth_users"} 1', body)
+
+    @mock.patch.object(weather_client.session, "get")
+    def test_upstream_calls_are_timed(self, upstream_get):
+        """Les appels à OpenWeatherMap sont mesurés et signalés dans Server-Timing"""
+        upstream_get.return_value = mock.Mock(status_code=200, json=mock.Mock(return_value={"name": "Paris"}))
+
+        response = self.client.get(reverse("weather", args=["Paris"]))
+        body = self.client.get(reverse("metrics"), **self.metrics_auth).content.decode()
+
+        self.assertIn('upstream;dur=', response["Server-Timing"])
+        self.assertIn('upstream_request_duration_seconds_count{upstream="openweathermap"} 1', body)
+
+    async def test_async_requests_are_measured(self):
+        """Sous ASGI, le middleware reste asynchrone et compte le SQL exécuté dans les threads"""
+        async def get_response(request):
+            return None
+
+        self.assertTrue(iscoroutinefunction(MetricsMiddleware(get_response)))
+        response = await AsyncClient().get(reverse("auth_me"), headers={"Authorization": self.auth["HTTP_AUTHORIZATION"]})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('desc="2 SQL"', response["Server-Timing"])
+
+    def test_metrics_token(self):
+        """/metrics exige le jeton : les requêtes anonymes ou avec un autre jeton sont refusées"""
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(
+            self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer autre").status_code,
+            status.HTTP_401_UNAUTHORIZED
+        )
+        self.assertEqual(self.client.get(reverse("metrics"), **self.metrics_auth).status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS={**settings.METRICS, "TOKEN": ""})
+    def test_metrics_closed_without_token(self):
+        """Sans METRICS["TOKEN"], /metrics est fermé à tous"""
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(
+            self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer ").status_code, status.HTTP_403_FORBIDDEN
+        )
+
+
+@override_settings(QUERY_BUDGET={**settings.QUERY_BUDGET, "ENABLED": True, "RAISE": True})
+class QueryBudgetTests(RuntimeStateTestCase):
+    """Tests des budgets de requêtes SQL : chaque route de l'API d'authentification respecte le sien"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="Admin1234!"
+        )
+        self.target = User.objects.create_user(username="cible", email="cible@example.com")
+        self.refresh = VersionedRefreshToken.for_user(self.user)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {self.refresh.access_token}"}
+        self.admin_auth = {
+            "HTTP_AUTHORIZATION": f"Bearer {VersionedRefreshToken.for_user(self.admin_user).access_token}"
+        }
+        # Caches froids : la préparation ci-dessus ne doit pas les remplir
+        reset_runtime_state()
+
+    def _post(self, name, data, args=(), **extra):
+        return self.client.post(reverse(name, args=args), data=json.dumps(data),
+                                content_type="application/json", **extra)
+
+    def _request(self, name):
+        """Requête représentative de chaque route (caches froids)."""
+        if name == "auth_register":
+            return self._post(name, {"username": "nouveau", "email": "nouveau@example.com",
+                                     "password": "Nouveau1234!", "password2": "Nouveau1234!"})
+        if name == "auth_login":
+            return self._post(name, {"username": "user1", "password": "User1234!"})
+        if name == "auth_logout":
+            return self._post(name, {"refresh": str(self.refresh)}, **self.auth)
+        if name == "auth_logout_all":
+            return self._post(name, {}, **self.auth)
+        if name == "token_refresh":
+            return self._post(name, {"refresh": str(self.refresh)})
+        if name == "auth_change_password":
+            return self._post(name, {"old_password": "User1234!", "new_password": "Nouveau1234!"}, **self.auth)
+        if name in ("auth_me", "auth_me_async"):
+            return self.client.get(reverse(name), **self.auth)
+        if name in ("auth_users", "auth_users_export", "weather_stats"):
+            return self.client.get(reverse(name), **self.admin_auth)
+        if name == "auth_users_import":
+            body = json.dumps({"username": "importe", "email": "importe@example.com", "password": "Import1234!"})
+            return self.client.post(reverse(name), data=body, content_type="application/x-ndjson", **self.admin_auth)
+        if name == "ban_user":
+            return self._post(name, {}, args=[self.target.id], **self.admin_auth)
+        if name == "ban_users":
+            return self._post(name, {"ids": [self.target.id, self.user.id]}, **self.admin_auth)
+        if name == "weather_batch":
+            return self._post(name, {"cities": ["Paris", "Lyon"]})
+        if name in ("weather", "weather_async"):
+            return self.client.get(reverse(name, args=["Paris"]))
+        raise AssertionError(f"Aucune requête de test pour la route {name}")
+
+    def test_every_route_declares_a_budget(self):
+        """Chaque vue de accounts/authentication/urls.py déclare query_budget"""
+        self.assertRoutesDeclareBudget(auth_urlpatterns)
+
+    @mock.patch.object(async_weather_client, "get")
+    @mock.patch.object(weather_client.session, "get")
+    def test_every_route_stays_within_budget(self, upstream_get, async_upstream_get):
+        """Chaque route, caches froids, reste dans son budget et sans requête répétée"""
+        upstream_get.return_value = mock.Mock(status_code=200, json=mock.Mock(return_value={"name": "Paris"}))
+        async_upstream_get.return_value = upstream_get.return_value
+        self.assertRoutesWithinBudget(auth_urlpatterns, lambda name: [lambda: self._request(name)])
+
+    def test_over_budget_endpoint_fails(self):
+        """Une vue qui dépasse son budget fait échouer la requête de test"""
+        with mock.patch.object(MeView, "query_budget", 1):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse("auth_me"), **self.auth)
+
+    def test_login_rehash_stays_within_budget(self):
+        """La connexion qui recalcule un hachage obsolète (save()) reste dans le budget"""
+        self.user.password = PBKDF2PasswordHasher().encode("User1234!", "sel", iterations=1000)
+        self.user.save()
+        user_cache.clear()
+
+        response = self._request("auth_login")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Query-Count"], "4")
+
+    async def test_async_over_budget_endpoint_fails(self):
+        """Le middleware compte aussi les requêtes SQL de la chaîne asynchrone"""
+        with mock.patch.object(MeView, "query_budget", 1):
+            with self.assertRaises(QueryBudgetExceeded):
+                await AsyncClient().get(
+                    reverse("auth_me"), headers={"Authorization": self.auth["HTTP_AUTHORIZATION"]}
+                )
+
+    @override_settings(QUERY_BUDGET={**settings.QUERY_BUDGET, "ENABLED": None})
+    def test_follows_debug_by_default(self):
+        """Sans QUERY_BUDGET["ENABLED"], le middleware suit DEBUG (désactivé pendant les tests)"""
+        self.assertNotIn("X-Query-Count", self.client.get(reverse("auth_me"), **self.auth))
+        with override_settings(DEBUG=True):
+            self.assertIn("X-Query-Count", self.client.get(reverse("auth_me"), **self.auth))
+
+    def test_query_budget_context(self):
+        """query_budget signale le dépassement et les requêtes répétées (N+1)"""
+        with query_budget(3) as recorder:
+            list(User.objects.all())
+        self.assertEqual(len(recorder), 1)
+
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(1):
+                list(User.objects.all())
+                list(User.objects.filter(is_staff=True))
+
+        with self.assertRaisesRegex(QueryBudgetExceeded, "répétée 3 fois"):
+            with query_budget(10):
+                for user_id in (self.user.id, self.admin_user.id, self.target.id):
+                    User.objects.get(pk=user_id)
+
+    def test_decorated_test_function(self):
+        """query_budget s'utilise aussi comme décorateur"""
+        @query_budget(0)
+        def uses_the_database():
+            return User.objects.count()
+
+        with self.assertRaises(QueryBudgetExceeded):
+            uses_the_database()
+
+
+class SchemaTests(RuntimeStateTestCase):
+    """Tests du schéma OpenAPI généré une fois et servi avec un ETag"""
+
+    def setUp(self):
+        super().setUp()
+        schema.reset_schema_document()
+        self.addCleanup(schema.reset_schema_document)
+
+    def test_schema_is_generated_once(self):
+        """Les appels suivants sont servis depuis la mémoire, sans nouvelle introspection"""
+        with mock.patch.object(schema, "generate_schema", wraps=schema.generate_schema) as generate:
+            first = self.client.get("/swagger.json")
+            second = self.client.get("/swagger/?format=openapi")
+
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertIn("/auth/me/", first.json()["paths"])
+
+    def test_strong_etag_and_not_modified(self):
+        """L'ETag est fort et un client à jour reçoit 304 sans corps"""
+        response = self.client.get("/swagger.json")
+        etag = response["ETag"]
+
+        self.assertFalse(etag.startswith("W/"))
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        not_modified = self.client.get("/swagger.json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified.content, b"")
+
+    def test_yaml_has_its_own_etag(self):
+        """Le YAML est servi avec un ETag distinct de celui du JSON"""
+        json_response = self.client.get("/swagger.json")
+        yaml_response = self.client.get("/swagger.yaml")
+
+        self.assertEqual(yaml_response.status_code, status.HTTP_200_OK)
+        self.assertTrue(yaml_response["Content-Type"].startswith("application/yaml"))
+        self.assertNotEqual(yaml_response["ETag"], json_response["ETag"])
+
+    def test_prebuilt_file_is_used_while_code_is_unchanged(self):
+        """Le fichier de build_schema est servi tel quel, sauf si le code a changé depuis"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "openapi.json")
+            call_command("build_schema", output=path, stdout=io.StringIO())
+
+            with override_settings(OPENAPI_SCHEMA={**settings.OPENAPI_SCHEMA, "FILE": path}), \
+                    mock.patch.object(schema, "generate_schema", wraps=schema.generate_schema) as generate:
+                self.client.get("/swagger.json")
+                self.assertEqual(generate.call_count, 0)
+
+                schema.reset_schema_document()
+                with mock.patch.object(schema, "code_fingerprint", return_value="code-modifié"):
+                    self.client.get("/swagger.json")
+                self.assertEqual(generate.call_count, 1)
+
+
+@override_settings(
+    CACHES=SHARED_CACHES, CONDITIONAL_GET={**settings.CONDITIONAL_GET, "CACHE_ALIAS": "shared"}
+)
+class ConditionalGetTests(RuntimeStateTestCase):
+    """Tests des requêtes conditionnelles (ETag / Last-Modified, 304)"""
+
+    def setUp(self):
+        super().setUp()
+        caches["shared"].clear()
+        self.user = User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+        self.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password="Admin1234!")
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+        self.admin_auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.admin).access_token}"}
+
+    def test_me_not_modified(self):
+        """/me/ renvoie 304 sans corps tant que le profil ne change pas"""
+        first = self.client.get(reverse("auth_me"), **self.auth)
+        second = self.client.get(reverse("auth_me"), HTTP_IF_NONE_MATCH=first["ETag"], **self.auth)
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second.content, b"")
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertIn("no-cache", first["Cache-Control"])
+        self.assertIn("private", first["Cache-Control"])
+
+    def test_me_changes_after_profile_update(self):
+        """Une modification du profil change l'ETag"""
+        first = self.client.get(reverse("auth_me"), **self.auth)
+        self.user.email = "new@example.com"
+        self.user.save()
+
+        second = self.client.get(reverse("auth_me"), HTTP_IF_NONE_MATCH=first["ETag"], **self.auth)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.json()["email"], "new@example.com")
+        self.assertNotEqual(second["ETag"], first["ETag"])
+
+    def test_me_if_modified_since(self):
+        """If-Modified-Since seul suffit à obtenir un 304"""
+        first = self.client.get(reverse("auth_me"), **self.auth)
+        second = self.client.get(reverse("auth_me"), HTTP_IF_MODIFIED_SINCE=first["Last-Modified"], **self.auth)
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_user_list_changes_with_table(self):
+        """La liste est en 304 jusqu'à l'écriture suivante d'un utilisateur, y compris par update()"""
+        first = self.client.get(reverse("auth_users"), **self.admin_auth)
+        etag = first["ETag"]
+        self.assertEqual(
+            self.client.get(reverse("auth_users"), HTTP_IF_NONE_MATCH=etag, **self.admin_auth).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        self.client.post(reverse("ban_users"), data={"ids": [self.user.pk]},
+                         content_type="application/json", **self.admin_auth)
+        second = self.client.get(reverse("auth_users"), HTTP_IF_NONE_MATCH=etag, **self.admin_auth)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(second["ETag"], etag)
+
+    def test_user_list_changes_after_import(self):
+        """Un import (bulk_create) change l'ETag de la liste"""
+        etag = self.client.get(reverse("auth_users"), **self.admin_auth)["ETag"]
+        import_users([(1, {"username": "imported", "email": "imported@example.com", "password": "Import1234!"}, None)])
+
+        response = self.client.get(reverse("auth_users"), HTTP_IF_NONE_MATCH=etag, **self.admin_auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @mock.patch.object(weather_client.session, "get")
+    def test_weather_uses_observation_time(self, upstream_get):
+        """La météo est validée par l'heure d'observation d'OpenWeatherMap"""
+        upstream_get.return_value = mock.Mock(
+            status_code=200, json=mock.Mock(return_value={"name": "Paris", "dt": 1700000000})
+        )
+        first = self.client.get(reverse("weather", args=["Paris"]))
+        second = self.client.get(reverse("weather", args=["Paris"]), HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertTrue(first["ETag"].startswith('W/"6553f100-'))
+        self.assertEqual(first["Last-Modified"], "Tue, 14 Nov 2023 22:13:20 GMT")
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_user_list_etag_depends_on_rendering(self):
+        """Le JSON et l'API navigable de la liste ont chacun leur ETag"""
+        as_json = self.client.get(reverse("auth_users"), **self.admin_auth)
+        browsable = self.client.get(reverse("auth_users"), HTTP_ACCEPT="text/html", **self.admin_auth)
+
+        self.assertEqual(browsable["Content-Type"], "text/html; charset=utf-8")
+        self.assertNotEqual(browsable["ETag"], as_json["ETag"])
+        self.assertEqual(
+            self.client.get(reverse("auth_users"), HTTP_ACCEPT="text/html", HTTP_IF_NONE_MATCH=as_json["ETag"],
+                            **self.admin_auth).status_code,
+            status.HTTP_200_OK,
+        )
+
+    @override_settings(CONDITIONAL_GET={**settings.CONDITIONAL_GET, "CACHE_ALIAS": "default"})
+    def test_user_list_without_shared_versions(self):
+        """Versions dans un cache propre au processus : la liste n'a pas de validateurs, le profil garde les siens"""
+        self.assertNotIn("ETag", self.client.get(reverse("auth_users"), **self.admin_auth))
+        self.assertIn("ETag", self.client.get(reverse("auth_me"), **self.auth))
+
+        out = io.StringIO()
+        call_command("check", "--deploy", stdout=out, stderr=out)
+        self.assertIn("authentication.W001", out.getvalue())
+
+    @override_settings(CONDITIONAL_GET={**settings.CONDITIONAL_GET, "ENABLED": False})
+    def test_disabled(self):
+        """Désactivé, aucune réponse ne porte de validateur"""
+        response = self.client.get(reverse("auth_me"), **self.auth)
+
+        self.assertNotIn("ETag", response)
+
+
+class APIMiddlewareProfileTests(RuntimeStateTestCase):
+    """Tests du profil de middlewares API (api_fil_rouge/middleware.py)"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def test_api_routes_skip_session_stack(self):
+        """Les routes /api/ ne passent ni par la session ni par l'authentification Django"""
+        response = self.client.get(reverse("auth_me"), **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(hasattr(response.wsgi_request, "session"))
+        self.assertFalse(hasattr(response.wsgi_request, "_messages"))
+
+    def test_admin_keeps_session_stack(self):
+        """/admin/ garde la session, le CSRF et l'authentification par session"""
+        self.client.force_login(User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="Admin1234!"
+        ))
+        response = self.client.get("/admin/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.wsgi_request.user.is_superuser)
+        self.assertIn("csrftoken", response.cookies)
+
+    def test_admin_post_requires_csrf_token(self):
+        """La protection CSRF s'applique toujours hors du profil API"""
+        client = Client(enforce_csrf_checks=True)
+
+        response = client.post("/admin/login/", {"username": "user1", "password": "User1234!"})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(API_MIDDLEWARE_PROFILE={**settings.API_MIDDLEWARE_PROFILE, "ENABLED": False})
+    def test_profile_disabled(self):
+        """Profil désactivé, les routes /api/ reprennent la chaîne complète"""
+        response = self.client.get(reverse("auth_me"), **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(hasattr(response.wsgi_request, "session"))
+
+
+class FastJSONTests(RuntimeStateTestCase):
+    """Tests des serializers compilés (fastjson.py) : mêmes octets que DRF"""
+
+    TRICKY = ['simple', 'é à ü 日本', 'guillemet " et \\ barre', 'ligne\nretour\ttab\x01', 'sép\u2028ara\u2029teurs', '😀']
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password="Admin1234!")
+        self.admin_auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.admin).access_token}"}
+
+    def test_compiled_output_matches_drf(self):
+        """Chaînes échappées, booléens et entiers : sortie identique à serializer + JSONRenderer"""
+        renderer = JSONRenderer()
+        for serializer_class in (UserListSerializer, UserSerializer, RegisterSerializer):
+            compiled = compile_serializer(serializer_class)
+            for i, text in enumerate(self.TRICKY):
+                user = User(id=i + 1, username=text, email=text, is_active=bool(i % 2))
+                with self.subTest(serializer=serializer_class.__name__, text=text):
+                    self.assertEqual(compiled.instance(user).encode(), renderer.render(serializer_class(user).data))
+
+    def test_compiled_rows_match_drf(self):
+        """Un tableau de tuples donne les mêmes octets que la liste de dictionnaires rendue par DRF"""
+        compiled = compile_serializer(UserListSerializer)
+        rows = [(i, text, f"{text}@example.com", i % 2 == 0) for i, text in enumerate(self.TRICKY)]
+        expected = JSONRenderer().render([dict(zip(compiled.names, row)) for row in rows])
+
+        self.assertEqual(compiled.rows(rows).encode(), expected)
+
+    def test_unsupported_field(self):
+        """Un champ sans encodeur direct est refusé à la compilation"""
+        class JoinedSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = User
+                fields = ["id", "date_joined"]
+
+        with self.assertRaises(TypeError):
+            compile_serializer(JoinedSerializer)
+
+    def test_user_list_bytes(self):
+        """La liste paginée est identique à celle de la pagination DRF"""
+        for i in range(3):
+            User.objects.create_user(username=f"user-é{i}", email=f"user{i}@example.com", password="!")
+        response = self.client.get(reverse("auth_users"), {"page_size": 2}, **self.admin_auth)
+        rows = list(User.objects.order_by("id").values("id", "username", "email", "is_active")[:2])
+        expected = JSONRenderer().render({"next": response.json()["next"], "previous": None, "results": rows})
+
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.content, expected)
+
+    def test_user_list_next_page(self):
+        """Le curseur de la page suivante est lu dans les tuples nommés"""
+        for i in range(3):
+            User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", password="!")
+        first = self.client.get(reverse("auth_users"), {"page_size": 2}, **self.admin_auth).json()
+        second = self.client.get(first["next"], **self.admin_auth).json()
+
+        self.assertEqual([row["username"] for row in second["results"]], ["user1", "user2"])
+        self.assertIsNotNone(second["previous"])
+
+    def test_register_bytes(self):
+        """L'inscription renvoie les mêmes octets que RegisterSerializer"""
+        response = self.client.post(reverse("auth_register"), data={
+            "username": "nouvel", "email": "nouvel@example.com", "password": "Str0ng!Passw0rd",
+            "password2": "Str0ng!Passw0rd",
+        }, content_type="application/json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.content, b'{"username":"nouvel","email":"nouvel@example.com"}')
+
+    def test_indented_json_keeps_drf_path(self):
+        """Un rendu JSON indenté passe par JSONRenderer"""
+        response = self.client.get(reverse("auth_users"), HTTP_ACCEPT="application/json; indent=2", **self.admin_auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'\n  "results"', response.content)
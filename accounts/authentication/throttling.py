@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+# Durées acceptées dans les débits "N/période" (première lettre, comme DRF)
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """``"5/min"`` -> ``(5, 60)`` : capacité du seau et période de remplissage en secondes."""
+    num, period = rate.split("/")
+    return int(num), PERIODS[period.strip()[0]]
+
+
+def _take_all(states, buckets, now):
+    """
+    Seaux à jetons : rend ``(nouveaux_états, attentes)`` pour les seaux
+    ``(clé, capacité, débit, coût)``. L'attente d'un seau est nulle s'il
+    accepte la requête, sinon c'est le délai avant qu'assez de jetons soient
+    revenus. Les jetons ne sont retirés que si tous les seaux acceptent : une
+    requête refusée ne consomme rien, dans aucun seau.
+    """
+    refilled, waits = [], []
+    for state, (_, capacity, refill_rate, cost) in zip(states, buckets):
+        tokens, updated_at = state if state is not None else (capacity, now)
+        tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+        refilled.append(tokens)
+        waits.append(0.0 if tokens >= cost else (cost - tokens) / refill_rate)
+    if any(waits):
+        return [(tokens, now) for tokens in refilled], waits
+    return [(tokens - cost, now) for tokens, (*_, cost) in zip(refilled, buckets)], waits
+
+
+class LocalBucketStore:
+    """
+    Seaux à jetons en mémoire, propres au processus (LRU borné).
+
+    Chaque processus applique sa propre limite : avec N workers, un client
+    peut obtenir jusqu'à N fois le débit configuré.
+    """
+
+    def __init__(self, max_entries=100000, clock=time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def consume(self, key, capacity, refill_rate, cost=1):
+        """Retire ``cost`` jetons du seau ``key`` ; rend l'attente en secondes (0 si accepté)."""
+        return self.consume_all([(key, capacity, refill_rate, cost)])[0]
+
+    def consume_all(self, buckets):
+        """Retire les jetons de tous les seaux ``(clé, capacité, débit, coût)``, ou d'aucun ; rend les attentes."""
+        with self._lock:
+            states, waits = _take_all([self._buckets.get(key) for key, *_ in buckets], buckets, self._clock())
+            for (key, *_), state in zip(buckets, states):
+                self._buckets[key] = state
+                self._buckets.move_to_end(key)
+            # Oublier un seau revient à le remplir : on sacrifie les plus anciens
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return waits
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Seaux à jetons dans un cache Django partagé (Redis, Memcached…), pour une
+    limite commune à tous les processus.
+
+    La lecture puis l'écriture ne sont pas atomiques : sous forte concurrence,
+    quelques requêtes de plus que la limite peuvent passer.
+    """
+
+    def __init__(self, alias="default", key_prefix="throttle", clock=time.time):
+        self.alias = alias
+        self.key_prefix = key_prefix
+        self._clock = clock
+
+    def consume(self, key, capacity, refill_rate, cost=1):
+        return self.consume_all([(key, capacity, refill_rate, cost)])[0]
+
+    def consume_all(self, buckets):
+        cache = caches[self.alias]
+        cache_keys = [f"{self.key_prefix}:{key}" for key, *_ in buckets]
+        found = cache.get_many(cache_keys)
+        states, waits = _take_all([found.get(cache_key) for cache_key in cache_keys], buckets, self._clock())
+        # Au-delà, les seaux seraient de nouveau pleins : inutile de les garder
+        timeout = max(int(capacity / refill_rate) + 1 for _, capacity, refill_rate, _ in buckets)
+        cache.set_many(dict(zip(cache_keys, states)), timeout=timeout)
+        return waits
+
+    def clear(self):
+        # Vide tout le cache : à réserver à un alias dédié à la limitation de débit
+        caches[self.alias].clear()
+
+
+throttle_store = import_string(settings.THROTTLING["BACKEND"])(**settings.THROTTLING["OPTIONS"])
+
+
+class BucketThrottle(BaseThrottle):
+    """
+    Limitation de débit par seau à jetons, selon la portée ``throttle_scope``
+    de la vue et les débits de ``settings.THROTTLING["RATES"][portée][kind]``.
+
+    Les vues sans portée, ou dont la portée n'a pas de débit pour ce type
+    de clé, ne sont pas limitées. Une vue peut définir
+    ``get_throttle_cost(request)`` pour qu'une requête compte pour plusieurs.
+
+    Les seaux de toutes les classes ``BucketThrottle`` de la vue sont
+    vérifiés ensemble, par la première appelée : une requête refusée par
+    l'un ne consomme de jeton dans aucun autre.
+    """
+
+    kind = None
+
+    def __init__(self):
+        self._wait = 0.0
+
+    def get_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        if not settings.THROTTLING["ENABLED"] or scope is None:
+            return True
+        waits = getattr(request, "_bucket_waits", None)
+        if waits is None:
+            waits = request._bucket_waits = self._consume_all(request, view, scope)
+        self._wait = waits.get(self.kind, 0.0)
+        return self._wait == 0
+
+    def _consume_all(self, request, view, scope):
+        """Consomme dans les seaux de toutes les classes de la vue, ou dans aucun ; rend l'attente par type de clé."""
+        rates = settings.THROTTLING["RATES"].get(scope, {})
+        cost = view.get_throttle_cost(request) if hasattr(view, "get_throttle_cost") else 1
+        throttles = [throttle_class() for throttle_class in getattr(view, "throttle_classes", ())
+                     if issubclass(throttle_class, BucketThrottle) and throttle_class is not type(self)]
+        kinds, buckets = [], []
+        for throttle in [self, *throttles]:
+            rate = rates.get(throttle.kind)
+            key = throttle.get_key(request) if rate else None
+            if key is None:
+                continue
+            capacity, period = parse_rate(rate)
+            kinds.append(throttle.kind)
+            # Une requête plus coûteuse que le seau entier attend qu'il soit plein
+            buckets.append((f"{scope}:{throttle.kind}:{key}", capacity, capacity / period, min(cost, capacity)))
+        return dict(zip(kinds, throttle_store.consume_all(buckets))) if buckets else {}
+
+    def wait(self):
+        return self._wait
+
+
+class IPBucketThrottle(BucketThrottle):
+    """
+    Un seau par adresse IP : ``REMOTE_ADDR``, ou ``X-Forwarded-For`` derrière
+    ``REST_FRAMEWORK["NUM_PROXIES"]`` proxys de confiance.
+    """
+
+    kind = "ip"
+
+    def get_key(self, request):
+        return self.get_ident(request)
+
+
+class UserBucketThrottle(BucketThrottle):
+    """
+    Un seau par utilisateur connecté ou, pour une connexion, par nom
+    d'utilisateur visé et adresse : limite les essais de mots de passe d'un
+    client sur un compte. Le nom seul (corps de la requête, non authentifié)
+    permettrait à n'importe qui de bloquer le compte de son propriétaire.
+    """
+
+    kind = "user"
+
+    def get_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"id:{request.user.pk}"
+        data = getattr(request, "data", None)
+        username = data.get("username") if isinstance(data, Mapping) else None
+        if isinstance(username, str) and username:
+            return f"name:{username.casefold()}:{self.get_ident(request)}"
+        return None
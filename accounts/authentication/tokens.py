@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .blacklist import blacklist_filter
+from .cache import TTLCache
+from .metrics import register_cache
+from .models import TokenVersion
+
+TOKEN_VERSION_CLAIM = "ver"
+
+# Version courante par utilisateur ; même durée de vie que le cache des utilisateurs
+version_cache = TTLCache(
+    max_entries=settings.AUTH_USER_CACHE["MAX_ENTRIES"],
+    ttl=settings.AUTH_USER_CACHE["TTL"],
+)
+register_cache("token_versions", version_cache)
+
+
+def get_token_version(user_id):
+    """Version courante des tokens d'un utilisateur (0 s'il n'en a jamais révoqué)."""
+    key = str(user_id)
+    found = version_cache.lookup(key)
+    if found is not None:
+        return found[0]
+    version = TokenVersion.objects.filter(user_id=user_id).values_list("version", flat=True).first() or 0
+    version_cache.set(key, version)
+    return version
+
+
+def bump_token_versions(user_ids):
+    """
+    Révoque tous les tokens (access et refresh) déjà émis pour ces utilisateurs,
+    en une mise à jour groupée plutôt qu'une ligne de liste noire par token.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    with transaction.atomic():
+        TokenVersion.objects.filter(user_id__in=user_ids).update(version=F("version") + 1)
+        TokenVersion.objects.bulk_create(
+            [TokenVersion(user_id=user_id, version=1) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+    _forget_versions(user_ids)
+    transaction.on_commit(lambda: _forget_versions(user_ids))
+
+
+def _forget_versions(user_ids):
+    for user_id in user_ids:
+        version_cache.delete(str(user_id))
+
+
+def check_token_version(token):
+    """Lève ``TokenError`` si le token a été émis avant la dernière révocation."""
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return
+    # Les tokens émis avant l'ajout du claim sont de génération 0
+    if token.get(TOKEN_VERSION_CLAIM, 0) != get_token_version(user_id):
+        raise TokenError("Token révoqué")
+
+
+class VersionedRefreshToken(RefreshToken):
+    """
+    Refresh token portant la génération de l'utilisateur, vérifiée à chaque
+    rafraîchissement. La liste noire n'est lue en base que si le pré-filtre
+    en mémoire ne peut pas exclure le token.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[TOKEN_VERSION_CLAIM] = get_token_version(user.pk)
+        return token
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        check_token_version(self)
+
+    def check_blacklist(self):
+        if blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return result
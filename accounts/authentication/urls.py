@@ -1,14 +1,21 @@
 from django.urls import path
+from .async_views import AsyncMeView, AsyncWeatherView
 from .views import (
     RegisterView,
     MyTokenObtainPairView,
     LogoutView,
+    LogoutAllView,
     ChangePasswordView,
     BanUserView,
+    BulkBanUserView,
     CookieTokenRefreshView,
     MeView,
     ListUsersView,
-    WeatherView 
+    UserExportView,
+    UserImportView,
+    WeatherView,
+    WeatherBatchView,
+    WeatherStatsView,
 )
 
 urlpatterns = [
@@ -18,15 +25,27 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='auth_register'),
     path('login/', MyTokenObtainPairView.as_view(), name='auth_login'),
     path('logout/', LogoutView.as_view(), name='auth_logout'),
+    path('logout-all/', LogoutAllView.as_view(), name='auth_logout_all'),
     path('token/refresh/', CookieTokenRefreshView.as_view(), name='token_refresh'),
     path('change-password/', ChangePasswordView.as_view(), name='auth_change_password'),
 
     path('me/', MeView.as_view(), name='auth_me'),
     path('users/', ListUsersView.as_view(), name='auth_users'),
+    path('users/export/', UserExportView.as_view(), name='auth_users_export'),
+    path('weather/', WeatherBatchView.as_view(), name='weather_batch'),
     path('weather/<str:city>/', WeatherView.as_view(), name='weather'),
 
+    # -------------------------------
+    # Vues asynchrones (ASGI)
+    # -------------------------------
+    path('async/me/', AsyncMeView.as_view(), name='auth_me_async'),
+    path('async/weather/<str:city>/', AsyncWeatherView.as_view(), name='weather_async'),
+
     # -------------------------------
     # Admin only
     # -------------------------------
     path('ban-user/<int:user_id>/', BanUserView.as_view(), name='ban_user'),
+    path('ban-users/', BulkBanUserView.as_view(), name='ban_users'),
+    path('users/import/', UserImportView.as_view(), name='auth_users_import'),
+    path('weather-stats/', WeatherStatsView.as_view(), name='weather_stats'),
 ]
@@ -1,16 +1,76 @@
-import re
+import gzip
+import string
+import threading
+
+from django.contrib.auth.password_validation import CommonPasswordValidator
 from django.core.exceptions import ValidationError
 
+UPPERCASE = frozenset(string.ascii_uppercase)
+LOWERCASE = frozenset(string.ascii_lowercase)
+SPECIAL_CHARACTERS = frozenset('!@#$%^&*(),.?":{}|<>')
+
+
 class CustomPasswordValidator:
+    """
+    Vérifie toutes les classes de caractères en un seul passage sur le mot
+    de passe et signale toutes les règles non respectées en une fois.
+    """
+
     def validate(self, password, user=None):
-        if not re.search(r'[A-Z]', password):
-            raise ValidationError("Le mot de passe doit contenir au moins une lettre majuscule.")
-        if not re.search(r'[a-z]', password):
-            raise ValidationError("Le mot de passe doit contenir au moins une lettre minuscule.")
-        if not re.search(r'\d', password):
-            raise ValidationError("Le mot de passe doit contenir au moins un chiffre.")
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
-            raise ValidationError("Le mot de passe doit contenir au moins un caractère spécial.")
+        chars = frozenset(password)
+        errors = []
+        if chars.isdisjoint(UPPERCASE):
+            errors.append(ValidationError(
+                "Le mot de passe doit contenir au moins une lettre majuscule.", code="password_no_upper"
+            ))
+        if chars.isdisjoint(LOWERCASE):
+            errors.append(ValidationError(
+                "Le mot de passe doit contenir au moins une lettre minuscule.", code="password_no_lower"
+            ))
+        # Mêmes chiffres que \d (chiffres décimaux Unicode)
+        if not any(char.isdecimal() for char in chars):
+            errors.append(ValidationError(
+                "Le mot de passe doit contenir au moins un chiffre.", code="password_no_digit"
+            ))
+        if chars.isdisjoint(SPECIAL_CHARACTERS):
+            errors.append(ValidationError(
+                "Le mot de passe doit contenir au moins un caractère spécial.", code="password_no_special"
+            ))
+        if errors:
+            raise ValidationError(errors)
 
     def get_help_text(self):
         return "Votre mot de passe doit contenir des majuscules, minuscules, chiffres et caractères spéciaux."
+
+
+_password_lists = {}
+_password_lists_lock = threading.Lock()
+
+
+def load_password_list(path):
+    """Liste de mots de passe courants, lue une seule fois par processus (frozenset partagé)."""
+    path = str(path)
+    with _password_lists_lock:
+        passwords = _password_lists.get(path)
+        if passwords is None:
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    passwords = frozenset(line.strip() for line in f)
+            except OSError:
+                with open(path) as f:
+                    passwords = frozenset(line.strip() for line in f)
+            passwords = _password_lists[path] = passwords
+    return passwords
+
+
+class PreloadedCommonPasswordValidator(CommonPasswordValidator):
+    """
+    ``CommonPasswordValidator`` dont la liste est chargée au démarrage
+    (voir ``AuthenticationConfig.ready``) et partagée par toutes les
+    instances, au lieu d'être décompressée pendant la première requête.
+    """
+
+    def __init__(self, password_list_path=CommonPasswordValidator.DEFAULT_PASSWORD_LIST_PATH):
+        if password_list_path is CommonPasswordValidator.DEFAULT_PASSWORD_LIST_PATH:
+            password_list_path = self.DEFAULT_PASSWORD_LIST_PATH
+        self.passwords = load_password_list(password_list_path)
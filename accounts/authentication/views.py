@@ -1,11 +1,13 @@
-import requests
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -14,19 +16,35 @@ from .serializers import (
     RegisterSerializer, 
     MyTokenObtainPairSerializer, 
     ChangePasswordSerializer,
-    UserListSerializer
+    UserListSerializer,
+    WeatherBatchSerializer,
+    BulkBanSerializer
 )
+from .authentication import ClaimsJWTAuthentication, user_data_from_claims
+from .conditional import conditional_response, profile_validators, users_validators, weather_validators
+from .exports import EXPORT_FORMATS, aiter_export, iter_export
+from .fastjson import FastCreateMixin, compile_serializer, cursor_page_json, fast_json_response
+from .filters import filter_users
+from .hashing import check_user_password, set_user_password
+from .imports import IMPORT_FORMATS, ImportFormatError, import_users
+from .moderation import BULK_BAN_MAX_USERS, ban_users
+from .pagination import UserCursorPagination
+from .tokens import VersionedRefreshToken, bump_token_versions
 
 # ==========================================
 # REGISTER
 # ==========================================
-class RegisterView(generics.CreateAPIView):
+# Réponse encodée par le serializer compilé (voir fastjson.py)
+class RegisterView(FastCreateMixin, generics.CreateAPIView):
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = "register"
+    # Requêtes SQL au plus par appel, caches froids (voir querybudget.py)
+    query_budget = 2
 
     @swagger_auto_schema(
         request_body=RegisterSerializer,
-        responses={201: "Utilisateur créé", 400: "Erreur de validation"}
+        responses={201: "Utilisateur créé", 400: "Erreur de validation", 429: "Trop de requêtes", 503: "Service surchargé"}
     )
     def post(self, request, *args, **kwargs):
         return super().post(request, *args, **kwargs)
@@ -37,10 +55,14 @@ class RegisterView(generics.CreateAPIView):
 # ==========================================
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
+    throttle_scope = "login"
+    # Utilisateur, token « outstanding », version des tokens, et mise à jour
+    # du hachage du mot de passe s'il utilise d'anciens paramètres
+    query_budget = 4
 
     @swagger_auto_schema(
         request_body=MyTokenObtainPairSerializer,
-        responses={200: "Connexion réussie"}
+        responses={200: "Connexion réussie", 429: "Trop de requêtes", 503: "Service surchargé"}
     )
     def post(self, request, *args, **kwargs):
         response = super().post(request, *args, **kwargs)
@@ -63,6 +85,8 @@ class MyTokenObtainPairView(TokenObtainPairView):
 # ==========================================
 class LogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    # Dont la reconstruction du filtre de Bloom au premier appel du processus
+    query_budget = 9
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -80,7 +104,7 @@ class LogoutView(APIView):
         if not refresh_token:
             return Response({"error": "Refresh token manquant."}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            token = RefreshToken(refresh_token)
+            token = VersionedRefreshToken(refresh_token)
             token.blacklist()
             response = Response({"message": "Déconnexion réussie."}, status=status.HTTP_205_RESET_CONTENT)
             response.delete_cookie('refresh_token')
@@ -89,11 +113,38 @@ class LogoutView(APIView):
             return Response({"error": "Refresh token invalide."}, status=status.HTTP_400_BAD_REQUEST)
 
 
+# ==========================================
+# LOGOUT ALL — déconnexion de toutes les sessions
+# ==========================================
+class LogoutAllView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 4
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                'Authorization', openapi.IN_HEADER,
+                description="Token JWT Bearer <token>",
+                type=openapi.TYPE_STRING,
+                required=True
+            )
+        ],
+        responses={205: "Toutes les sessions sont déconnectées"}
+    )
+    def post(self, request):
+        # Un seul incrément invalide tous les access et refresh tokens de l'utilisateur
+        bump_token_versions([request.user.pk])
+        response = Response({"message": "Toutes les sessions ont été déconnectées."}, status=status.HTTP_205_RESET_CONTENT)
+        response.delete_cookie('refresh_token')
+        return response
+
+
 # ==========================================
 # CHANGE PASSWORD
 # ==========================================
 class ChangePasswordView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 5
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -105,7 +156,7 @@ class ChangePasswordView(APIView):
             )
         ],
         request_body=ChangePasswordSerializer,
-        responses={200: "Mot de passe changé", 400: "Erreur de validation"}
+        responses={200: "Mot de passe changé", 400: "Erreur de validation", 503: "Service surchargé"}
     )
     def post(self, request):
         serializer = ChangePasswordSerializer(data=request.data)
@@ -113,11 +164,14 @@ class ChangePasswordView(APIView):
         if serializer.is_valid():
             old_password = serializer.validated_data["old_password"]
             new_password = serializer.validated_data["new_password"]
-            if not user.check_password(old_password):
+            # Vérification et hachage dans le pool de hachage (503 s'il est saturé)
+            if not check_user_password(user, old_password):
                 return Response({"old_password": "Mot de passe incorrect."}, status=400)
-            user.set_password(new_password)
+            set_user_password(user, new_password)
             user.save()
-            return Response({"message": "Mot de passe changé."})
+            # Les tokens existants (cette session comprise) ne sont plus acceptés
+            bump_token_versions([user.pk])
+            return Response({"message": "Mot de passe changé. Veuillez vous reconnecter."})
         return Response(serializer.errors, status=400)
 
 
@@ -126,6 +180,7 @@ class ChangePasswordView(APIView):
 # ==========================================
 class BanUserView(APIView):
     permission_classes = [permissions.IsAdminUser]
+    query_budget = 6
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -147,13 +202,51 @@ class BanUserView(APIView):
             return Response({"error": "Impossible de bannir un admin."}, status=403)
         user_to_ban.is_active = False
         user_to_ban.save()
+        bump_token_versions([user_to_ban.pk])
         return Response({"message": f"L'utilisateur {user_to_ban.username} a été banni."})
 
 
+# ==========================================
+# BAN USERS — bannissement groupé (ADMIN)
+# ==========================================
+class BulkBanUserView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+    # Indépendant du nombre d'utilisateurs bannis
+    query_budget = 6
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                'Authorization', openapi.IN_HEADER,
+                description="Token JWT Admin Bearer <token>",
+                type=openapi.TYPE_STRING,
+                required=True
+            )
+        ],
+        request_body=BulkBanSerializer,
+        responses={200: "Résultat par utilisateur (banni, introuvable, admin ignoré)", 400: "Requête invalide"}
+    )
+    def post(self, request):
+        serializer = BulkBanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = serializer.validated_data.get("ids")
+        if user_ids is None:
+            queryset = filter_users(User.objects.order_by("id"), serializer.validated_data["filter"])
+            user_ids = list(queryset.values_list("id", flat=True)[:BULK_BAN_MAX_USERS + 1])
+            if len(user_ids) > BULK_BAN_MAX_USERS:
+                return Response(
+                    {"error": f"Plus de {BULK_BAN_MAX_USERS} utilisateurs visés : affinez le filtre."},
+                    status=400
+                )
+        return Response(ban_users(user_ids))
+
+
 # ==========================================
 # REFRESH TOKEN
 # ==========================================
 class CookieTokenRefreshView(TokenRefreshView):
+    throttle_scope = "refresh"
+    query_budget = 4
 
     @swagger_auto_schema(
         request_body=openapi.Schema(
@@ -169,13 +262,16 @@ class CookieTokenRefreshView(TokenRefreshView):
                 required=False
             )
         ],
-        responses={200: "Token rafraîchi", 401: "Token invalide"}
+        responses={200: "Token rafraîchi", 401: "Token invalide", 429: "Trop de requêtes"}
     )
     def post(self, request, *args, **kwargs):
         refresh = request.COOKIES.get("refresh_token") or request.data.get("refresh")
         data = {"refresh": refresh} if refresh else {}
         serializer = self.get_serializer(data=data)
-        serializer.is_valid(raise_exception=True)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
         return Response(serializer.validated_data)
 
 
@@ -184,6 +280,16 @@ class CookieTokenRefreshView(TokenRefreshView):
 # ==========================================
 class MeView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    # Lectures sur les réplicas (voir api_fil_rouge/routers.py)
+    read_replica = True
+    query_budget = 2
+
+    def get_authenticators(self):
+        # Mode « claims » : l'utilisateur est reconstruit depuis le token, sans SELECT
+        # sur auth_user (la version des tokens reste lue en base si elle n'est pas en cache)
+        if settings.AUTH_ME_FROM_CLAIMS:
+            return [ClaimsJWTAuthentication()]
+        return super().get_authenticators()
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -194,26 +300,55 @@ class MeView(APIView):
                 required=True
             )
         ],
-        responses={200: "Informations de l'utilisateur connecté"}
+        responses={200: "Informations de l'utilisateur connecté", 304: "Profil inchangé (If-None-Match)"}
     )
     def get(self, request):
-        user = request.user
-        return Response({
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "is_staff": user.is_staff,
-            "is_active": user.is_active,
-        })
+        if settings.AUTH_ME_FROM_CLAIMS:
+            data = user_data_from_claims(request.auth)
+        else:
+            user = request.user
+            data = {
+                "id": user.id,
+                "username": user.username,
+                "email": user.email,
+                "is_staff": user.is_staff,
+                "is_active": user.is_active,
+            }
+        # 304 si le client a déjà ce profil (voir conditional.py)
+        return conditional_response(request, profile_validators(data["id"], data.values()), lambda: Response(data))
 
 
 # ==========================================
 # /auth/users — liste utilisateurs (ADMIN)
 # ==========================================
+# Filtres communs à la liste et à l'export (voir filters.filter_users)
+USER_FILTER_PARAMETERS = [
+    openapi.Parameter(
+        'is_active', openapi.IN_QUERY,
+        description="Filtrer sur les comptes actifs (true/false)",
+        type=openapi.TYPE_BOOLEAN
+    ),
+    openapi.Parameter(
+        'is_staff', openapi.IN_QUERY,
+        description="Filtrer sur les administrateurs (true/false)",
+        type=openapi.TYPE_BOOLEAN
+    ),
+    openapi.Parameter(
+        'joined_after', openapi.IN_QUERY,
+        description="Inscrits après cette date (ISO 8601)",
+        type=openapi.TYPE_STRING,
+        format=openapi.FORMAT_DATETIME
+    ),
+]
+
+
 class ListUsersView(generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = UserListSerializer
+    pagination_class = UserCursorPagination
     permission_classes = [permissions.IsAdminUser]
+    read_replica = True
+    query_budget = 3
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -223,14 +358,112 @@ class ListUsersView(generics.ListAPIView):
                 description="Token JWT Admin Bearer <token>",
                 type=openapi.TYPE_STRING,
                 required=True
-            )
+            ),
+            *USER_FILTER_PARAMETERS,
         ],
-        responses={200: "Liste des utilisateurs"}
+        responses={200: "Page de la liste des utilisateurs", 304: "Aucun utilisateur modifié (If-None-Match)"}
     )
     def list(self, request, *args, **kwargs):
-        users = [{"id": u.id, "username": u.username, "email": u.email, "is_active": u.is_active}
-                 for u in self.get_queryset()]
-        return Response(users)
+        return conditional_response(request, users_validators(), lambda: self._list(request))
+
+    def _list(self, request):
+        # Les lignes sont lues en tuples et encodées directement, sans instancier de modèles
+        page = self.paginate_queryset(filter_users(self.get_queryset(), request.query_params))
+        compiled = compile_serializer(self.serializer_class)
+        response = fast_json_response(request, lambda: cursor_page_json(self.paginator, compiled.rows(page)))
+        return response or self.get_paginated_response([row._asdict() for row in page])
+
+    def get_queryset(self):
+        # Tuples nommés : la pagination lit la position du curseur dans row.id
+        return User.objects.values_list(*compile_serializer(self.serializer_class).sources, named=True)
+
+
+# ==========================================
+# /auth/users/export — export complet en flux (ADMIN)
+# ==========================================
+class UserExportView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+    read_replica = True
+    # Hors flux : les lectures de l'export suivent le retour de la vue
+    query_budget = 2
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                'Authorization', openapi.IN_HEADER,
+                description="Token JWT Admin Bearer <token>",
+                type=openapi.TYPE_STRING,
+                required=True
+            ),
+            openapi.Parameter(
+                'output', openapi.IN_QUERY,
+                description="Format de sortie : ndjson (défaut) ou csv",
+                type=openapi.TYPE_STRING,
+                enum=list(EXPORT_FORMATS)
+            ),
+            *USER_FILTER_PARAMETERS,
+        ],
+        responses={200: "Flux NDJSON ou CSV des utilisateurs", 400: "Format ou filtre invalide"}
+    )
+    def get(self, request):
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            return Response({"output": f"Formats disponibles : {', '.join(EXPORT_FORMATS)}."}, status=400)
+        export_format, content_type, extension = EXPORT_FORMATS[output]
+        # Filtres validés avant le début du flux, pour pouvoir encore répondre 400
+        queryset = filter_users(User.objects.all(), request.query_params)
+        # Sous ASGI, le flux doit être asynchrone pour ne pas être lu en entier avant l'envoi
+        stream = aiter_export if isinstance(request._request, ASGIRequest) else iter_export
+        response = StreamingHttpResponse(stream(queryset, export_format), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="users.{extension}"'
+        return response
+
+# ==========================================
+# USERS IMPORT (ADMIN) — flux NDJSON ou CSV
+# ==========================================
+class UserImportView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+    # Un lot ; chaque lot supplémentaire ajoute 3 requêtes
+    query_budget = 5
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                'Authorization', openapi.IN_HEADER,
+                description="Token JWT Admin Bearer <token>",
+                type=openapi.TYPE_STRING,
+                required=True
+            ),
+            openapi.Parameter(
+                'input', openapi.IN_QUERY,
+                description="Format du corps : ndjson ou csv (par défaut selon le Content-Type, sinon ndjson)",
+                type=openapi.TYPE_STRING,
+                enum=list(IMPORT_FORMATS)
+            ),
+        ],
+        request_body=openapi.Schema(
+            type=openapi.TYPE_STRING,
+            description="Une ligne par utilisateur : username, email, password (en-tête obligatoire en CSV)"
+        ),
+        responses={
+            200: "Rapport d'import : nombre de comptes créés et erreurs par ligne",
+            400: "Format ou fichier invalide",
+            503: "Service surchargé"
+        }
+    )
+    def post(self, request):
+        default = "csv" if request.content_type.startswith("text/csv") else "ndjson"
+        input_format = request.query_params.get("input", default)
+        if input_format not in IMPORT_FORMATS:
+            return Response({"input": f"Formats disponibles : {', '.join(IMPORT_FORMATS)}."}, status=400)
+        # Le corps est lu ligne par ligne, sans passer par les parsers DRF
+        lines = iter(request.stream.readline, b"") if request.stream is not None else iter(())
+        try:
+            report = import_users(IMPORT_FORMATS[input_format](lines))
+        except (ImportFormatError, UnicodeDecodeError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
 
 # ==========================================
 # /weather/<city>/ — météo pour une ville
@@ -240,10 +473,21 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-import requests
+
+from .weather import (
+    UPSTREAM_ERRORS,
+    WeatherUpstreamError,
+    get_weather,
+    get_weather_many,
+    weather_cache,
+    weather_client,
+    weather_flight,
+)
 
 class WeatherView(APIView):
     permission_classes = [AllowAny]  # public
+    throttle_scope = "weather"
+    query_budget = 0
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -256,13 +500,71 @@ class WeatherView(APIView):
         ],
         responses={
             200: "Données météo récupérées",
-            404: "Ville non trouvée"
+            304: "Observation inchangée (If-None-Match / If-Modified-Since)",
+            404: "Ville non trouvée",
+            429: "Trop de requêtes",
+            503: "API météo indisponible"
         }
     )
     def get(self, request, city):
-        api_key = "b224801a8cac5f63451583ccd8d502d6"
-        url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric&lang=fr"
-        r = requests.get(url)
-        if r.status_code == 200:
-            return Response(r.json())
-        return Response({"error": "Ville non trouvée ou API indisponible"}, status=r.status_code)
+        try:
+            data = get_weather(city)
+        except WeatherUpstreamError as e:
+            return Response({"error": "Ville non trouvée ou API indisponible"}, status=e.status_code)
+        except UPSTREAM_ERRORS:
+            return Response({"error": "API météo indisponible"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        # Validateur : heure d'observation fournie par OpenWeatherMap
+        return conditional_response(request, weather_validators(data), lambda: Response(data))
+
+
+# ==========================================
+# /weather/ — météo de plusieurs villes en une requête
+# ==========================================
+class WeatherBatchView(APIView):
+    permission_classes = [AllowAny]  # public
+    throttle_scope = "weather"
+    query_budget = 0
+
+    def get_throttle_cost(self, request):
+        # Chaque ville compte comme une requête météo
+        cities = request.data.get("cities") if isinstance(request.data, dict) else None
+        return len(cities) if isinstance(cities, list) and cities else 1
+
+    @swagger_auto_schema(
+        request_body=WeatherBatchSerializer,
+        responses={
+            200: "Résultat (données ou erreur) pour chaque ville",
+            400: "Liste de villes invalide",
+            429: "Trop de requêtes"
+        }
+    )
+    def post(self, request):
+        serializer = WeatherBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({"results": get_weather_many(serializer.validated_data["cities"])})
+
+
+# ==========================================
+# /weather-stats/ — état du cache et du disjoncteur météo (ADMIN)
+# ==========================================
+class WeatherStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+    query_budget = 2
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                'Authorization', openapi.IN_HEADER,
+                description="Token JWT Admin Bearer <token>",
+                type=openapi.TYPE_STRING,
+                required=True
+            )
+        ],
+        responses={200: "Statistiques du cache et du disjoncteur météo"}
+    )
+    def get(self, request):
+        return Response({
+            "cache": weather_cache.stats(),
+            "circuit_breaker": weather_client.breaker.snapshot(),
+            "single_flight": weather_flight.stats(),
+        })
@@ -0,0 +1,137 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import requests
+from django.conf import settings
+
+from .cache import TTLCache
+from .metrics import register_cache, upstream_timer
+from .http_client import AsyncUpstreamClient, CircuitBreaker, CircuitOpenError, UpstreamClient
+from .singleflight import SingleFlight
+
+
+class WeatherUpstreamError(Exception):
+    """Réponse non exploitable de l'API OpenWeatherMap."""
+
+    def __init__(self, status_code):
+        super().__init__(f"OpenWeatherMap a répondu {status_code}")
+        self.status_code = status_code
+
+
+# API tierce injoignable (disjoncteur ouvert ou erreur réseau)
+UPSTREAM_ERRORS = (CircuitOpenError, requests.RequestException, httpx.HTTPError)
+
+_client_options = dict(
+    connect_timeout=settings.WEATHER_HTTP["CONNECT_TIMEOUT"],
+    read_timeout=settings.WEATHER_HTTP["READ_TIMEOUT"],
+    retries=settings.WEATHER_HTTP["RETRIES"],
+    backoff=settings.WEATHER_HTTP["BACKOFF"],
+    pool_size=settings.WEATHER_HTTP["POOL_SIZE"],
+    # Disjoncteur partagé : les vues synchrones et asynchrones voient la même santé de l'API
+    breaker=CircuitBreaker(
+        failure_threshold=settings.WEATHER_HTTP["BREAKER_THRESHOLD"],
+        reset_timeout=settings.WEATHER_HTTP["BREAKER_RESET_TIMEOUT"],
+    ),
+)
+weather_client = UpstreamClient(**_client_options)
+async_weather_client = AsyncUpstreamClient(**_client_options)
+
+weather_cache = TTLCache(
+    max_entries=settings.WEATHER_CACHE["MAX_ENTRIES"],
+    ttl=settings.WEATHER_CACHE["TTL"],
+    stale_ttl=settings.WEATHER_CACHE["STALE_TTL"],
+)
+register_cache("weather", weather_cache)
+
+# Un seul appel en cours par ville, partagé par les requêtes concurrentes
+weather_flight = SingleFlight()
+
+# Pool partagé par les requêtes groupées : borne le nombre d'appels simultanés vers l'API
+weather_batch_pool = ThreadPoolExecutor(
+    max_workers=settings.WEATHER_BATCH["CONCURRENCY"],
+    thread_name_prefix="weather-batch",
+)
+
+
+def normalize_city(city):
+    """Clé de cache : espaces réduits et casse ignorée ("  Paris " == "paris")."""
+    return " ".join(city.split()).casefold()
+
+
+def _weather_params(city):
+    return {
+        "q": city,
+        "appid": settings.OPENWEATHER_API_KEY,
+        "units": "metric",
+        "lang": "fr",
+    }
+
+
+def fetch_weather(city):
+    """
+    Appelle OpenWeatherMap pour une ville déjà normalisée.
+
+    Peut lever ``CircuitOpenError`` ou ``requests.RequestException`` si l'API
+    tierce est injoignable.
+    """
+    with upstream_timer("openweathermap"):
+        r = weather_client.get(settings.OPENWEATHER_API_URL, params=_weather_params(city))
+    if r.status_code != 200:
+        raise WeatherUpstreamError(r.status_code)
+    return r.json()
+
+
+async def afetch_weather(city):
+    """
+    Variante non bloquante de ``fetch_weather``.
+
+    Peut lever ``CircuitOpenError`` ou ``httpx.HTTPError`` si l'API tierce
+    est injoignable.
+    """
+    with upstream_timer("openweathermap"):
+        r = await async_weather_client.get(settings.OPENWEATHER_API_URL, params=_weather_params(city))
+    if r.status_code != 200:
+        raise WeatherUpstreamError(r.status_code)
+    return r.json()
+
+
+def fetch_weather_once(city):
+    """``fetch_weather`` dédupliqué entre threads concurrents."""
+    return weather_flight.do(city, fetch_weather)
+
+
+async def afetch_weather_once(city):
+    """``afetch_weather`` dédupliqué entre tâches concurrentes."""
+    return await weather_flight.do_async(city, afetch_weather)
+
+
+def get_weather(city):
+    """Météo d'une ville, servie depuis le cache quand c'est possible."""
+    return weather_cache.get_or_fetch(normalize_city(city), fetch_weather_once)
+
+
+async def aget_weather(city):
+    """Variante non bloquante de ``get_weather`` (même cache)."""
+    return await weather_cache.aget_or_fetch(normalize_city(city), afetch_weather_once)
+
+
+def get_weather_result(city):
+    """Météo d'une ville sous forme de résultat individuel (succès ou erreur)."""
+    try:
+        return {"city": city, "status": 200, "data": get_weather(city)}
+    except WeatherUpstreamError as e:
+        return {"city": city, "status": e.status_code, "error": "Ville non trouvée ou API indisponible"}
+    except UPSTREAM_ERRORS:
+        return {"city": city, "status": 503, "error": "API météo indisponible"}
+
+
+def get_weather_many(cities):
+    """
+    Météo de plusieurs villes, récupérée en parallèle.
+
+    Les doublons (après normalisation) ne sont demandés qu'une fois ; les
+    résultats sont renvoyés dans l'ordre des villes demandées.
+    """
+    unique = list(dict.fromkeys(normalize_city(city) for city in cities))
+    results = dict(zip(unique, weather_batch_pool.map(get_weather_result, unique)))
+    return [{**results[normalize_city(city)], "city": city} for city in cities]
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 
+from accounts.authentication.hashing import hash_password
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True)
 
@@ -11,13 +13,14 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """
-        Crée un utilisateur avec mot de passe haché.
+        Crée un utilisateur avec mot de passe haché (dans le pool de hachage).
         """
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
-            password=validated_data['password']
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data['email']),
+            password=hash_password(validated_data['password'])
         )
+        user.save()
         return user
 
 class UserSerializer(serializers.ModelSerializer):
@@ -1,3 +1,105 @@
-from django.test import TestCase
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.authentication.testing import RuntimeStateTestCase, reset_runtime_state
+from accounts.authentication.tokens import VersionedRefreshToken
+from .urls import urlpatterns
+
+
+@override_settings(QUERY_BUDGET={**settings.QUERY_BUDGET, "ENABLED": True, "RAISE": True})
+class QueryBudgetTests(RuntimeStateTestCase):
+    """Tests des budgets de requêtes SQL : chaque route de accounts/users respecte le sien"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+        self.refresh = VersionedRefreshToken.for_user(self.user)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {self.refresh.access_token}"}
+        # Caches froids : la préparation ci-dessus ne doit pas les remplir
+        reset_runtime_state()
+
+    def _post(self, name, data, method="post", **extra):
+        return getattr(self.client, method)(reverse(f"users:{name}"), data=json.dumps(data),
+                                            content_type="application/json", **extra)
+
+    def _requests(self, name):
+        """Requêtes représentatives de chaque route (caches froids)."""
+        if name == "register":
+            return [lambda: self._post(name, {"username": "nouveau", "email": "nouveau@example.com",
+                                              "password": "Nouveau1234!", "password2": "Nouveau1234!"})]
+        if name == "token_obtain_pair":
+            return [lambda: self._post(name, {"username": "user1", "password": "User1234!"})]
+        if name == "token_refresh":
+            return [lambda: self._post(name, {"refresh": str(self.refresh)})]
+        if name == "user_detail":
+            return [
+                lambda: self.client.get(reverse("users:user_detail"), **self.auth),
+                lambda: self._post(name, {"first_name": "Nouveau"}, method="patch", **self.auth),
+                lambda: self.client.delete(reverse("users:user_detail"), **self.auth),
+            ]
+        raise AssertionError(f"Aucune requête de test pour la route {name}")
+
+    def test_every_route_declares_a_budget(self):
+        """Chaque vue de accounts/users/urls.py déclare query_budget"""
+        self.assertRoutesDeclareBudget(urlpatterns)
+
+    def test_every_route_stays_within_budget(self):
+        """Chaque route, caches froids, reste dans son budget et sans requête répétée"""
+        self.assertRoutesWithinBudget(urlpatterns, self._requests)
+
+
+class ConditionalGetTests(RuntimeStateTestCase):
+    """Tests des requêtes conditionnelles sur le profil (ETag, 304)"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def test_user_detail_not_modified(self):
+        """/api/users/users/me/ renvoie 304 sans sérialiser le profil"""
+        first = self.client.get(reverse("users:user_detail"), **self.auth)
+        with mock.patch("accounts.users.views.UserSerializer.to_representation") as to_representation:
+            second = self.client.get(reverse("users:user_detail"), HTTP_IF_NONE_MATCH=first["ETag"], **self.auth)
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        to_representation.assert_not_called()
+
+
+class FastJSONTests(RuntimeStateTestCase):
+    """Tests des réponses encodées par les serializers compilés : mêmes octets que DRF"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="user1", email="user1@example.com", password="User1234!")
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def test_user_detail_bytes(self):
+        """Le profil de /api/users/users/me/ est identique à UserSerializer"""
+        response = self.client.get(reverse("users:user_detail"), **self.auth)
+
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.content, b'{"id":%d,"username":"user1","email":"user1@example.com"}' % self.user.pk)
+
+    def test_register_bytes(self):
+        """L'inscription renvoie les mêmes octets que RegisterSerializer (sans le mot de passe)"""
+        response = self.client.post(reverse("users:register"), data=json.dumps({
+            "username": "nouveau", "email": "nouveau@example.com", "password": "Nouveau1234!",
+        }), content_type="application/json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.content, b'{"username":"nouveau","email":"nouveau@example.com"}')
+
+    def test_indented_json_keeps_drf_path(self):
+        """Un rendu JSON indenté passe par JSONRenderer"""
+        response = self.client.get(reverse("users:user_detail"), HTTP_ACCEPT="application/json; indent=2", **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'\n  "username"', response.content)
@@ -1,19 +1,34 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from django.contrib.auth.models import User
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from accounts.authentication.conditional import conditional_response, profile_validators
+from accounts.authentication.fastjson import FastCreateMixin, compile_serializer, fast_json_response
 from .serializers import RegisterSerializer, UserSerializer
 
 # Endpoint pour l'inscription d'un utilisateur
-class RegisterView(generics.CreateAPIView):
+class RegisterView(FastCreateMixin, generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,)  # Accessible à tous
     serializer_class = RegisterSerializer
+    throttle_scope = "register"  # Limitation de débit (settings.THROTTLING)
+    query_budget = 2  # Requêtes SQL au plus par appel, caches froids (voir querybudget.py)
+
+# Connexion / rafraîchissement JWT, avec les mêmes limites que /api/auth/
+class LoginView(TokenObtainPairView):
+    throttle_scope = "login"
+    query_budget = 4  # Dont la mise à jour d'un hachage de mot de passe obsolète
+
+class RefreshView(TokenRefreshView):
+    throttle_scope = "refresh"
+    query_budget = 4
 
 # Endpoint pour voir, modifier ou supprimer le profil de l'utilisateur connecté
 class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
     permission_classes = (permissions.IsAuthenticated,)  # Authentification requise
     serializer_class = UserSerializer
+    query_budget = 8  # Suppression du compte : une requête par table liée
 
     def get_object(self):
         """
@@ -21,6 +36,21 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
         """
         return self.request.user
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Renvoie 304 si le client a déjà ce profil : l'ETag est calculé à partir
+        des champs exposés, sans sérialiser la réponse.
+        """
+        user = self.get_object()
+        values = [getattr(user, field) for field in UserSerializer.Meta.fields]
+        return conditional_response(request, profile_validators(user.pk, values), lambda: self._profile(user))
+
+    def _profile(self, user):
+        # Encodage direct, mêmes octets que UserSerializer + JSONRenderer
+        compiled = compile_serializer(UserSerializer)
+        response = fast_json_response(self.request, lambda: compiled.instance(user))
+        return response or Response(self.get_serializer(user).data)
+
     def delete(self, request, *args, **kwargs):
         """
         Supprime le compte de l'utilisateur connecté et renvoie un message de confirmation.
@@ -0,0 +1,99 @@
+"""
+Profil de base de données construit à partir des variables d'environnement.
+
+Par défaut : SQLite réglé pour les écritures concurrentes (WAL, verrou pris
+en début de transaction, attente plutôt qu'erreur « database is locked »).
+DB_ENGINE=postgresql (ou mysql) bascule vers un serveur de base de données
+sans modifier le code ; le pilote correspondant doit être installé.
+"""
+
+ENGINES = {
+    "sqlite": "django.db.backends.sqlite3",
+    "postgresql": "django.db.backends.postgresql",
+    "postgres": "django.db.backends.postgresql",
+    "mysql": "django.db.backends.mysql",
+}
+
+
+def _flag(value):
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+def sqlite_init_command(env):
+    """PRAGMA exécutés à l'ouverture de chaque connexion SQLite."""
+    pragmas = {
+        # Lecteurs et écrivain ne se bloquent plus mutuellement
+        "journal_mode": env.get("SQLITE_JOURNAL_MODE", "WAL"),
+        # Suffisant en WAL : pas de corruption possible, seul le dernier commit peut être perdu
+        "synchronous": env.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        # Valeur négative : taille en Kio (ici 20 Mio par connexion)
+        "cache_size": env.get("SQLITE_CACHE_SIZE", "-20000"),
+        "mmap_size": env.get("SQLITE_MMAP_SIZE", str(128 * 1024 * 1024)),
+        # Attente d'un verrou en millisecondes avant l'erreur « database is locked »
+        "busy_timeout": env.get("SQLITE_BUSY_TIMEOUT", "5000"),
+        "temp_store": env.get("SQLITE_TEMP_STORE", "MEMORY"),
+    }
+    return ";".join(f"PRAGMA {name}={value}" for name, value in pragmas.items())
+
+
+def database_from_env(env, default_name):
+    """Entrée de ``DATABASES`` décrite par les variables d'environnement ``env``."""
+    engine = env.get("DB_ENGINE", "sqlite").lower()
+    if engine not in ENGINES:
+        raise ValueError(f"DB_ENGINE inconnu : {engine} (valeurs possibles : {', '.join(ENGINES)})")
+
+    if ENGINES[engine] == ENGINES["sqlite"]:
+        return {
+            "ENGINE": ENGINES[engine],
+            "NAME": env.get("DATABASE_NAME", default_name),
+            "OPTIONS": {
+                "init_command": sqlite_init_command(env),
+                # BEGIN IMMEDIATE : le verrou d'écriture est pris au début de la
+                # transaction, ce qui évite les interblocages lecture -> écriture
+                "transaction_mode": env.get("SQLITE_TRANSACTION_MODE", "IMMEDIATE"),
+                "timeout": int(env.get("SQLITE_BUSY_TIMEOUT", "5000")) / 1000,
+            },
+            # Connexions conservées entre les requêtes (0 : une par requête)
+            "CONN_MAX_AGE": int(env.get("DB_CONN_MAX_AGE", "60")),
+            "CONN_HEALTH_CHECKS": _flag(env.get("DB_CONN_HEALTH_CHECKS", "False")),
+        }
+
+    return {
+        "ENGINE": ENGINES[engine],
+        "NAME": env.get("DATABASE_NAME", "fil_rouge"),
+        "USER": env.get("DB_USER", ""),
+        "PASSWORD": env.get("DB_PASSWORD", ""),
+        "HOST": env.get("DB_HOST", "localhost"),
+        "PORT": env.get("DB_PORT", ""),
+        "CONN_MAX_AGE": int(env.get("DB_CONN_MAX_AGE", "600")),
+        # Vérifie une connexion persistante avant de la réutiliser (redémarrage du serveur)
+        "CONN_HEALTH_CHECKS": _flag(env.get("DB_CONN_HEALTH_CHECKS", "True")),
+        "OPTIONS": {"connect_timeout": int(env.get("DB_CONNECT_TIMEOUT", "5"))},
+    }
+
+
+def replicas_from_env(env, primary):
+    """
+    Réplicas en lecture seule décrits par ``DB_REPLICAS`` (séparés par des
+    virgules) : hôtes (``hôte`` ou ``hôte:port``) pour un serveur, fichiers
+    pour SQLite. Chaque réplica reprend la configuration de ``primary``.
+
+    En local, des réplicas SQLite pointant sur le fichier principal ouvrent
+    des connexions séparées, toujours à jour ; une copie du fichier simule
+    un réplica en retard. Pendant les tests, les réplicas sont des miroirs
+    de la base principale.
+    """
+    targets = [target.strip() for target in env.get("DB_REPLICAS", "").split(",") if target.strip()]
+    replicas = {}
+    for index, target in enumerate(targets, start=1):
+        config = {**primary, "OPTIONS": dict(primary["OPTIONS"]), "TEST": {"MIRROR": "default"}}
+        if primary["ENGINE"] == ENGINES["sqlite"]:
+            config["NAME"] = target
+            # Lectures seules : inutile de prendre le verrou d'écriture
+            config["OPTIONS"].pop("transaction_mode", None)
+        else:
+            host, _, port = target.partition(":")
+            config["HOST"] = host
+            config["PORT"] = port or primary["PORT"]
+        replicas[f"replica{index}"] = config
+    return replicas
@@ -0,0 +1,54 @@
+"""
+Profil de middlewares « API » pour les routes authentifiées par JWT.
+
+Les routes sous ``API_MIDDLEWARE_PROFILE["PREFIXES"]`` sont sans état :
+DRF n'y authentifie que par token (``REST_FRAMEWORK``), sans session ni
+cookie CSRF. Les middlewares de session, CSRF, authentification et messages
+ci-dessous les laissent passer directement ; les autres routes (``/admin/``,
+interfaces Swagger) gardent la chaîne complète.
+
+Ce sont des sous-classes des middlewares de Django, à la même place dans
+``MIDDLEWARE`` : l'ordre de la chaîne et les vérifications de l'admin sont
+inchangés.
+"""
+from django.conf import settings
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.middleware import csrf
+
+
+def is_api_request(request):
+    """Vrai si la requête suit le profil API (chaîne de middlewares réduite)."""
+    config = settings.API_MIDDLEWARE_PROFILE
+    return config["ENABLED"] and request.path_info.startswith(config["PREFIXES"])
+
+
+class APIBypassMixin:
+    """Le middleware n'intervient pas sur les requêtes du profil API."""
+
+    def __call__(self, request):
+        if is_api_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(APIBypassMixin, sessions.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(APIBypassMixin, csrf.CsrfViewMiddleware):
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        # Appelé par le gestionnaire de Django, hors de __call__
+        if is_api_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(APIBypassMixin, auth.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(APIBypassMixin, messages.MessageMiddleware):
+    pass
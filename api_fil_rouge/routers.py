@@ -0,0 +1,234 @@
+"""
+Lectures sur réplicas pour les vues en lecture seule.
+
+Une vue déclare ``read_replica = True`` : ses requêtes GET/HEAD lisent sur
+les alias de ``REPLICA_READS["ALIASES"]``, choisis à tour de rôle. Toutes
+les autres requêtes, et toutes les écritures, vont sur la base principale.
+
+Lecture de ses propres écritures : après une requête d'écriture réussie,
+l'utilisateur reste sur la base principale pendant ``PIN_SECONDS``. Ce
+maintien est stocké dans le cache ``CACHE_ALIAS``, qui doit être partagé
+entre les processus : avec un cache propre au processus (``LocMemCache``,
+le défaut sans ``CACHES``), les réplicas ne sont pas utilisés et
+``manage.py check`` signale l'erreur.
+"""
+import contextvars
+import itertools
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Vrai pendant le traitement d'une requête autorisée à lire sur les réplicas
+_replica_reads = contextvars.ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Envoie les lectures du bloc sur les réplicas (s'il y en a)."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_reads_enabled():
+    return _replica_reads.get()
+
+
+class ReplicaRouter:
+    """Lectures sur les réplicas à tour de rôle, si le contexte le permet ; le reste sur ``default``."""
+
+    def __init__(self, aliases=None):
+        self.aliases = list(settings.REPLICA_READS["ALIASES"] if aliases is None else aliases)
+        # next() sur itertools.cycle est atomique sous le GIL
+        self._next_alias = itertools.cycle(self.aliases).__next__ if self.aliases else None
+
+    def db_for_read(self, model, **hints):
+        if self._next_alias is None or not _replica_reads.get():
+            return None
+        # Dans une transaction ouverte sur la base principale, on lit ses propres
+        # écritures non validées (c'est aussi le cas de chaque test d'un TestCase)
+        if connections["default"].in_atomic_block:
+            return None
+        return self._next_alias()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplicas et base principale contiennent les mêmes données
+        databases = {"default", *self.aliases}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Les réplicas reçoivent le schéma par réplication
+        return False if db in self.aliases else None
+
+
+# ------------------------------------------------------------
+# Lecture de ses propres écritures
+# ------------------------------------------------------------
+def _pin_key(user_id):
+    return f"replica-pin:{user_id}"
+
+
+def _pin_cache():
+    return caches[settings.REPLICA_READS["CACHE_ALIAS"]]
+
+
+def pins_are_shared():
+    """Faux si le cache des maintiens est propre au processus (``LocMemCache``)."""
+    return not isinstance(_pin_cache(), LocMemCache)
+
+
+def replicas_enabled():
+    """Vrai s'il y a des réplicas et que le maintien sur la base principale est vu par tous les processus."""
+    return bool(settings.REPLICA_READS["ALIASES"]) and pins_are_shared()
+
+
+@checks.register(checks.Tags.database)
+def check_shared_pins(app_configs, **kwargs):
+    if not settings.REPLICA_READS["ALIASES"] or pins_are_shared():
+        return []
+    return [checks.Error(
+        "REPLICA_READS[\"CACHE_ALIAS\"] désigne un cache propre au processus : un autre "
+        "processus lirait sur un réplica en retard juste après une écriture. Les réplicas ne sont pas utilisés.",
+        hint="Configurez un cache partagé (Redis, Memcached, base de données) dans CACHES et DB_REPLICA_PIN_CACHE.",
+        id="routers.E001",
+    )]
+
+
+def pin_to_primary(user_id):
+    """Garde les lectures de ``user_id`` sur la base principale pendant ``PIN_SECONDS``."""
+    _pin_cache().set(_pin_key(user_id), True, timeout=settings.REPLICA_READS["PIN_SECONDS"])
+
+
+def is_pinned_to_primary(user_id):
+    return bool(_pin_cache().get(_pin_key(user_id)))
+
+
+def user_id_from_request(request):
+    """
+    Identifiant de l'utilisateur du token d'accès ``Authorization``, ou None.
+
+    Seules la signature et l'expiration sont vérifiées, sans requête en base :
+    l'authentification complète reste faite par la vue.
+    """
+    parts = request.headers.get("Authorization", "").split()
+    if len(parts) != 2 or parts[0] not in api_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        return str(AccessToken(parts[1]).get(api_settings.USER_ID_CLAIM))
+    except TokenError:
+        return None
+
+
+def _stream_with_replica_reads(content):
+    # Les réponses en flux exécutent leurs requêtes après le retour de la vue.
+    # Sous ASGI, chaque morceau peut être produit dans un contexte différent :
+    # la variable est posée puis restaurée autour de chaque morceau.
+    iterator = iter(content)
+    while True:
+        previous = _replica_reads.get()
+        _replica_reads.set(True)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _replica_reads.set(previous)
+        yield chunk
+
+
+async def _astream_with_replica_reads(content):
+    iterator = aiter(content)
+    while True:
+        previous = _replica_reads.get()
+        _replica_reads.set(True)
+        try:
+            chunk = await anext(iterator)
+        except StopAsyncIteration:
+            return
+        finally:
+            _replica_reads.set(previous)
+        yield chunk
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Active les lectures sur réplicas pour les vues ``read_replica`` et applique le maintien sur le primaire.
+
+    Synchrone et asynchrone : sous ASGI, la chaîne reste asynchrone jusqu'aux vues natives.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request._replica_reads = False
+        previous = _replica_reads.get()
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_reads.set(previous)
+        return self._finish(request, response)
+
+    async def __acall__(self, request):
+        request._replica_reads = False
+        previous = _replica_reads.get()
+        try:
+            response = await self.get_response(request)
+        finally:
+            # process_view, exécuté dans un thread, a pu poser la variable dans ce contexte
+            _replica_reads.set(previous)
+        return self._finish(request, response)
+
+    def _finish(self, request, response):
+        if request._replica_reads and response.streaming:
+            stream = _astream_with_replica_reads if response.is_async else _stream_with_replica_reads
+            response.streaming_content = stream(response.streaming_content)
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and replicas_enabled()
+        ):
+            user = getattr(request, "user", None)
+            # DRF recopie l'utilisateur authentifié par JWT sur la requête Django
+            user_id = str(user.pk) if user is not None and user.is_authenticated else user_id_from_request(request)
+            if user_id is not None:
+                pin_to_primary(user_id)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+        if (
+            not getattr(view_class, "read_replica", False)
+            or request.method not in SAFE_METHODS
+            or not replicas_enabled()
+        ):
+            return None
+        user_id = user_id_from_request(request)
+        if user_id is not None and is_pinned_to_primary(user_id):
+            return None
+        request._replica_reads = True
+        _replica_reads.set(True)
+        return None
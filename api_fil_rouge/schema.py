@@ -0,0 +1,148 @@
+"""
+Schéma OpenAPI généré une seule fois par version du code.
+
+L'introspection de drf-yasg (toutes les vues et tous les serializers) est
+faite au premier appel du processus, ou lue depuis ``OPENAPI_SCHEMA["FILE"]``
+écrit par ``python manage.py build_schema`` si ce fichier correspond au code
+courant (empreinte des sources). Le document est ensuite servi depuis la
+mémoire avec un ETag fort : un client qui le redemande reçoit un 304.
+"""
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+import django
+import drf_yasg
+import rest_framework
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import condition, require_safe
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, yaml_sane_dump
+from drf_yasg.generators import OpenAPISchemaGenerator
+
+API_INFO = openapi.Info(
+    title="Fil Rouge API",
+    default_version='v1',
+    description="Documentation Swagger pour le projet Fil Rouge",
+    contact=openapi.Contact(email="ton.email@example.com"),
+)
+
+# Extension du document qui identifie la version du code ayant servi à le générer
+FINGERPRINT_KEY = "x-code-fingerprint"
+
+CONTENT_TYPES = {
+    ".json": "application/json",
+    ".yaml": "application/yaml; charset=utf-8",
+}
+
+
+def code_fingerprint(sources=None):
+    """Empreinte du contenu des fichiers Python de ``sources`` et des versions des bibliothèques."""
+    digest = hashlib.sha256()
+    for library in (django, rest_framework, drf_yasg):
+        digest.update(f"{library.__name__}={library.__version__}\n".encode())
+    for source in sources if sources is not None else settings.OPENAPI_SCHEMA["SOURCES"]:
+        source = Path(source)
+        for path in sorted(source.rglob("*.py")):
+            digest.update(str(path.relative_to(source)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def generate_schema():
+    """Introspection complète de l'API (coûteuse) ; rend le document sous forme de dict."""
+    generator = OpenAPISchemaGenerator(API_INFO)
+    # Sans requête : le document ne dépend ni de l'hôte ni de l'utilisateur
+    schema = generator.get_schema(request=None, public=True)
+    return json.loads(OpenAPICodecJson(validators=[]).encode(schema))
+
+
+class SchemaDocument:
+    """Document OpenAPI sérialisé une fois par format, avec son ETag."""
+
+    def __init__(self, data):
+        self.data = data
+        self.fingerprint = data.get(FINGERPRINT_KEY)
+        self._lock = threading.Lock()
+        self._encoded = {}  # format -> (contenu, ETag)
+        self._encode(".json")
+
+    def _encode(self, format):
+        with self._lock:
+            if format not in self._encoded:
+                if format == ".json":
+                    content = json.dumps(self.data, ensure_ascii=False, separators=(",", ":")).encode()
+                else:
+                    # YAML rarement demandé : sérialisé au premier appel seulement
+                    content = yaml_sane_dump(self.data, binary=True)
+                self._encoded[format] = (content, hashlib.sha256(content).hexdigest()[:32])
+            return self._encoded[format]
+
+    def content(self, format=".json"):
+        return self._encode(format)[0]
+
+    def etag(self, format=".json"):
+        return self._encode(format)[1]
+
+
+def build_schema_document(fingerprint=None):
+    data = generate_schema()
+    data[FINGERPRINT_KEY] = fingerprint or code_fingerprint()
+    return SchemaDocument(data)
+
+
+def load_schema_document(path, fingerprint):
+    """Document enregistré dans ``path``, s'il a été généré pour ce code ; sinon None."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return SchemaDocument(data) if data.get(FINGERPRINT_KEY) == fingerprint else None
+
+
+_document = None
+_document_lock = threading.Lock()
+
+
+def get_schema_document():
+    """Document du processus : lu depuis le fichier à jour, sinon généré au premier appel."""
+    global _document
+    if _document is None:
+        with _document_lock:
+            if _document is None:
+                fingerprint = code_fingerprint()
+                path = settings.OPENAPI_SCHEMA["FILE"]
+                _document = (path and load_schema_document(path, fingerprint)) or build_schema_document(fingerprint)
+    return _document
+
+
+def reset_schema_document():
+    global _document
+    with _document_lock:
+        _document = None
+
+
+def _schema_etag(request, format=".json"):
+    return get_schema_document().etag(format)
+
+
+@require_safe
+@condition(etag_func=_schema_etag)
+def schema_file_view(request, format=".json"):
+    """``/swagger.json`` et ``/swagger.yaml`` : 304 si l'ETag du client est à jour."""
+    response = HttpResponse(get_schema_document().content(format), content_type=CONTENT_TYPES[format])
+    # Revalidation à chaque fois, peu coûteuse grâce à l'ETag
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+def with_cached_spec(ui_view):
+    """Sert ``?format=openapi`` (ancienne URL du schéma des interfaces) depuis le document en mémoire."""
+    def view(request, *args, **kwargs):
+        if request.GET.get("format") == "openapi":
+            return schema_file_view(request, format=".json")
+        return ui_view(request, *args, **kwargs)
+    return view
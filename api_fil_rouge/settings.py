@@ -7,6 +7,8 @@ from datetime import timedelta
 from dotenv import load_dotenv
 import os
 
+from .database import database_from_env, replicas_from_env
+
 # ------------------------------------------------------------
 # Chargement des variables d'environnement
 # ------------------------------------------------------------
@@ -48,15 +50,34 @@ INSTALLED_APPS = [
 # ------------------------------------------------------------
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Doit être en premier
+    # Durées, requêtes SQL et en-tête Server-Timing (agrégats sur /metrics)
+    'accounts.authentication.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    # Session, CSRF, authentification et messages : ignorés sur les routes du
+    # profil API (voir API_MIDDLEWARE_PROFILE et api_fil_rouge/middleware.py)
+    'api_fil_rouge.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'api_fil_rouge.middleware.CsrfViewMiddleware',
+    'api_fil_rouge.middleware.AuthenticationMiddleware',
+    'api_fil_rouge.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Budget SQL des vues et détection des N+1 (DEBUG ou QUERY_BUDGET_ENABLED)
+    'accounts.authentication.querybudget.QueryBudgetMiddleware',
+    # Lectures sur réplicas des vues read_replica (voir api_fil_rouge/routers.py)
+    'api_fil_rouge.routers.ReplicaRoutingMiddleware',
 ]
 
+# Profil « API » : requêtes authentifiées par JWT uniquement, sans session,
+# CSRF ni messages. Les autres routes (/admin/…) gardent la chaîne complète.
+API_MIDDLEWARE_PROFILE = {
+    "ENABLED": os.getenv("API_MIDDLEWARE_PROFILE_ENABLED", "True") == "True",
+    "PREFIXES": tuple(os.getenv("API_MIDDLEWARE_PROFILE_PREFIXES", "/api/").split(",")),
+}
+
+# La vérification de déploiement cherche CsrfViewMiddleware par son chemin
+# exact : la protection CSRF est assurée par sa sous-classe ci-dessus
+SILENCED_SYSTEM_CHECKS = ["security.W003"]
+
 # ------------------------------------------------------------
 # CORS et cookies
 # ------------------------------------------------------------
@@ -99,11 +120,24 @@ WSGI_APPLICATION = 'api_fil_rouge.wsgi.application'
 # ------------------------------------------------------------
 # Base de données
 # ------------------------------------------------------------
+# SQLite réglé pour la concurrence par défaut, ou serveur via DB_ENGINE
+# (voir api_fil_rouge/database.py pour les variables disponibles)
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': DATABASE_NAME,
-    }
+    'default': database_from_env(os.environ, DATABASE_NAME),
+}
+# Réplicas en lecture (DB_REPLICAS) : alias replica1, replica2…
+DATABASES.update(replicas_from_env(os.environ, DATABASES['default']))
+
+# Les vues marquées read_replica lisent sur les réplicas, à tour de rôle
+DATABASE_ROUTERS = ['api_fil_rouge.routers.ReplicaRouter']
+
+REPLICA_READS = {
+    "ALIASES": [alias for alias in DATABASES if alias != 'default'],
+    # Après une écriture, les lectures de l'utilisateur restent sur la base
+    # principale pendant ce délai (secondes), le temps que les réplicas rattrapent
+    "PIN_SECONDS": float(os.getenv("DB_REPLICA_PIN_SECONDS", "5")),
+    # Doit être partagé entre les processus (pas LocMem), sinon les réplicas ne sont pas utilisés
+    "CACHE_ALIAS": os.getenv("DB_REPLICA_PIN_CACHE", "default"),
 }
 
 # ------------------------------------------------------------
@@ -112,11 +146,40 @@ DATABASES = {
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator', 'OPTIONS': {'min_length': 8}},
-    {'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator'},
+    # Liste des mots de passe courants chargée au démarrage (voir AuthenticationConfig.ready)
+    {'NAME': 'accounts.authentication.validators.PreloadedCommonPasswordValidator'},
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
     {'NAME': 'accounts.authentication.validators.CustomPasswordValidator'},
 ]
 
+# ------------------------------------------------------------
+# Hachage des mots de passe
+# ------------------------------------------------------------
+PASSWORD_HASHERS = [
+    'accounts.authentication.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Itérations PBKDF2 (0 : valeur par défaut de Django), à calibrer avec
+# python manage.py benchmark hashing --target-ms <latence visée>
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "0"))
+
+AUTHENTICATION_BACKENDS = ['accounts.authentication.backends.PooledModelBackend']
+
+# Pool de processus dédié au hachage (0 worker : hachage dans le thread de la requête)
+PASSWORD_HASHING_POOL = {
+    "WORKERS": int(os.getenv("PASSWORD_HASHING_WORKERS", str(os.cpu_count() or 1))),
+    # Hachages en attente au-delà desquels les connexions reçoivent un 503 immédiat
+    "MAX_PENDING": int(os.getenv("PASSWORD_HASHING_MAX_PENDING", "32")),
+    "TIMEOUT": float(os.getenv("PASSWORD_HASHING_TIMEOUT", "10")),
+    # Valeur de l'en-tête Retry-After des réponses 503 (secondes)
+    "RETRY_AFTER": int(os.getenv("PASSWORD_HASHING_RETRY_AFTER", "1")),
+    "START_METHOD": os.getenv("PASSWORD_HASHING_START_METHOD", "spawn"),
+}
+
 # ------------------------------------------------------------
 # Internationalisation
 # ------------------------------------------------------------
@@ -136,11 +199,55 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # ------------------------------------------------------------
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # Sans effet sur les vues qui ne déclarent pas de throttle_scope
+    'DEFAULT_THROTTLE_CLASSES': (
+        'accounts.authentication.throttling.IPBucketThrottle',
+        'accounts.authentication.throttling.UserBucketThrottle',
+    ),
+    # Nombre de proxys de confiance devant l'application : 0 (par défaut), l'adresse
+    # est REMOTE_ADDR ; sinon elle est lue dans X-Forwarded-For, que le client
+    # peut falsifier s'il atteint l'application sans passer par ces proxys
+    'NUM_PROXIES': int(os.getenv('THROTTLE_NUM_PROXIES', '0')),
+}
+
+# Limitation de débit (seaux à jetons) par portée de vue : "ip" compte par
+# adresse, "user" par utilisateur connecté ou par nom d'utilisateur visé et adresse
+THROTTLING = {
+    "ENABLED": os.getenv("THROTTLE_ENABLED", "True") == "True",
+    # LocalBucketStore : par processus ; CacheBucketStore : partagé via un cache Django
+    "BACKEND": os.getenv("THROTTLE_BACKEND", "accounts.authentication.throttling.LocalBucketStore"),
+    "OPTIONS": {},
+    "RATES": {
+        "login": {"ip": os.getenv("THROTTLE_LOGIN_IP", "30/min"), "user": os.getenv("THROTTLE_LOGIN_USER", "5/min")},
+        "register": {"ip": os.getenv("THROTTLE_REGISTER_IP", "10/hour")},
+        "refresh": {"ip": os.getenv("THROTTLE_REFRESH_IP", "60/min")},
+        "weather": {"ip": os.getenv("THROTTLE_WEATHER_IP", "120/min"), "user": os.getenv("THROTTLE_WEATHER_USER", "60/min")},
+    },
+}
+
+# Cache local des utilisateurs authentifiés (évite un SELECT par requête)
+AUTH_USER_CACHE = {
+    "MAX_ENTRIES": int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "10000")),
+    # Délai maximal avant qu'un autre processus voie une modification de l'utilisateur
+    "TTL": int(os.getenv("AUTH_USER_CACHE_TTL", "30")),
+}
+
+# /me/ répond à partir des claims du token, sans lire auth_user ; seule la
+# version des tokens (révocation) est lue en base quand elle n'est pas en cache
+AUTH_ME_FROM_CLAIMS = os.getenv("AUTH_ME_FROM_CLAIMS", "False") == "True"
+
+# Requêtes conditionnelles (ETag / Last-Modified, 304) sur les profils, la
+# liste des utilisateurs et la météo ; les versions des utilisateurs sont
+# stockées dans ce cache, qui doit être partagé entre les processus (sinon la
+# liste des utilisateurs n'a pas de validateurs, voir manage.py check --deploy)
+CONDITIONAL_GET = {
+    "ENABLED": os.getenv("CONDITIONAL_GET_ENABLED", "True") == "True",
+    "CACHE_ALIAS": os.getenv("CONDITIONAL_GET_CACHE", "default"),
 }
 
 SIMPLE_JWT = {
@@ -150,6 +257,45 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    # Tokens versionnés : révocation de tous les tokens d'un utilisateur en un incrément
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.authentication.serializers.MyTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.authentication.serializers.VersionedTokenRefreshSerializer',
+}
+
+# Pré-filtre de Bloom devant la liste noire des refresh tokens (durées en secondes)
+TOKEN_BLACKLIST_FILTER = {
+    "ENABLED": os.getenv("TOKEN_BLACKLIST_FILTER_ENABLED", "True") == "True",
+    "CAPACITY": int(os.getenv("TOKEN_BLACKLIST_FILTER_CAPACITY", "100000")),
+    "ERROR_RATE": float(os.getenv("TOKEN_BLACKLIST_FILTER_ERROR_RATE", "0.01")),
+    # Délai maximal avant qu'un processus voie une déconnexion faite par un autre
+    "SYNC_INTERVAL": float(os.getenv("TOKEN_BLACKLIST_FILTER_SYNC_INTERVAL", "5")),
+    # Reconstruction complète, qui oublie les tokens expirés ou purgés
+    "REBUILD_INTERVAL": float(os.getenv("TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL", "3600")),
+}
+
+# Purge des tokens expirés (python manage.py purge_token_blacklist)
+TOKEN_BLACKLIST_PURGE = {
+    "BATCH_SIZE": int(os.getenv("TOKEN_BLACKLIST_PURGE_BATCH_SIZE", "1000")),
+    # Lignes supprimées par seconde au maximum (0 : pas de limite)
+    "MAX_RATE": int(os.getenv("TOKEN_BLACKLIST_PURGE_MAX_RATE", "5000")),
+}
+
+# Métriques des requêtes (format Prometheus sur /metrics)
+METRICS = {
+    "ENABLED": os.getenv("METRICS_ENABLED", "True") == "True",
+    "SERVER_TIMING": os.getenv("METRICS_SERVER_TIMING", "True") == "True",
+    # Jeton exigé pour lire /metrics (Authorization: Bearer <jeton>) ; vide : /metrics est fermé
+    "TOKEN": os.getenv("METRICS_TOKEN", ""),
+}
+
+# Budgets de requêtes SQL des vues (attribut query_budget)
+QUERY_BUDGET = {
+    # Non défini (None) : suit DEBUG à chaque requête, donc désactivé pendant les tests
+    "ENABLED": {"True": True, "False": False}.get(os.getenv("QUERY_BUDGET_ENABLED")),
+    # Lève une erreur au lieu d'un avertissement dans les logs (tests)
+    "RAISE": os.getenv("QUERY_BUDGET_RAISE", "False") == "True",
+    # Une même requête exécutée autant de fois dans une requête HTTP est signalée (N+1)
+    "DUPLICATE_THRESHOLD": int(os.getenv("QUERY_BUDGET_DUPLICATE_THRESHOLD", "3")),
 }
 
 # ------------------------------------------------------------
@@ -166,3 +312,43 @@ SWAGGER_SETTINGS = {
     },
     "USE_SESSION_AUTH": False,
 }
+
+# Schéma OpenAPI précalculé (python manage.py build_schema) : lu au démarrage
+# s'il correspond au code de SOURCES, sinon généré au premier appel
+OPENAPI_SCHEMA = {
+    "FILE": os.getenv("OPENAPI_SCHEMA_FILE", ""),
+    "SOURCES": [BASE_DIR / "accounts", BASE_DIR / "api_fil_rouge"],
+}
+
+# ------------------------------------------------------------
+# Météo (OpenWeatherMap)
+# ------------------------------------------------------------
+OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "b224801a8cac5f63451583ccd8d502d6")
+OPENWEATHER_API_URL = os.getenv("OPENWEATHER_API_URL", "https://api.openweathermap.org/data/2.5/weather")
+
+# Client HTTP partagé vers OpenWeatherMap (délais en secondes)
+WEATHER_HTTP = {
+    "CONNECT_TIMEOUT": float(os.getenv("WEATHER_HTTP_CONNECT_TIMEOUT", "2")),
+    "READ_TIMEOUT": float(os.getenv("WEATHER_HTTP_READ_TIMEOUT", "5")),
+    "RETRIES": int(os.getenv("WEATHER_HTTP_RETRIES", "2")),
+    "BACKOFF": float(os.getenv("WEATHER_HTTP_BACKOFF", "0.2")),
+    "POOL_SIZE": int(os.getenv("WEATHER_HTTP_POOL_SIZE", "20")),
+    # Disjoncteur : nombre d'échecs consécutifs avant ouverture, puis durée d'ouverture
+    "BREAKER_THRESHOLD": int(os.getenv("WEATHER_BREAKER_THRESHOLD", "5")),
+    "BREAKER_RESET_TIMEOUT": float(os.getenv("WEATHER_BREAKER_RESET_TIMEOUT", "30")),
+}
+
+# Requêtes météo groupées
+WEATHER_BATCH = {
+    "MAX_CITIES": int(os.getenv("WEATHER_BATCH_MAX_CITIES", "50")),
+    # Nombre maximum d'appels simultanés vers OpenWeatherMap (tous lots confondus)
+    "CONCURRENCY": int(os.getenv("WEATHER_BATCH_CONCURRENCY", "10")),
+}
+
+# Cache LRU des réponses météo (durées en secondes)
+WEATHER_CACHE = {
+    "MAX_ENTRIES": int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "512")),
+    "TTL": int(os.getenv("WEATHER_CACHE_TTL", "600")),
+    # Durée pendant laquelle une entrée expirée est encore servie pendant son rafraîchissement
+    "STALE_TTL": int(os.getenv("WEATHER_CACHE_STALE_TTL", "1800")),
+}
@@ -6,18 +6,18 @@ The `urlpatterns` list routes URLs to views. For more information please see:
 """
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 
+from accounts.authentication.metrics import metrics_view
+
+from .schema import API_INFO, schema_file_view, with_cached_spec
+
+# Interfaces Swagger UI et ReDoc ; le schéma lui-même est généré une fois
+# et servi avec un ETag (voir api_fil_rouge/schema.py)
 schema_view = get_schema_view(
-   openapi.Info(
-      title="Fil Rouge API",
-      default_version='v1',
-      description="Documentation Swagger pour le projet Fil Rouge",
-      contact=openapi.Contact(email="ton.email@example.com"),
-   ),
+   API_INFO,
    public=True,
    permission_classes=(permissions.AllowAny,),
 )
@@ -26,7 +26,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/users/', include('accounts.users.urls')),
     path('api/auth/', include('accounts.authentication.urls')),
-    path('swagger(<format>\.json|\.yaml)', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('metrics', metrics_view, name='metrics'),
+    re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_file_view, name='schema-json'),
+    path('swagger/', with_cached_spec(schema_view.with_ui('swagger')), name='schema-swagger-ui'),
+    path('redoc/', with_cached_spec(schema_view.with_ui('redoc')), name='schema-redoc'),
 ]